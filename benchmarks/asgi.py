@@ -0,0 +1,183 @@
+"""
+WSGI (server/app.py) vs ASGI (server/asgi.py) under many concurrent slow clients.
+
+    python -m benchmarks.asgi --clients 10 100 1000 --client-delay 1
+
+Builds the dataset (see server/synthetic.py) as benchmarks/routes.py
+does, then for each --clients count has that many clients request --path
+at once. Every client takes --client-delay seconds to read its response:
+
+- wsgi: the Flask app behind --threads worker threads (as with
+  `gunicorn --threads`); a worker stays busy until its client has read
+  the whole response, so clients beyond --threads queue up;
+- asgi: the ASGI app on one event loop; a slow client only leaves a send
+  pending, and the database work is done on the async engine.
+
+Reports per server and client count: wall time, requests per second,
+p50 / p95 latency (from the moment all clients connect) and the peak
+number of threads in the process.
+
+Use --json to save the numbers and compare them between commits.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .routes import percentile, print_table
+
+
+COLUMNS = ["server", "clients", "wall_s", "requests_per_s", "p50_ms", "p95_ms", "peak_threads"]
+
+
+def summarize(server, clients, wall, latencies, peak_threads):
+    return {
+        "server": server,
+        "clients": clients,
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(clients / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "peak_threads": peak_threads,
+    }
+
+
+def run_wsgi(app, path, clients, delay, threads):
+    client = app.test_client()
+    started = time.perf_counter()
+
+    def serve(_):
+        resp = client.get(path)
+        resp.get_data()
+        # The worker is busy writing to the slow client
+        time.sleep(delay)
+        resp.close()
+        if resp.status_code != 200:
+            raise RuntimeError(f"wsgi: GET {path} -> {resp.status_code}")
+        return (time.perf_counter() - started) * 1000, threading.active_count()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(serve, range(clients)))
+    wall = time.perf_counter() - started
+    return summarize(
+        "wsgi", clients, wall, [r[0] for r in results], max(r[1] for r in results)
+    )
+
+
+async def run_asgi(asgi_app, path, clients, delay):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [],
+        "server": ("localhost", 80),
+    }
+    started = time.perf_counter()
+
+    async def serve():
+        status = None
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif not message.get("more_body"):
+                # The slow client reads the response
+                await asyncio.sleep(delay)
+
+        await asgi_app(dict(scope), receive, send)
+        if status != 200:
+            raise RuntimeError(f"asgi: GET {path} -> {status}")
+        return (time.perf_counter() - started) * 1000, threading.active_count()
+
+    try:
+        results = await asyncio.gather(*(serve() for _ in range(clients)))
+    finally:
+        # Pooled connections belong to this event loop
+        await asgi_app.engine.dispose()
+    wall = time.perf_counter() - started
+    return summarize(
+        "asgi", clients, wall, [r[0] for r in results], max(r[1] for r in results)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workouts", type=int, default=20000)
+    parser.add_argument("--exercises", type=int, default=500)
+    parser.add_argument("--per-workout", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--path", default="/workouts?limit=20")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--client-delay",
+        type=float,
+        default=1.0,
+        help="Seconds each client takes to read its response",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=32, help="WSGI worker threads"
+    )
+    parser.add_argument(
+        "--database", help="SQLite file to use (default: a temporary file)"
+    )
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if args.database:
+        path = os.path.abspath(args.database)
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "bench.db")
+    fresh = not os.path.exists(path)
+    from server.asgi import create_asgi_app
+    from server.models import db
+    from server.synthetic import generate_dataset
+
+    asgi_app = create_asgi_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+    app = asgi_app.flask_app
+
+    with app.app_context():
+        if fresh:
+            db.create_all()
+            started = time.perf_counter()
+            counts = generate_dataset(
+                args.workouts, args.exercises, args.per_workout, seed=args.seed
+            )
+            print(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+
+    results = []
+    for clients in args.clients:
+        results.append(
+            run_wsgi(app, args.path, clients, args.client_delay, args.threads)
+        )
+        results.append(
+            asyncio.run(run_asgi(asgi_app, args.path, clients, args.client_delay))
+        )
+    print_table(results, COLUMNS)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Encoding time of WorkoutSchema list dumps, per dumper and JSON provider.
+
+    python -m benchmarks.encoding --workouts 2000 --page-sizes 50 500
+
+Builds the dataset (see server/synthetic.py) in a temporary SQLite file,
+loads pages of workouts with their join rows and exercises, and reports
+per page size, dumper and provider (see server/jsonprovider.py):
+
+- dump_ms: "marshmallow" is WorkoutSchema(many=True).dump() of the
+  loaded models, "compiled" is server/serializers.py workout_dump() of
+  the Core rows
+- encode_ms: provider.response(payload), i.e. what jsonify() does
+- total_ms: both, as a GET /workouts page spends them
+- body_kib: size of the encoded response
+
+Timings are medians over --iterations runs. Use --json to save them.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from .routes import print_table
+
+
+COLUMNS = ["dumper", "provider", "page_size", "dump_ms", "encode_ms", "total_ms", "body_kib"]
+
+
+def median_ms(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workouts", type=int, default=2000)
+    parser.add_argument("--exercises", type=int, default=200)
+    parser.add_argument("--per-workout", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    from server.app import create_app, workouts_schema
+    from server.jsonprovider import JSON_PROVIDERS
+    from server.models import db, Workout
+    from server.schemas import workout_load_options
+    from server.serializers import workout_dump
+    from server.synthetic import generate_dataset
+
+    tmpdir = tempfile.TemporaryDirectory()
+    app = create_app(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmpdir.name, "bench.db")}
+    )
+
+    results = []
+    with app.app_context():
+        db.create_all()
+        generate_dataset(args.workouts, args.exercises, args.per_workout, seed=args.seed)
+
+        for page_size in args.page_sizes:
+            workouts = db.session.scalars(
+                select(Workout)
+                .options(*workout_load_options())
+                .order_by(Workout.date, Workout.id)
+                .limit(page_size)
+            ).all()
+            dumper = workout_dump()
+            rows = db.session.execute(
+                dumper.select().order_by(Workout.date, Workout.id).limit(page_size)
+            ).all()
+            details = db.session.execute(dumper.details_select(rows)).all()
+            dumpers = {
+                "marshmallow": lambda: workouts_schema.dump(workouts),
+                "compiled": lambda: dumper.dump(rows, details),
+            }
+
+            for (dumper_name, dump), (name, provider_class) in itertools.product(
+                dumpers.items(), JSON_PROVIDERS.items()
+            ):
+                try:
+                    provider = provider_class(app)
+                except ImportError:
+                    print(f"{name}: not installed, skipped")
+                    continue
+                payload = dump()
+                dump_ms = median_ms(dump, args.iterations)
+                encode_ms = median_ms(lambda: provider.response(payload), args.iterations)
+                results.append(
+                    {
+                        "dumper": dumper_name,
+                        "provider": name,
+                        "page_size": len(workouts),
+                        "dump_ms": round(dump_ms, 3),
+                        "encode_ms": round(encode_ms, 3),
+                        "total_ms": round(dump_ms + encode_ms, 3),
+                        "body_kib": round(
+                            len(provider.response(payload).get_data()) / 1024, 1
+                        ),
+                    }
+                )
+
+    print_table(results, COLUMNS)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
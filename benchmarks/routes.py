@@ -0,0 +1,416 @@
+"""
+Route benchmarks against a synthetic dataset.
+
+    python -m benchmarks.routes --workouts 20000 --exercises 500 --per-workout 5
+
+Builds the dataset (see server/synthetic.py) in a temporary SQLite file,
+or in --database if given, then drives every route in server/app.py
+through the Flask test client and reports per route:
+
+- p50 / p95 latency in milliseconds
+- SQL queries per request
+- peak memory allocated while serving one request (tracemalloc)
+
+Use --json to save the numbers and compare them between commits.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from itertools import count
+from urllib.parse import quote
+
+from sqlalchemy import event, func, insert, select
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class QueryCounter:
+    """Counts statements sent to an engine while attached."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+def measure(client, engine, name, make_request, iterations, memory_samples=10):
+    """
+    Issue `iterations` requests built by make_request(i) -> (method, url, body)
+    and return a result dict for the route.
+    """
+    latencies = []
+    with QueryCounter(engine) as counter:
+        for i in range(iterations):
+            method, url, body = make_request(i)
+            started = time.perf_counter()
+            resp = client.open(url, method=method, json=body)
+            resp.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+            resp.close()
+            if resp.status_code >= 400:
+                raise RuntimeError(f"{name}: {method} {url} -> {resp.status_code}")
+
+    # Separate pass: tracing allocations distorts the timings above
+    peak = 0
+    tracemalloc.start()
+    for i in range(iterations, iterations + memory_samples):
+        method, url, body = make_request(i)
+        tracemalloc.reset_peak()
+        resp = client.open(url, method=method, json=body)
+        resp.get_data()
+        resp.close()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        "route": name,
+        "requests": iterations,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "queries_per_request": round(counter.count / iterations, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+# Join rows of the workouts edited by the PUT/PATCH scenarios
+EDIT_ROWS = 20
+
+
+def doomed_day(i):
+    """Day of the i-th batch of workouts for the bulk DELETE by dates."""
+    return date(1991, 1, 1) + timedelta(days=i)
+
+
+def scenarios(app, iterations, memory_samples):
+    """
+    One (name, make_request) pair per route. Write routes get fresh rows
+    created up front so every request does the same amount of work.
+    """
+    from server.models import db, Exercise, Workout, WorkoutExercise
+    from server.pagination import encode_cursor
+    from server.rollups import refresh_for_workouts
+
+    total = iterations + memory_samples
+    unique = count()
+
+    with app.app_context():
+        n_workouts = db.session.scalar(select(func.count(Workout.id)))
+        middle = db.session.execute(
+            select(Workout.date, Workout.id)
+            .order_by(Workout.date, Workout.id)
+            .offset(n_workouts // 2)
+            .limit(1)
+        ).one()
+        workout_ids = db.session.scalars(select(Workout.id).limit(total)).all()
+        exercise_ids = db.session.scalars(select(Exercise.id).limit(total)).all()
+        exercise_names = db.session.scalars(select(Exercise.name).limit(total)).all()
+        first_date = db.session.scalar(select(func.min(Workout.date)))
+
+        # Rows for the DELETE routes to remove
+        doomed_workouts = db.session.scalars(
+            insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+            [{"date": date(2000, 1, 1), "duration_minutes": 1}] * total,
+        ).all()
+        doomed_exercises = db.session.scalars(
+            insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True),
+            [
+                {"name": f"Bench doomed {i}", "category": "Bench", "equipment_needed": False}
+                for i in range(total)
+            ],
+        ).all()
+        # Ten per bulk delete: removed by id, or by the day each batch is on
+        doomed_batches = db.session.scalars(
+            insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+            [{"date": date(1990, 1, 1), "duration_minutes": 1}] * (total * 10),
+        ).all()
+        db.session.execute(
+            insert(Workout),
+            [
+                {"date": doomed_day(i // 10), "duration_minutes": 1}
+                for i in range(total * 10)
+            ],
+        )
+
+        # Workouts with EDIT_ROWS join rows each, a set per edit scenario
+        edit_items = [
+            {"exercise_id": exercise_ids[j % len(exercise_ids)], "reps": j + 1, "sets": 3}
+            for j in range(EDIT_ROWS)
+        ]
+        edited = {}
+        for scenario in ("patch", "put", "changed", "reordered"):
+            edited[scenario] = db.session.scalars(
+                insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+                [{"date": date(2001, 1, 1), "duration_minutes": 30}] * total,
+            ).all()
+            db.session.execute(
+                insert(WorkoutExercise),
+                [{"workout_id": id, **item} for id in edited[scenario] for item in edit_items],
+            )
+        refresh_for_workouts(
+            db.session.connection(), [id for ids in edited.values() for id in ids]
+        )
+        db.session.commit()
+
+    deep_cursor = encode_cursor(*middle)
+    stream_window = f"date_from={first_date}&date_to={first_date.replace(day=28)}"
+
+    def pick(ids):
+        return lambda i: ids[i % len(ids)]
+
+    workout_at, exercise_at = pick(workout_ids), pick(exercise_ids)
+    # Two values changed, or the whole list reversed
+    changed_items = [dict(item) for item in edit_items]
+    changed_items[0]["reps"] = changed_items[-1]["sets"] = 100
+    reordered_items = edit_items[::-1]
+    name_at = pick(exercise_names)
+    # Typed so far: the lowercased name less its last characters
+    typed_at = pick([quote(name[:-3].lower()) for name in exercise_names])
+
+    return [
+        ("GET /", lambda i: ("GET", "/", None)),
+        ("GET /workouts", lambda i: ("GET", "/workouts", None)),
+        (
+            "GET /workouts (deep cursor)",
+            lambda i: ("GET", f"/workouts?after={deep_cursor}", None),
+        ),
+        (
+            "GET /workouts (stream, 1 month)",
+            lambda i: ("GET", f"/workouts?stream=1&{stream_window}", None),
+        ),
+        ("GET /workouts/<id>", lambda i: ("GET", f"/workouts/{workout_at(i)}", None)),
+        (
+            "POST /workouts",
+            lambda i: (
+                "POST",
+                "/workouts",
+                {"date": "2024-01-01", "duration_minutes": 30, "notes": "bench"},
+            ),
+        ),
+        (
+            "DELETE /workouts/<id>",
+            lambda i: ("DELETE", f"/workouts/{doomed_workouts[i]}", None),
+        ),
+        (
+            "DELETE /workouts (10 ids)",
+            lambda i: ("DELETE", "/workouts", {"ids": doomed_batches[i * 10 : i * 10 + 10]}),
+        ),
+        (
+            "DELETE /workouts (date range)",
+            lambda i: (
+                "DELETE",
+                "/workouts",
+                {"date_from": str(doomed_day(i)), "date_to": str(doomed_day(i))},
+            ),
+        ),
+        (
+            "PATCH /workouts/<id> (notes)",
+            lambda i: ("PATCH", f"/workouts/{edited['patch'][i]}", {"notes": f"bench {i}"}),
+        ),
+        (
+            "PUT /workouts/<id> (unchanged, 20 items)",
+            lambda i: (
+                "PUT",
+                f"/workouts/{edited['put'][i]}",
+                {"date": "2001-01-01", "duration_minutes": 30, "workout_exercises": edit_items},
+            ),
+        ),
+        (
+            "PUT /workouts/<id>/workout_exercises (20 items, 2 changed)",
+            lambda i: (
+                "PUT",
+                f"/workouts/{edited['changed'][i]}/workout_exercises",
+                changed_items,
+            ),
+        ),
+        (
+            "PUT /workouts/<id>/workout_exercises (20 items, reversed)",
+            lambda i: (
+                "PUT",
+                f"/workouts/{edited['reordered'][i]}/workout_exercises",
+                reordered_items,
+            ),
+        ),
+        ("GET /exercises", lambda i: ("GET", "/exercises", None)),
+        (
+            "GET /exercises/<id>",
+            lambda i: ("GET", f"/exercises/{exercise_at(i)}", None),
+        ),
+        (
+            "GET /search/exercises (typeahead)",
+            lambda i: ("GET", f"/search/exercises?prefix={typed_at(i)}", None),
+        ),
+        ("GET /search", lambda i: ("GET", "/search?q=leg%20da", None)),
+        (
+            "POST /exercises",
+            lambda i: (
+                "POST",
+                "/exercises",
+                {
+                    "name": f"Bench exercise {next(unique)}",
+                    "category": "Bench",
+                    "equipment_needed": False,
+                },
+            ),
+        ),
+        (
+            "PUT /exercises (create)",
+            lambda i: (
+                "PUT",
+                "/exercises",
+                {
+                    "name": f"Bench put {next(unique)}",
+                    "category": "Bench",
+                    "equipment_needed": False,
+                },
+            ),
+        ),
+        (
+            "PUT /exercises (update)",
+            lambda i: (
+                "PUT",
+                "/exercises",
+                {
+                    "name": name_at(i),
+                    "category": f"Bench {i}",
+                    "equipment_needed": i % 2 == 0,
+                },
+            ),
+        ),
+        (
+            "POST /exercises/sync (200 items)",
+            lambda i: (
+                "POST",
+                "/exercises/sync",
+                [
+                    {
+                        "name": f"Bench synced {next(unique)}",
+                        "category": "Bench",
+                        "equipment_needed": False,
+                    }
+                    for _ in range(200)
+                ],
+            ),
+        ),
+        (
+            "DELETE /exercises/<id>",
+            lambda i: ("DELETE", f"/exercises/{doomed_exercises[i]}", None),
+        ),
+        (
+            "POST /workouts/<id>/exercises/<id>/workout_exercises",
+            lambda i: (
+                "POST",
+                f"/workouts/{workout_at(i)}/exercises/{exercise_at(i)}"
+                "/workout_exercises",
+                {"reps": 10, "sets": 3},
+            ),
+        ),
+        (
+            "POST /workouts/<id>/workout_exercises (20 items)",
+            lambda i: (
+                "POST",
+                f"/workouts/{workout_at(i)}/workout_exercises",
+                [
+                    {"exercise_id": exercise_at(i + j), "reps": 8, "sets": 3}
+                    for j in range(20)
+                ],
+            ),
+        ),
+        ("GET /stats/exercises", lambda i: ("GET", "/stats/exercises", None)),
+        ("GET /stats/categories", lambda i: ("GET", "/stats/categories", None)),
+        ("GET /stats/weekly", lambda i: ("GET", "/stats/weekly", None)),
+        (
+            "GET /stats/daily/exercises (1 month)",
+            lambda i: ("GET", f"/stats/daily/exercises?{stream_window}", None),
+        ),
+        (
+            "GET /stats/weekly/exercises (1 month)",
+            lambda i: ("GET", f"/stats/weekly/exercises?{stream_window}", None),
+        ),
+    ]
+
+
+COLUMNS = ["route", "requests", "p50_ms", "p95_ms", "queries_per_request", "peak_kib"]
+
+
+def print_table(results, columns=COLUMNS):
+    widths = {
+        c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns
+    }
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workouts", type=int, default=20000)
+    parser.add_argument("--exercises", type=int, default=500)
+    parser.add_argument("--per-workout", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--memory-samples", type=int, default=10)
+    parser.add_argument(
+        "--database", help="SQLite file to use (default: a temporary file)"
+    )
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if args.database:
+        path = os.path.abspath(args.database)
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "bench.db")
+    fresh = not os.path.exists(path)
+    from server.app import create_app
+    from server.models import db
+    from server.synthetic import generate_dataset
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+
+    with app.app_context():
+        engine = db.engine
+        if fresh:
+            db.create_all()
+            started = time.perf_counter()
+            counts = generate_dataset(
+                args.workouts, args.exercises, args.per_workout, seed=args.seed
+            )
+            print(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+
+    client = app.test_client()
+    results = [
+        measure(client, engine, name, make_request, args.iterations, args.memory_samples)
+        for name, make_request in scenarios(app, args.iterations, args.memory_samples)
+    ]
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""add rollup tables
+
+Revision ID: 3b9e4f6a2c71
+Revises: 8ced61c175e1
+Create Date: 2025-12-01 09:42:18.511203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e4f6a2c71'
+down_revision = '8ced61c175e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rollup_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('total_sets', sa.Integer(), nullable=False),
+    sa.Column('total_reps', sa.Integer(), nullable=False),
+    sa.Column('total_volume', sa.Integer(), nullable=False),
+    sa.Column('total_duration_seconds', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'exercise_id')
+    )
+    op.create_table('rollup_weekly',
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('total_sets', sa.Integer(), nullable=False),
+    sa.Column('total_reps', sa.Integer(), nullable=False),
+    sa.Column('total_volume', sa.Integer(), nullable=False),
+    sa.Column('total_duration_seconds', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('week_start', 'exercise_id')
+    )
+
+    # Existing data is rolled up with `flask rollups rebuild`
+
+
+def downgrade():
+    op.drop_table('rollup_weekly')
+    op.drop_table('rollup_daily')
@@ -0,0 +1,43 @@
+"""cascade deletes on workout_exercises
+
+Revision ID: 5e2a7b9c0d14
+Revises: c4d8a1e7f903
+Create Date: 2025-12-05 10:27:33.918442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a7b9c0d14'
+down_revision = 'c4d8a1e7f903'
+branch_labels = None
+depends_on = None
+
+# The initial migration created these foreign keys without names; on
+# SQLite batch mode names the reflected constraints with this convention
+# so they can be dropped.
+naming_convention = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def _replace_foreign_keys(ondelete):
+    existing = {
+        fk['constrained_columns'][0]: fk['name']
+        for fk in sa.inspect(op.get_bind()).get_foreign_keys('workout_exercises')
+    }
+    with op.batch_alter_table('workout_exercises', naming_convention=naming_convention) as batch_op:
+        for column, referred in (('workout_id', 'workouts'), ('exercise_id', 'exercises')):
+            name = f'fk_workout_exercises_{column}_{referred}'
+            batch_op.drop_constraint(existing.get(column) or name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
@@ -0,0 +1,31 @@
+"""add table_versions
+
+Revision ID: 7a1c3e5f9b28
+Revises: 5e2a7b9c0d14
+Create Date: 2025-12-08 14:03:51.207664
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1c3e5f9b28'
+down_revision = '5e2a7b9c0d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+    # Counters start at the first write after the upgrade
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,76 @@
+"""add search indexes
+
+Revision ID: b8e3d52f0a61
+Revises: 7a1c3e5f9b28
+Create Date: 2026-01-12 10:41:27.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e3d52f0a61'
+down_revision = '7a1c3e5f9b28'
+branch_labels = None
+depends_on = None
+
+
+# Indexed table -> (FTS5 table, indexed columns), as in server/search.py
+FTS_TABLES = {
+    'exercises': ('exercises_fts', ('name', 'category')),
+    'workouts': ('workouts_fts', ('notes',)),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.create_index(
+        'ix_exercises_name_nocase',
+        'exercises',
+        [sa.text('name COLLATE "NOCASE"')],
+        unique=False,
+    )
+
+    for source, (fts, columns) in FTS_TABLES.items():
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{name}' for name in columns)
+        old = ', '.join(f'old.{name}' for name in columns)
+        insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+        delete_old = (
+            f"INSERT INTO {fts}({fts}, rowid, {names}) "
+            f"VALUES ('delete', old.id, {old});"
+        )
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, "
+            f"content='{source}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {source} "
+            f"BEGIN {insert_new} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {source} "
+            f"BEGIN {delete_old} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {source} "
+            f"BEGIN {delete_old} {insert_new} END"
+        )
+        # Index the existing rows
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for source, (fts, _) in FTS_TABLES.items():
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    op.drop_index('ix_exercises_name_nocase', table_name='exercises')
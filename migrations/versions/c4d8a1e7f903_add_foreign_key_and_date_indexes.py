@@ -0,0 +1,28 @@
+"""add foreign key and date indexes
+
+Revision ID: c4d8a1e7f903
+Revises: 3b9e4f6a2c71
+Create Date: 2025-12-03 14:05:51.204377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8a1e7f903'
+down_revision = '3b9e4f6a2c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_workouts_date_id', 'workouts', ['date', 'id'], unique=False)
+    op.create_index('ix_workout_exercises_workout_id_exercise_id', 'workout_exercises', ['workout_id', 'exercise_id'], unique=False)
+    op.create_index(op.f('ix_workout_exercises_exercise_id'), 'workout_exercises', ['exercise_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_workout_exercises_exercise_id'), table_name='workout_exercises')
+    op.drop_index('ix_workout_exercises_workout_id_exercise_id', table_name='workout_exercises')
+    op.drop_index('ix_workouts_date_id', table_name='workouts')
@@ -1,23 +1,64 @@
 # server/app.py
-import os
-from sqlalchemy.exc import IntegrityError
-from flask import Flask, jsonify, request
-from flask_migrate import Migrate
-from marshmallow import ValidationError
+from functools import partial
 
+from sqlalchemy import delete, insert, literal, select
+from flask import Blueprint, Flask, current_app, jsonify, request, stream_with_context
+from flask_migrate import Migrate
+from marshmallow import EXCLUDE, ValidationError
+
+from .cache import cached, init_response_cache
+from .catalog import insert_exercise, sync_exercises, upsert_exercise
+from .config import load_config
+from .database import init_database
+from .edits import WORKOUT_OPTIONAL_COLUMNS, edit_workout
+from .idempotency import idempotency_cli, idempotent
+from .importer import import_command
+from .instrumentation import init_instrumentation
+from .jsonprovider import init_json
 from .models import db, Workout, Exercise, WorkoutExercise
-from .schemas import WorkoutSchema, ExerciseSchema, WorkoutExerciseSchema
-
-app = Flask(__name__)
-
-# DB config
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(basedir, "app.db")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+from .pagination import after_keyset, encode_cursor
+from .schemas import (
+    MAX_SYNC_EXERCISES,
+    MAX_WORKOUT_EXERCISES,
+    SEARCH_TYPES,
+    DateRangeSchema,
+    SearchQuerySchema,
+    StreamQuerySchema,
+    TypeaheadQuerySchema,
+    WorkoutBulkDeleteSchema,
+    WorkoutSchema,
+    ExerciseSchema,
+    WorkoutExerciseSchema,
+    WorkoutFieldsSchema,
+    WorkoutQuerySchema,
+)
+from .search import exercises_by_prefix, register_search_events, search, search_cli
+from .serializers import (
+    dump_exercises,
+    exercise_serializer,
+    workout_dump,
+    workout_exercise_serializer,
+)
+from .routing import init_routing
+from .rollups import (
+    affected_keys,
+    refresh,
+    refresh_for_workouts,
+    register_rollup_events,
+    rollups_cli,
+)
+from .stats import (
+    category_totals,
+    daily_exercise_totals,
+    exercise_totals,
+    weekly_exercise_totals,
+    weekly_totals,
+)
+from .synthetic import generate_command
+from .versions import conditional, register_version_events
 
-# Init extensions
-db.init_app(app)
-migrate = Migrate(app, db)
+api = Blueprint("api", __name__)
+migrate = Migrate()
 
 # Schema instances
 exercise_schema = ExerciseSchema()
@@ -29,6 +70,14 @@ workouts_schema = WorkoutSchema(many=True)
 workout_exercise_schema = WorkoutExerciseSchema()
 workout_exercises_schema = WorkoutExerciseSchema(many=True)
 
+workout_query_schema = WorkoutQuerySchema()
+workout_fields_schema = WorkoutFieldsSchema(unknown=EXCLUDE)
+date_range_schema = DateRangeSchema()
+workout_bulk_delete_schema = WorkoutBulkDeleteSchema()
+search_query_schema = SearchQuerySchema()
+typeahead_query_schema = TypeaheadQuerySchema()
+stream_query_schema = StreamQuerySchema(unknown=EXCLUDE)
+
 
 # ------------------------
 # Basic routes
@@ -38,7 +87,68 @@ def not_found(message="Resource not found"):
     return jsonify({"message": message}), 404
 
 
-@app.route("/")
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+
+def wants_stream(params):
+    """
+    True if the client asked for an NDJSON stream instead of a JSON list:
+    ?stream= as loaded by StreamQuerySchema into `params` or, without it,
+    the Accept header.
+    """
+    if "stream" in params:
+        return params["stream"]
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(statement, dump_rows):
+    """
+    Stream the rows of `statement` as NDJSON, one object per line.
+
+    Rows are fetched from a server-side cursor in STREAM_BATCH_SIZE chunks
+    and each chunk is serialized with dump_rows(rows), so memory use does
+    not grow with the size of the result.
+    """
+
+    def generate():
+        result = db.session.execute(
+            statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        for rows in result.partitions():
+            for obj in dump_rows(rows):
+                yield current_app.json.dumps(obj) + "\n"
+
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype=NDJSON_MIMETYPE
+    )
+
+
+def delete_where(model, *criteria):
+    """
+    Delete the `model` rows matching `criteria` with one DELETE statement.
+
+    Nothing is loaded into the session: join rows go with ON DELETE
+    CASCADE, and the rollup groups they covered are recomputed afterwards.
+    Returns the number of deleted rows. The caller commits, or rolls back
+    if it is 0 so that the change counters are not bumped for nothing.
+    """
+    connection = db.session.connection()
+    ids = select(model.id).where(*criteria)
+    if model is Workout:
+        keys = affected_keys(connection, workout_ids=ids)
+    else:
+        keys = affected_keys(connection, exercise_ids=ids)
+
+    result = db.session.execute(
+        delete(model).where(*criteria).execution_options(synchronize_session=False)
+    )
+    refresh(connection, keys)
+    return result.rowcount
+
+
+@api.route("/")
 def index():
     return jsonify({"message": "Workout API backend is running."}), 200
 
@@ -46,23 +156,95 @@ def index():
 # ------------------------
 # Workout routes
 # ------------------------
-@app.route("/workouts", methods=["GET"])
+def dump_workout_rows(dumper, rows):
+    """
+    Dump workout rows selected by `dumper` (a WorkoutDump), reading their
+    join rows with at most one more SELECT.
+    """
+    details = dumper.details_select(rows)
+    return dumper.dump(rows, db.session.execute(details) if details is not None else ())
+
+
+def filter_workouts(query, params):
+    """Apply the date-range / duration filters from WorkoutQuerySchema."""
+    if "date_from" in params:
+        query = query.filter(Workout.date >= params["date_from"])
+    if "date_to" in params:
+        query = query.filter(Workout.date <= params["date_to"])
+    if "min_duration" in params:
+        query = query.filter(Workout.duration_minutes >= params["min_duration"])
+    if "max_duration" in params:
+        query = query.filter(Workout.duration_minutes <= params["max_duration"])
+    return query
+
+
+@api.route("/workouts", methods=["GET"])
+@conditional("workouts", "workout_exercises", "exercises")
 def get_workouts():
-    """Get all workouts."""
-    workouts = Workout.query.all()
-    return jsonify(workouts_schema.dump(workouts)), 200
+    """
+    Get a page of workouts ordered by (date, id).
 
+    Uses keyset pagination: pass the X-Next-Cursor header value from the
+    previous page as ?after= to fetch the next one. With ?stream=1 or
+    Accept: application/x-ndjson every matching workout is streamed
+    instead and ?limit= is ignored.
 
-@app.route("/workouts/<int:id>", methods=["GET"])
+    ?fields= picks the workout columns and ?expand= the nested lists
+    (workout_exercises, exercises) to include; only those are read.
+    """
+    try:
+        params = workout_query_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+
+    dumper = workout_dump(params.get("field_names"), params.get("expand"))
+    statement = filter_workouts(dumper.select(), params)
+    if "after" in params:
+        statement = statement.filter(
+            after_keyset(Workout.date, Workout.id, params["after"])
+        )
+    statement = statement.order_by(Workout.date, Workout.id)
+
+    if wants_stream(params):
+        return stream_ndjson(statement, partial(dump_workout_rows, dumper))
+
+    limit = params["limit"]
+    # Fetch one extra row to learn whether another page exists
+    rows = db.session.execute(statement.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = jsonify(dump_workout_rows(dumper, rows))
+    if has_more:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+    return response, 200
+
+
+@api.route("/workouts/<int:id>", methods=["GET"])
+@conditional("workouts", "workout_exercises", "exercises")
 def get_workout(id):
-    """Get a single workout by ID."""
-    workout = Workout.query.get(id)
-    if not workout:
+    """Get a single workout by ID (with ?fields= and ?expand= as for the list)."""
+    try:
+        params = workout_fields_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+
+    dumper = workout_dump(params.get("field_names"), params.get("expand"))
+    rows = db.session.execute(dumper.select().where(Workout.id == id)).all()
+    if not rows:
         return not_found("Workout not found")
-    return jsonify(workout_schema.dump(workout)), 200
+    return jsonify(dump_workout_rows(dumper, rows)[0]), 200
 
 
-@app.route("/workouts", methods=["POST"])
+@api.route("/workouts", methods=["POST"])
+@idempotent
 def create_workout():
     """Create a new workout."""
     json_data = request.get_json() or {}
@@ -72,53 +254,190 @@ def create_workout():
     except ValidationError as err:
         return jsonify({"message": "Invalid data", "errors": err.messages}), 400
 
-    if isinstance(data, dict):
-        workout = Workout(**data)
-    else:
-        workout = data
+    # A new workout has no join rows: the dump needs nothing but RETURNING
+    dumper = workout_dump()
+    row = db.session.execute(
+        insert(Workout.__table__).values(data).returning(*dumper.columns)
+    ).one()
+    db.session.commit()
 
-    db.session.add(workout)
+    return jsonify(dumper.dump([row])[0]), 201
+
+
+def load_workout_exercise_items(workout_id, items):
+    """
+    Load the exercise list of a workout edit; (rows, errors keyed by item
+    index). `items` must be a JSON array, possibly empty, of at most
+    MAX_WORKOUT_EXERCISES records.
+    """
+    if not isinstance(items, list):
+        return None, ["Expected a JSON array of records."]
+    if len(items) > MAX_WORKOUT_EXERCISES:
+        return None, [f"At most {MAX_WORKOUT_EXERCISES} records per request."]
+    items = [
+        {**item, "workout_id": workout_id} if isinstance(item, dict) else item
+        for item in items
+    ]
+    try:
+        return workout_exercises_schema.load(items), {}
+    except ValidationError as err:
+        return None, err.messages
+
+
+def apply_workout_edit(id, changes, items):
+    """
+    Run edit_workout and answer with the edited workout, or the error
+    (the caller has validated `changes` and `items`).
+    """
+    try:
+        edited = edit_workout(id, changes, items)
+    except ValidationError as err:
+        db.session.rollback()
+        return (
+            jsonify({"message": "Invalid data", "errors": {"workout_exercises": err.messages}}),
+            400,
+        )
+    if edited is None:
+        db.session.rollback()
+        return not_found("Workout not found")
     db.session.commit()
 
-    return jsonify(workout_schema.dump(workout)), 201
+    dumper = workout_dump()
+    rows = db.session.execute(dumper.select().where(Workout.id == id)).all()
+    return jsonify(dump_workout_rows(dumper, rows)[0]), 200
+
+
+@api.route("/workouts/<int:id>", methods=["PUT", "PATCH"])
+def update_workout(id):
+    """
+    Edit a workout: PUT replaces its fields (clearing the optional ones
+    left out), PATCH sets those given. With
+    a `workout_exercises` array its exercise list is replaced as well;
+    only the rows that differ are written (see server/edits.py).
+    """
+    json_data = request.get_json(silent=True)
+    if not isinstance(json_data, dict):
+        return jsonify({"message": "Expected a JSON object."}), 400
+    json_data = dict(json_data)
+    has_items = "workout_exercises" in json_data
+    items = json_data.pop("workout_exercises", None)
+
+    errors = {}
+    try:
+        changes = workout_schema.load(json_data, partial=request.method == "PATCH")
+    except ValidationError as err:
+        errors.update(err.messages)
+    if has_items:
+        items, item_errors = load_workout_exercise_items(id, items)
+        if item_errors:
+            errors["workout_exercises"] = item_errors
+    if errors:
+        return jsonify({"message": "Invalid data", "errors": errors}), 400
+
+    if request.method == "PUT":
+        changes = {**dict.fromkeys(WORKOUT_OPTIONAL_COLUMNS), **changes}
+    return apply_workout_edit(id, changes, items)
+
+
+@api.route("/workouts/<int:workout_id>/workout_exercises", methods=["PUT"])
+def replace_workout_exercises(workout_id):
+    """
+    Replace the exercise list of a workout with a JSON array of
+    {exercise_id, reps, sets, duration_seconds} objects, in the order
+    given; only the rows that differ are written (see server/edits.py).
+    """
+    items, errors = load_workout_exercise_items(workout_id, request.get_json(silent=True))
+    if errors:
+        return (
+            jsonify({"message": "Invalid data", "errors": {"workout_exercises": errors}}),
+            400,
+        )
 
+    return apply_workout_edit(workout_id, {}, items)
 
-@app.route("/workouts/<int:id>", methods=["DELETE"])
+
+@api.route("/workouts/<int:id>", methods=["DELETE"])
 def delete_workout(id):
     """Delete a workout by ID."""
-    workout = Workout.query.get(id)
-    if not workout:
+    deleted = delete_where(Workout, Workout.id == id)
+    if not deleted:
+        # Nothing written: keep the change counters (and clients' ETags)
+        db.session.rollback()
         return not_found("Workout not found")
-
-    db.session.delete(workout)
     db.session.commit()
 
     return "", 204
 
 
+@api.route("/workouts", methods=["DELETE"])
+def delete_workouts():
+    """
+    Delete many workouts at once, selected by a JSON body with `ids`
+    and/or `date_from` / `date_to`.
+    """
+    try:
+        params = workout_bulk_delete_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as err:
+        return jsonify({"message": "Invalid data", "errors": err.messages}), 400
+
+    criteria = []
+    if "ids" in params:
+        criteria.append(Workout.id.in_(params["ids"]))
+    if "date_from" in params:
+        criteria.append(Workout.date >= params["date_from"])
+    if "date_to" in params:
+        criteria.append(Workout.date <= params["date_to"])
+
+    deleted = delete_where(Workout, *criteria)
+    if deleted:
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+    return jsonify({"deleted": deleted}), 200
+
+
 # ------------------------
 # Exercise routes
 # ------------------------
-@app.route("/exercises", methods=["GET"])
+@api.route("/exercises", methods=["GET"])
+@conditional("exercises", max_age_config="EXERCISE_CACHE_MAX_AGE")
+@cached("exercises")
 def get_exercises():
-    """Get all exercises."""
-    exercises = Exercise.query.all()
-    return jsonify(exercises_schema.dump(exercises)), 200
+    """Get all exercises (streamed as NDJSON if requested)."""
+    try:
+        params = stream_query_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+
+    statement = select(*exercise_serializer.columns)
+    if wants_stream(params):
+        return stream_ndjson(statement.order_by(Exercise.id), dump_exercises)
 
+    return jsonify(dump_exercises(db.session.execute(statement))), 200
 
-@app.route("/exercises/<int:id>", methods=["GET"])
+
+@api.route("/exercises/<int:id>", methods=["GET"])
+@conditional("exercises", max_age_config="EXERCISE_CACHE_MAX_AGE")
+@cached("exercises")
 def get_exercise(id):
     """Get a single exercise by ID."""
-    exercise = Exercise.query.get(id)
-    if not exercise:
+    rows = db.session.execute(
+        select(*exercise_serializer.columns).where(Exercise.id == id)
+    ).all()
+    if not rows:
         return not_found("Exercise not found")
 
-    return jsonify(exercise_schema.dump(exercise)), 200
+    return jsonify(dump_exercises(rows)[0]), 200
 
 
-@app.route("/exercises", methods=["POST"])
+@api.route("/exercises", methods=["POST"])
+@idempotent
 def create_exercise():
-    """Create a new exercise."""
+    """Create a new exercise (400 if the name is taken)."""
     json_data = request.get_json() or {}
 
     try:
@@ -126,16 +445,8 @@ def create_exercise():
     except ValidationError as err:
         return jsonify({"message": "Invalid data", "errors": err.messages}), 400
 
-    if isinstance(data, dict):
-        exercise = Exercise(**data)
-    else:
-        exercise = data
-
-    db.session.add(exercise)
-
-    try:
-        db.session.commit()
-    except IntegrityError:
+    row = insert_exercise(data)
+    if row is None:
         db.session.rollback()
         return (
             jsonify(
@@ -145,18 +456,68 @@ def create_exercise():
             ),
             400,
         )
+    db.session.commit()
 
-    return jsonify(exercise_schema.dump(exercise)), 201
+    return jsonify(dump_exercises([row])[0]), 201
 
 
-@app.route("/exercises/<int:id>", methods=["DELETE"])
+@api.route("/exercises", methods=["PUT"])
+def put_exercise():
+    """Create the exercise, or update the one with the same name."""
+    json_data = request.get_json() or {}
+
+    try:
+        data = exercise_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"message": "Invalid data", "errors": err.messages}), 400
+
+    row, created = upsert_exercise(data)
+    db.session.commit()
+
+    return jsonify(dump_exercises([row])[0]), 201 if created else 200
+
+
+@api.route("/exercises/sync", methods=["POST"])
+def sync_exercise_catalog():
+    """
+    Create or update (by name) every exercise of a JSON array, e.g. a
+    whole catalog; returns how many were created, updated and unchanged.
+    Either all items are written or, if any is invalid, none are.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return (
+            jsonify({"message": "Expected a non-empty JSON array of exercises."}),
+            400,
+        )
+    if len(items) > MAX_SYNC_EXERCISES:
+        return (
+            jsonify({"message": f"At most {MAX_SYNC_EXERCISES} exercises per request."}),
+            400,
+        )
+
+    try:
+        rows = exercises_schema.load(items)
+    except ValidationError as err:
+        return jsonify({"message": "Invalid data", "errors": err.messages}), 400
+
+    counts = sync_exercises(rows)
+    if counts["created"] or counts["updated"]:
+        db.session.commit()
+    else:
+        # Nothing written: keep the catalog version (and clients' ETags)
+        db.session.rollback()
+
+    return jsonify(counts), 200
+
+
+@api.route("/exercises/<int:id>", methods=["DELETE"])
 def delete_exercise(id):
     """Delete an exercise by ID."""
-    exercise = Exercise.query.get(id)
-    if not exercise:
+    deleted = delete_where(Exercise, Exercise.id == id)
+    if not deleted:
+        db.session.rollback()
         return not_found("Exercise not found")
-
-    db.session.delete(exercise)
     db.session.commit()
     return "", 204
 
@@ -164,38 +525,230 @@ def delete_exercise(id):
 # ------------------------
 # Join route (WorkoutExercise)
 # ------------------------
-@app.route(
+@api.route(
     "/workouts/<int:workout_id>/exercises/<int:exercise_id>/workout_exercises",
     methods=["POST"],
 )
+@idempotent
 def add_workout_exercise(workout_id, exercise_id):
     """Create a WorkoutExercise join record."""
-    workout = Workout.query.get(workout_id)
-    if not workout:
-        return not_found("Workout not found")
-
-    exercise = Exercise.query.get(exercise_id)
-    if not exercise:
-        return not_found("Exercise not found")
-
     json_data = request.get_json() or {}
-    json_data["workout_id"] = workout_id
-    json_data["exercise_id"] = exercise_id
+    if not isinstance(json_data, dict):
+        return jsonify({"message": "Expected a JSON object."}), 400
 
     try:
-        data = workout_exercise_schema.load(json_data)
+        data = workout_exercise_schema.load(
+            {**json_data, "workout_id": workout_id, "exercise_id": exercise_id}
+        )
     except ValidationError as err:
         return jsonify({"message": "Invalid data", "errors": err.messages}), 400
 
-    if isinstance(data, dict):
-        join_record = WorkoutExercise(**data)
-    else:
-        join_record = data
+    # INSERT ... SELECT that only adds the row if both ends exist, rather
+    # than a lookup of each before the INSERT
+    join_records = WorkoutExercise.__table__
+    values = select(
+        *(literal(value, join_records.c[name].type) for name, value in data.items())
+    ).where(
+        select(Workout.id).where(Workout.id == workout_id).exists(),
+        select(Exercise.id).where(Exercise.id == exercise_id).exists(),
+    )
+    row = db.session.execute(
+        insert(join_records)
+        .from_select(list(data), values)
+        .returning(*workout_exercise_serializer.columns)
+    ).one_or_none()
+    if row is None:
+        db.session.rollback()
+        if db.session.get(Workout, workout_id) is None:
+            return not_found("Workout not found")
+        return not_found("Exercise not found")
 
-    db.session.add(join_record)
+    # Core inserts bypass the flush events that maintain the rollups
+    refresh_for_workouts(db.session.connection(), [workout_id])
     db.session.commit()
 
-    return jsonify(workout_exercise_schema.dump(join_record)), 201
+    return jsonify(workout_exercise_serializer(row)), 201
+
+
+@api.route("/workouts/<int:workout_id>/workout_exercises", methods=["POST"])
+@idempotent
+def add_workout_exercises(workout_id):
+    """
+    Create many WorkoutExercise join records for a workout in one request.
+
+    Expects a JSON array of {exercise_id, reps, sets, duration_seconds}
+    objects. Either every item is inserted or, if any item is invalid,
+    none are and the errors are reported keyed by item index.
+    """
+    if db.session.get(Workout, workout_id) is None:
+        return not_found("Workout not found")
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return (
+            jsonify({"message": "Expected a non-empty JSON array of records."}),
+            400,
+        )
+    if len(items) > MAX_WORKOUT_EXERCISES:
+        return (
+            jsonify({"message": f"At most {MAX_WORKOUT_EXERCISES} records per request."}),
+            400,
+        )
+
+    items = [
+        {**item, "workout_id": workout_id} if isinstance(item, dict) else item
+        for item in items
+    ]
+
+    errors = {}
+    try:
+        rows = workout_exercises_schema.load(items)
+    except ValidationError as err:
+        errors.update(err.messages)
+
+    # Check every referenced exercise with a single IN query
+    requested = {
+        index: item.get("exercise_id")
+        for index, item in enumerate(items)
+        if isinstance(item, dict) and isinstance(item.get("exercise_id"), int)
+    }
+    existing = set(
+        db.session.scalars(
+            select(Exercise.id).where(Exercise.id.in_(set(requested.values())))
+        )
+    )
+    for index, exercise_id in requested.items():
+        if exercise_id not in existing:
+            errors.setdefault(index, {})["exercise_id"] = ["Exercise not found."]
+
+    if errors:
+        return jsonify({"message": "Invalid data", "errors": errors}), 400
+
+    join_records = db.session.scalars(
+        insert(WorkoutExercise).returning(WorkoutExercise), rows
+    ).all()
+    # Bulk inserts bypass the flush events that maintain the rollups
+    refresh_for_workouts(db.session.connection(), [workout_id])
+    # Dump before committing so the new rows are not re-read after expiry
+    payload = workout_exercises_schema.dump(join_records)
+    db.session.commit()
+
+    return jsonify(payload), 201
+
+
+# ------------------------
+# Search routes
+# ------------------------
+@api.route("/search", methods=["GET"])
+@conditional("exercises", "workouts")
+def get_search_results():
+    """Exercises and workouts matching ?q=, best match first."""
+    try:
+        params = search_query_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+    types = params.get("type") or SEARCH_TYPES
+    return jsonify(search(params["q"], params["limit"], types)), 200
+
+
+@api.route("/search/exercises", methods=["GET"])
+@conditional("exercises")
+def get_exercise_suggestions():
+    """Exercises whose name starts with ?prefix= (any case), for typeahead."""
+    try:
+        params = typeahead_query_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+    return jsonify(exercises_by_prefix(params["prefix"], params["limit"])), 200
+
+
+# ------------------------
+# Stats routes
+# ------------------------
+def stats_response(compute):
+    """Run a stats query with the ?date_from=&date_to= range of the request."""
+    try:
+        params = date_range_schema.load(request.args)
+    except ValidationError as err:
+        return (
+            jsonify({"message": "Invalid query parameters", "errors": err.messages}),
+            400,
+        )
+    return jsonify(compute(params)), 200
+
+
+@api.route("/stats/exercises", methods=["GET"])
+def get_exercise_stats():
+    """Per-exercise training totals."""
+    return stats_response(exercise_totals)
+
+
+@api.route("/stats/categories", methods=["GET"])
+def get_category_stats():
+    """Per-category training totals."""
+    return stats_response(category_totals)
+
+
+@api.route("/stats/weekly", methods=["GET"])
+def get_weekly_stats():
+    """Per-ISO-week training totals."""
+    return stats_response(weekly_totals)
+
+
+@api.route("/stats/daily/exercises", methods=["GET"])
+def get_daily_exercise_stats():
+    """Per-day, per-exercise totals from the precomputed rollups."""
+    return stats_response(daily_exercise_totals)
+
+
+@api.route("/stats/weekly/exercises", methods=["GET"])
+def get_weekly_exercise_stats():
+    """Per-week, per-exercise totals from the precomputed rollups."""
+    return stats_response(weekly_exercise_totals)
+
+
+# ------------------------
+# App factory
+# ------------------------
+def create_app(config=None):
+    """
+    Build the app. Settings come from load_config() (the environment),
+    overridden by the `config` mapping if given.
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+
+    # Init extensions
+    init_json(app)
+    init_database(app)
+    migrate.init_app(app, db)
+    init_instrumentation(app)
+    init_routing(app)
+    init_response_cache(app)
+    register_rollup_events()
+    register_version_events()
+    register_search_events()
+
+    # CLI commands
+    app.cli.add_command(import_command)
+    app.cli.add_command(generate_command)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(idempotency_cli)
+
+    app.register_blueprint(api)
+    return app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,387 @@
+# server/asgi.py
+"""
+ASGI entry point, for serving many concurrent (slow) clients per process:
+
+    uvicorn server.asgi:app
+
+The read routes (GET /, /workouts, /workouts/<id>, /exercises and
+/exercises/<id>) are served natively on an AsyncSession, so a request
+waiting on the database or on a slow client holds no thread. They use
+the same schemas, query parameters, ETags and JSON encoding as the Flask
+views in server/app.py.
+
+Every other request is passed to the Flask app itself, run in a worker
+thread with its response buffered.
+"""
+
+import asyncio
+import io
+import sys
+from functools import partial, wraps
+
+from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+from werkzeug.wrappers import Request, Response
+
+from .app import (
+    NDJSON_MIMETYPE,
+    STREAM_BATCH_SIZE,
+    create_app,
+    filter_workouts,
+    stream_query_schema,
+    workout_fields_schema,
+    workout_query_schema,
+)
+from .database import engine_options, set_sqlite_pragmas
+from .models import Exercise, Workout
+from .pagination import after_keyset, encode_cursor
+from .serializers import dump_exercises, exercise_serializer, workout_dump
+from .versions import not_modified, set_validators, validators, versions_query
+
+
+# backend -> async DBAPI driver used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def async_database_url(config):
+    """ASYNC_DATABASE_URL, or the DATABASE_URL with its async driver."""
+    if config.get("ASYNC_DATABASE_URL"):
+        return make_url(config["ASYNC_DATABASE_URL"])
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    backend = url.get_backend_name()
+    if url.drivername == backend and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+def create_async_db_engine(config):
+    url = async_database_url(config)
+    engine = create_async_engine(
+        url, **engine_options({**config, "SQLALCHEMY_DATABASE_URI": url})
+    )
+    if engine.dialect.name == "sqlite":
+        set_sqlite_pragmas(engine.sync_engine, config)
+    return engine
+
+
+# ------------------------
+# ASGI <-> WSGI plumbing
+# ------------------------
+class StreamingResponse(Response):
+    """A response whose body is an async iterator of str chunks."""
+
+    def __init__(self, chunks, **kwargs):
+        super().__init__(**kwargs)
+        self.chunks = chunks
+
+
+def wsgi_environ(scope, body):
+    """The WSGI environ of an ASGI http `scope` with the request `body`."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope["headers"]:
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body has been read in full (it may have come chunked)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    return environ
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def send_response(send, response, environ):
+    headers = response.get_wsgi_headers(environ)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers.items()
+            ],
+        }
+    )
+    if environ["REQUEST_METHOD"] == "HEAD":
+        await send({"type": "http.response.body", "body": b""})
+    elif isinstance(response, StreamingResponse):
+        async for chunk in response.chunks:
+            await send(
+                {"type": "http.response.body", "body": chunk.encode(), "more_body": True}
+            )
+        await send({"type": "http.response.body", "body": b""})
+    else:
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+
+# ------------------------
+# Async views
+# ------------------------
+def conditional(*tables, max_age_config=None):
+    """Async counterpart of server.versions.conditional."""
+    tables = sorted(tables)
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(self, session, request, **kwargs):
+            rows = await session.execute(versions_query(tables))
+            etag, last_modified = validators(
+                tables,
+                {row.table_name: (row.version, row.updated_at) for row in rows},
+                request.headers.get("Accept", ""),
+            )
+
+            if not_modified(request, etag, last_modified):
+                response = self.flask_app.response_class(status=304)
+            else:
+                response = await view(self, session, request, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            set_validators(
+                response,
+                etag,
+                last_modified,
+                self.flask_app.config[max_age_config] if max_age_config else None,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def wants_stream(request, params):
+    """Same as server.app.wants_stream, for a werkzeug request."""
+    if "stream" in params:
+        return params["stream"]
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+class AsyncAPI:
+    """
+    The ASGI application: the read routes of server/app.py on `engine`,
+    everything else through `flask_app`.
+    """
+
+    url_map = Map(
+        [
+            Rule("/", endpoint="index", methods=["GET"]),
+            Rule("/workouts", endpoint="get_workouts", methods=["GET"]),
+            Rule("/workouts/<int:id>", endpoint="get_workout", methods=["GET"]),
+            Rule("/exercises", endpoint="get_exercises", methods=["GET"]),
+            Rule("/exercises/<int:id>", endpoint="get_exercise", methods=["GET"]),
+        ]
+    )
+
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body = await read_body(receive)
+        if body is None:
+            return
+        environ = wsgi_environ(scope, body)
+
+        try:
+            endpoint, values = self.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            # Not one of ours (or a 404 / 405 / redirect): Flask answers
+            response = await asyncio.to_thread(
+                Response.from_app, self.flask_app.wsgi_app, environ, buffered=True
+            )
+        else:
+            async with self.sessions() as session:
+                response = await getattr(self, endpoint)(
+                    session, Request(environ), **values
+                )
+        await send_response(send, response, environ)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def json(self, payload, status=200):
+        response = self.flask_app.json.response(payload)
+        response.status_code = status
+        return response
+
+    def not_found(self, message="Resource not found"):
+        return self.json({"message": message}, 404)
+
+    def stream_ndjson(self, statement, dump_rows):
+        """
+        NDJSON response streaming the rows of `statement`, fetched in
+        STREAM_BATCH_SIZE chunks on a session of its own (the response
+        outlives the view's session); await dump_rows(session, rows)
+        serializes each chunk.
+        """
+
+        async def generate():
+            async with self.sessions() as session:
+                result = await session.stream(
+                    statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+                )
+                async for rows in result.partitions():
+                    for obj in await dump_rows(session, rows):
+                        yield self.flask_app.json.dumps(obj) + "\n"
+
+        return StreamingResponse(generate(), mimetype=NDJSON_MIMETYPE)
+
+    @staticmethod
+    async def dump_workout_rows(dumper, session, rows):
+        """Same as server.app.dump_workout_rows, on the async session."""
+        details = dumper.details_select(rows)
+        detail_rows = await session.execute(details) if details is not None else ()
+        return dumper.dump(rows, detail_rows)
+
+    @staticmethod
+    async def dump_exercise_rows(session, rows):
+        return dump_exercises(rows)
+
+    async def index(self, session, request):
+        return self.json({"message": "Workout API backend is running."})
+
+    @conditional("workouts", "workout_exercises", "exercises")
+    async def get_workouts(self, session, request):
+        try:
+            params = workout_query_schema.load(request.args)
+        except ValidationError as err:
+            return self.json(
+                {"message": "Invalid query parameters", "errors": err.messages}, 400
+            )
+
+        dumper = workout_dump(params.get("field_names"), params.get("expand"))
+        statement = filter_workouts(dumper.select(), params)
+        if "after" in params:
+            statement = statement.filter(
+                after_keyset(Workout.date, Workout.id, params["after"])
+            )
+        statement = statement.order_by(Workout.date, Workout.id)
+
+        if wants_stream(request, params):
+            return self.stream_ndjson(
+                statement, partial(self.dump_workout_rows, dumper)
+            )
+
+        limit = params["limit"]
+        # Fetch one extra row to learn whether another page exists
+        rows = (await session.execute(statement.limit(limit + 1))).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        response = self.json(await self.dump_workout_rows(dumper, session, rows))
+        if has_more:
+            last = rows[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+        return response
+
+    @conditional("workouts", "workout_exercises", "exercises")
+    async def get_workout(self, session, request, id):
+        try:
+            params = workout_fields_schema.load(request.args)
+        except ValidationError as err:
+            return self.json(
+                {"message": "Invalid query parameters", "errors": err.messages}, 400
+            )
+
+        dumper = workout_dump(params.get("field_names"), params.get("expand"))
+        rows = (await session.execute(dumper.select().where(Workout.id == id))).all()
+        if not rows:
+            return self.not_found("Workout not found")
+        return self.json((await self.dump_workout_rows(dumper, session, rows))[0])
+
+    @conditional("exercises", max_age_config="EXERCISE_CACHE_MAX_AGE")
+    async def get_exercises(self, session, request):
+        try:
+            params = stream_query_schema.load(request.args)
+        except ValidationError as err:
+            return self.json(
+                {"message": "Invalid query parameters", "errors": err.messages}, 400
+            )
+
+        statement = select(*exercise_serializer.columns)
+        if wants_stream(request, params):
+            return self.stream_ndjson(
+                statement.order_by(Exercise.id), self.dump_exercise_rows
+            )
+
+        return self.json(dump_exercises(await session.execute(statement)))
+
+    @conditional("exercises", max_age_config="EXERCISE_CACHE_MAX_AGE")
+    async def get_exercise(self, session, request, id):
+        rows = (
+            await session.execute(
+                select(*exercise_serializer.columns).where(Exercise.id == id)
+            )
+        ).all()
+        if not rows:
+            return self.not_found("Exercise not found")
+        return self.json(dump_exercises(rows)[0])
+
+
+# ------------------------
+# App factory
+# ------------------------
+def create_asgi_app(config=None):
+    """
+    Build the ASGI app; `config` is applied to the underlying Flask app as
+    in create_app(), and also configures the async engine.
+    """
+    flask_app = create_app(config)
+    return AsyncAPI(flask_app, create_async_db_engine(flask_app.config))
+
+
+app = create_asgi_app()
@@ -0,0 +1,374 @@
+# server/cache.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+
+from .instrumentation import Counter
+from .models import db
+from .versions import current_versions
+
+
+# ------------------------
+# Backends
+# ------------------------
+# A backend stores encoded values under string keys, each tagged with the
+# tables it was built from:
+#
+#   get(key) -> bytes or None
+#   token(tables) -> opaque snapshot of the tables' invalidation state
+#   set(key, value, tables, ttl, token) -> bool; a value computed while
+#       one of its tables was invalidated (token is out of date) is dropped
+#   invalidate(tables) -> number of entries dropped
+#
+# `shared` backends are visible to every worker, so invalidating them once
+# is enough; the others need the invalidation messages of other workers.
+def redis_client(url):
+    # Optional dependency, only needed when Redis is configured
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+class MemoryBackend:
+    """Per-process LRU store, bounded to `max_entries`."""
+
+    shared = False
+
+    def __init__(self, max_entries=256, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        # Per-table invalidation count, see token()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        self.evictions = Counter(
+            "response_cache_evictions_total",
+            "Entries dropped from the response cache to stay within max_entries.",
+        )
+
+    def metrics(self):
+        return (self.evictions,)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, _, value = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def token(self, tables):
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def set(self, key, value, tables, ttl, token):
+        tables = tuple(tables)
+        with self._lock:
+            if token != tuple(self._generations.get(table, 0) for table in tables):
+                return False
+            self._entries[key] = (self.clock() + ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions.inc()
+            return True
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, (_, tags, _) in self._entries.items() if tags & tables]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Store shared by all workers, in Redis (or anything speaking its
+    protocol). `client` is a redis-py compatible client.
+
+    Each table has a set of the keys built from it and a generation
+    counter. set() adds the key to the tag sets before writing the value
+    and re-reads the generations afterwards, while invalidate() bumps the
+    generations before reading the tag sets; so an invalidation racing
+    with set() either sees the new key or makes set() delete it again.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix="workouts:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def metrics(self):
+        return ()
+
+    def _entry(self, key):
+        return f"{self.prefix}entry:{key}"
+
+    def _tag(self, table):
+        return f"{self.prefix}tag:{table}"
+
+    def _generation(self, table):
+        return f"{self.prefix}gen:{table}"
+
+    def get(self, key):
+        return self.client.get(self._entry(key))
+
+    def token(self, tables):
+        if not tables:
+            return ()
+        return tuple(self.client.mget([self._generation(table) for table in tables]))
+
+    def set(self, key, value, tables, ttl, token):
+        entry = self._entry(key)
+        for table in tables:
+            self.client.sadd(self._tag(table), entry)
+            self.client.expire(self._tag(table), ttl)
+        self.client.set(entry, value, px=int(ttl * 1000))
+        if self.token(tables) != token:
+            self.client.delete(entry)
+            return False
+        return True
+
+    def invalidate(self, tables):
+        dropped = 0
+        for table in tables:
+            self.client.incr(self._generation(table))
+            entries = list(self.client.smembers(self._tag(table)))
+            if entries:
+                dropped += self.client.delete(*entries)
+                # Only the members read here: keys added meanwhile stay tagged
+                self.client.srem(self._tag(table), *entries)
+        return dropped
+
+
+# ------------------------
+# Cross-worker invalidation
+# ------------------------
+class InvalidationBus:
+    """
+    Broadcasts the tables written by each commit over Redis pub/sub so
+    every worker can drop its own entries for them.
+    """
+
+    def __init__(self, client, channel="workouts:cache:invalidate"):
+        self.client = client
+        self.channel = channel
+        self._host = uuid.uuid4().hex
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def node(self):
+        # Forked workers inherit the object, so the pid tells them apart
+        return f"{self._host}-{os.getpid()}"
+
+    def publish(self, tables):
+        message = json.dumps({"node": self.node, "tables": sorted(tables)})
+        self.client.publish(self.channel, message)
+
+    def listen(self, handler):
+        """
+        Call handler(tables) for every message from another node. Safe to
+        call on each request: the listener thread is (re)started once per
+        process, including after a fork.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            node = self.node
+
+            def on_message(message):
+                data = json.loads(message["data"])
+                if data["node"] != node:
+                    handler(data["tables"])
+
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: on_message})
+            pubsub.run_in_thread(sleep_time=1, daemon=True)
+            self._pid = os.getpid()
+
+
+# ------------------------
+# Cache front end
+# ------------------------
+class ResponseCache:
+    """Encoded responses in `backend`, kept for `ttl` seconds at most."""
+
+    def __init__(self, backend, ttl=300, bus=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.bus = bus
+
+        self.hits = Counter(
+            "response_cache_hits_total", "Responses served from the response cache."
+        )
+        self.misses = Counter(
+            "response_cache_misses_total", "Response cache lookups that found nothing."
+        )
+        self.invalidations = Counter(
+            "response_cache_invalidations_total",
+            "Entries dropped from the response cache because their tables changed.",
+        )
+
+    def metrics(self):
+        return (self.hits, self.misses, self.invalidations, *self.backend.metrics())
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def token(self, tables):
+        return self.backend.token(tables)
+
+    def set(self, key, value, tables, token):
+        return self.backend.set(key, value, tables, self.ttl, token)
+
+    def invalidate(self, tables):
+        """Drop the entries built from `tables`, on every worker."""
+        self.invalidations.inc(self.backend.invalidate(tables))
+        if self.bus is not None:
+            self.bus.publish(tables)
+
+    def listen(self):
+        if self.bus is not None and not self.backend.shared:
+            self.bus.listen(self._invalidate_local)
+
+    def _invalidate_local(self, tables):
+        self.invalidations.inc(self.backend.invalidate(tables))
+
+
+# ------------------------
+# Invalidation on commit
+# ------------------------
+def _after_commit(session):
+    tables = session.info.pop("changed_tables", None)
+    if tables and has_app_context():
+        cache = current_app.extensions.get("response_cache")
+        if cache is not None:
+            cache.invalidate(tables)
+
+
+# ------------------------
+# View decorator
+# ------------------------
+def _encode(response):
+    return response.mimetype.encode() + b"\n" + response.get_data()
+
+
+def _decode(value):
+    mimetype, body = value.split(b"\n", 1)
+    return current_app.response_class(body, mimetype=mimetype.decode())
+
+
+def cached(*tables):
+    """
+    Serve a GET view's 200 responses from the app's ResponseCache.
+
+    Entries are keyed by path, query string, Accept header and the change
+    counters of `tables`, and dropped when a transaction writing to one of
+    `tables` commits. The counters keep a per-process cache from serving
+    what it stored before another process wrote (and under the new ETag
+    of @conditional); the drop only frees the memory early. Streamed
+    responses are passed through uncached.
+    """
+    tables = tuple(sorted(tables))
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("response_cache")
+            if cache is None:
+                return view(*args, **kwargs)
+            cache.listen()
+
+            query = urlencode(sorted(request.args.items(multi=True)))
+            versions = current_versions(tables)
+            stamp = ",".join(f"{name}={versions.get(name, (0,))[0]}" for name in tables)
+            key = f"{request.path}?{query}|{request.headers.get('Accept', '')}|{stamp}"
+            value = cache.get(key)
+            if value is not None:
+                cache.hits.inc(endpoint=request.endpoint)
+                return _decode(value)
+            cache.misses.inc(endpoint=request.endpoint)
+
+            token = cache.token(tables)
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, _encode(response), tables, token)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def init_response_cache(app):
+    """
+    Create the app's ResponseCache from the RESPONSE_CACHE_* settings and
+    publish its counters on /metrics:
+
+    - RESPONSE_CACHE_BACKEND: "memory" (default) or "redis"
+    - RESPONSE_CACHE_REDIS_URL: Redis server for the "redis" backend; with
+      the memory backend it carries the invalidation messages between
+      workers
+    - RESPONSE_CACHE_MAX_ENTRIES: size of the memory backend, 0 disables
+      caching
+    - RESPONSE_CACHE_TTL: seconds an entry is kept at most
+    """
+    app.config.setdefault("RESPONSE_CACHE_BACKEND", "memory")
+    app.config.setdefault("RESPONSE_CACHE_REDIS_URL", None)
+    app.config.setdefault("RESPONSE_CACHE_MAX_ENTRIES", 256)
+    app.config.setdefault("RESPONSE_CACHE_TTL", 300)
+
+    url = app.config["RESPONSE_CACHE_REDIS_URL"]
+    kind = app.config["RESPONSE_CACHE_BACKEND"]
+    if kind == "redis":
+        if not url:
+            raise ValueError("RESPONSE_CACHE_BACKEND=redis needs RESPONSE_CACHE_REDIS_URL")
+        backend = RedisBackend(redis_client(url))
+        bus = None
+    elif kind == "memory":
+        if not app.config["RESPONSE_CACHE_MAX_ENTRIES"]:
+            return None
+        backend = MemoryBackend(app.config["RESPONSE_CACHE_MAX_ENTRIES"])
+        bus = InvalidationBus(redis_client(url)) if url else None
+    else:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {kind!r}")
+
+    cache = ResponseCache(backend, app.config["RESPONSE_CACHE_TTL"], bus)
+    app.extensions["response_cache"] = cache
+
+    registry = app.extensions["metrics"]
+    for metric in cache.metrics():
+        registry.add(metric)
+
+    if not event.contains(db.session, "after_commit", _after_commit):
+        event.listen(db.session, "after_commit", _after_commit)
+    return cache
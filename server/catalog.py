@@ -0,0 +1,97 @@
+# server/catalog.py
+
+from sqlalchemy import case, or_, update
+
+from .database import insert_on_conflict
+from .models import db, Exercise
+from .serializers import exercise_serializer
+
+
+# Rows per INSERT ... ON CONFLICT / UPDATE of a sync (at most 4 parameters a
+# row in the INSERT, 9 in the UPDATE), well under the bound-parameter limit
+# of SQLite
+SYNC_BATCH_SIZE = 500
+
+# Columns a sync overwrites on an existing exercise (matched by name)
+SYNC_COLUMNS = ("category", "equipment_needed")
+
+exercises = Exercise.__table__
+
+
+def _insert():
+    return insert_on_conflict(db.session.connection(), exercises)
+
+
+def insert_exercise(values):
+    """
+    Insert an exercise; its row of exercise_serializer.columns, or None
+    if the name is taken. A taken name does not fail the transaction.
+    """
+    statement = (
+        _insert()
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[exercises.c.name])
+        .returning(*exercise_serializer.columns)
+    )
+    return db.session.execute(statement).one_or_none()
+
+
+def upsert_exercise(values):
+    """Insert or update the exercise named values["name"]: (row, created)."""
+    while True:
+        row = insert_exercise(values)
+        if row is not None:
+            return row, True
+        row = db.session.execute(
+            update(exercises)
+            .where(exercises.c.name == values["name"])
+            .values(values)
+            .returning(*exercise_serializer.columns)
+        ).one_or_none()
+        # None if it was deleted in between: insert it after all
+        if row is not None:
+            return row, False
+
+
+def sync_exercises(rows):
+    """
+    Insert or update the exercise dicts `rows` (unique names) by name,
+    SYNC_BATCH_SIZE rows at a time: an INSERT ... ON CONFLICT DO NOTHING
+    returns the names it created, then one UPDATE sets the other rows of
+    the batch whose values differ, returning their ids. Existing
+    exercises that already have the given values are not written.
+    Returns {"created": n, "updated": n, "unchanged": n}.
+    """
+    insert_new = (
+        _insert()
+        .on_conflict_do_nothing(index_elements=[exercises.c.name])
+        .returning(exercises.c.name)
+    )
+
+    created = updated = 0
+    for start in range(0, len(rows), SYNC_BATCH_SIZE):
+        batch = rows[start : start + SYNC_BATCH_SIZE]
+        new_names = set(db.session.scalars(insert_new, batch))
+        created += len(new_names)
+
+        existing = [row for row in batch if row["name"] not in new_names]
+        if not existing:
+            continue
+        # The value of each column, picked by name
+        values = {
+            column: case(
+                {row["name"]: row[column] for row in existing}, value=exercises.c.name
+            )
+            for column in SYNC_COLUMNS
+        }
+        statement = (
+            update(exercises)
+            .where(
+                exercises.c.name.in_([row["name"] for row in existing]),
+                or_(*(exercises.c[column] != value for column, value in values.items())),
+            )
+            .values(values)
+            .returning(exercises.c.id)
+        )
+        updated += len(db.session.scalars(statement).all())
+    return {"created": created, "updated": updated, "unchanged": len(rows) - created - updated}
@@ -0,0 +1,63 @@
+# server/config.py
+
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def _env_int(name, default=None):
+    value = os.environ.get(name)
+    return default if value in (None, "") else int(value)
+
+
+def load_config():
+    """
+    Default settings, read from the environment. create_app(config)
+    overrides any of them.
+    """
+    return {
+        # Database
+        "SQLALCHEMY_DATABASE_URI": os.environ.get(
+            "DATABASE_URL", "sqlite:///" + os.path.join(basedir, "app.db")
+        ),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Read replicas for GET requests (comma-separated URLs), and how long
+        # a client keeps reading from the primary after a write
+        "DATABASE_REPLICA_URLS": [
+            url.strip()
+            for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+            if url.strip()
+        ],
+        "DATABASE_REPLICA_STICKY_SECONDS": _env_int("DATABASE_REPLICA_STICKY_SECONDS", 5),
+        # Engine of the ASGI entry point (server/asgi.py); by default
+        # DATABASE_URL with its async driver, e.g. sqlite+aiosqlite://
+        "ASYNC_DATABASE_URL": os.environ.get("ASYNC_DATABASE_URL"),
+        # Connection pool; None keeps the SQLAlchemy default
+        "DB_POOL_SIZE": _env_int("DB_POOL_SIZE"),
+        "DB_MAX_OVERFLOW": _env_int("DB_MAX_OVERFLOW"),
+        "DB_POOL_TIMEOUT": _env_int("DB_POOL_TIMEOUT"),
+        "DB_POOL_RECYCLE": _env_int("DB_POOL_RECYCLE"),
+        "DB_POOL_PRE_PING": os.environ.get("DB_POOL_PRE_PING") == "1",
+        # Pragmas set on every SQLite connection (see server/database.py)
+        "SQLITE_JOURNAL_MODE": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "SQLITE_SYNCHRONOUS": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "SQLITE_BUSY_TIMEOUT_MS": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "SQLITE_MMAP_SIZE": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+        # JSON encoder: "orjson", "stdlib" or "auto" (orjson if installed)
+        "JSON_PROVIDER": os.environ.get("JSON_PROVIDER", "auto"),
+        # How long the response to an Idempotency-Key is kept for replay
+        "IDEMPOTENCY_KEY_TTL": _env_int("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60),
+        # How long a key stays claimed by a request that stored no response
+        "IDEMPOTENCY_CLAIM_LEASE": _env_int("IDEMPOTENCY_CLAIM_LEASE", 60),
+        # Per-request SQL timing (Server-Timing headers + /metrics), off by default
+        "SQL_INSTRUMENTATION": os.environ.get("SQL_INSTRUMENTATION") == "1",
+        # Serve /metrics without SQL_INSTRUMENTATION (e.g. the cache counters)
+        "METRICS_ENDPOINT": os.environ.get("METRICS_ENDPOINT") == "1",
+        # How long clients may reuse the exercise catalog without revalidating
+        "EXERCISE_CACHE_MAX_AGE": _env_int("EXERCISE_CACHE_MAX_AGE", 60),
+        # Cache of encoded catalog responses, see server/cache.py
+        "RESPONSE_CACHE_BACKEND": os.environ.get("RESPONSE_CACHE_BACKEND", "memory"),
+        "RESPONSE_CACHE_REDIS_URL": os.environ.get("RESPONSE_CACHE_REDIS_URL"),
+        "RESPONSE_CACHE_MAX_ENTRIES": _env_int("RESPONSE_CACHE_MAX_ENTRIES", 256),
+        "RESPONSE_CACHE_TTL": _env_int("RESPONSE_CACHE_TTL", 300),
+    }
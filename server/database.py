@@ -0,0 +1,106 @@
+# server/database.py
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from .models import db
+from .routing import replica_urls
+
+
+# config key -> create_engine() argument
+POOL_OPTIONS = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+}
+
+
+def _is_sqlite_memory(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config):
+    """
+    create_engine() arguments for the DB_POOL_* settings, merged over any
+    SQLALCHEMY_ENGINE_OPTIONS already configured.
+    """
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if not _is_sqlite_memory(config["SQLALCHEMY_DATABASE_URI"]):
+        for key, argument in POOL_OPTIONS.items():
+            if config.get(key) is not None:
+                options.setdefault(argument, config[key])
+    if config.get("DB_POOL_PRE_PING"):
+        options.setdefault("pool_pre_ping", True)
+    return options
+
+
+# Dialects with INSERT ... ON CONFLICT, see insert_on_conflict()
+ON_CONFLICT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def insert_on_conflict(bind, table):
+    """
+    INSERT into `table` with .on_conflict_do_nothing() / _do_update() for
+    the dialect of `bind` (an engine or connection). Both SQLite and
+    PostgreSQL take the same arguments; other databases raise
+    NotImplementedError.
+    """
+    name = bind.dialect.name
+    if name not in ON_CONFLICT_INSERTS:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {name}")
+    return ON_CONFLICT_INSERTS[name](table)
+
+
+def _sqlite_pragmas(config):
+    return [
+        # Enforce foreign keys (and ON DELETE CASCADE), off by default in SQLite
+        "PRAGMA foreign_keys=ON",
+        # Readers no longer block the writer, nor the writer the readers
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        # Safe with WAL: only fsync at checkpoints
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        # Wait for a lock instead of failing with "database is locked"
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+
+def set_sqlite_pragmas(engine, config):
+    """Run the SQLITE_* pragmas on every new connection of a SQLite `engine`."""
+    pragmas = _sqlite_pragmas(config)
+
+    # Also used for the async engine of server/asgi.py (through its
+    # sync_engine), whose connections are adapted to the same cursor API
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
+
+def init_database(app):
+    """
+    Set up db for `app`: pool options from the DB_POOL_* settings, an
+    engine per read replica and, on SQLite, the SQLITE_* pragmas on every
+    new connection.
+    """
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        # Replicas are added to db.engines rather than SQLALCHEMY_BINDS: a
+        # bind key would get its own (process-wide) MetaData, which
+        # create_all() and drop_all() would then expect on every app
+        for key, url in replica_urls(app.config).items():
+            options = engine_options({**app.config, "SQLALCHEMY_DATABASE_URI": url})
+            db.engines[key] = create_engine(url, **options)
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            set_sqlite_pragmas(engine, app.config)
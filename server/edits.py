@@ -0,0 +1,204 @@
+# server/edits.py
+
+from marshmallow import ValidationError
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from .models import db, Exercise, Workout, WorkoutExercise
+from .rollups import refresh
+
+
+# Columns of a join row set by the client (workout_id comes from the URL)
+JOIN_VALUE_COLUMNS = ("exercise_id", "reps", "sets", "duration_seconds")
+
+# Largest DP table (items x stored rows) diff_workout_exercises fills in;
+# past it the rows are rewritten in place, see _diff_in_place()
+MAX_DIFF_CELLS = 250_000
+
+workouts = Workout.__table__
+join_records = WorkoutExercise.__table__
+
+# Workout columns a PUT without them clears
+WORKOUT_OPTIONAL_COLUMNS = tuple(
+    column.name for column in workouts.c if column.nullable and not column.primary_key
+)
+
+
+def _values(item):
+    return tuple(item.get(name) for name in JOIN_VALUE_COLUMNS)
+
+
+# ---------------------------
+# Diff
+# ---------------------------
+def diff_workout_exercises(existing, items):
+    """
+    The writes that turn the join rows `existing` ({id: row dict}) into
+    the list `items`: (inserts, updates, deletes), i.e. item dicts to
+    insert, {"id", *JOIN_VALUE_COLUMNS} dicts to update and ids to
+    delete.
+
+    Join rows are listed in id order and new rows get higher ids than
+    the stored ones, so the order of `items` is kept only if they take
+    stored rows in id order, as a run that the inserted items follow;
+    the rows not taken are deleted. Of these assignments the one writing
+    the fewest rows is used (rows taken with the same values are not
+    written), preferring updates to a delete and an insert. So a client
+    resending the whole list with a few edits only writes those, and a
+    reordered list rewrites the rows whose place changed.
+
+    Finding that assignment takes time and memory in n * m (items by
+    stored rows after their common prefix): above MAX_DIFF_CELLS, the
+    items take the rows in turn instead (see _diff_in_place).
+    """
+    ids = sorted(existing)
+    rows = [_values(existing[id]) for id in ids]
+    wanted = [_values(item) for item in items]
+
+    # Leading items equal to the leading rows are always best kept as is
+    same = 0
+    while same < min(len(rows), len(wanted)) and rows[same] == wanted[same]:
+        same += 1
+    rows, wanted = rows[same:], wanted[same:]
+    n, m = len(wanted), len(rows)
+    if n * m > MAX_DIFF_CELLS:
+        return _diff_in_place(ids[same:], rows, items[same:], wanted)
+
+    # best[i][j]: fewest rows rewritten when wanted[:i] take rows among
+    # rows[:j] in order (only defined for j >= i)
+    longest = min(n, m)
+    best = [[0] * (m + 1)] + [[None] * (m + 1) for _ in range(longest)]
+    for i in range(1, longest + 1):
+        previous, current, values = best[i - 1], best[i], wanted[i - 1]
+        current[i] = previous[i - 1] + (values != rows[i - 1])
+        for j in range(i + 1, m + 1):
+            current[j] = min(current[j - 1], previous[j - 1] + (values != rows[j - 1]))
+
+    # Take rows for the first `taken` items: the others are inserted and
+    # the rows left deleted
+    taken = min(range(longest + 1), key=lambda k: (best[k][m] + (n - k) + (m - k), -k))
+
+    updates, kept = [], set()
+    i, j = taken, m
+    while i:
+        if j > i and best[i][j] == best[i][j - 1]:
+            j -= 1
+            continue
+        if wanted[i - 1] != rows[j - 1]:
+            updates.append({**items[same + i - 1], "id": ids[same + j - 1]})
+        kept.add(ids[same + j - 1])
+        i, j = i - 1, j - 1
+
+    inserts = list(items[same + taken :])
+    deletes = [id for id in ids[same:] if id not in kept]
+    return inserts, updates[::-1], deletes
+
+
+def _diff_in_place(ids, rows, items, wanted):
+    """
+    diff_workout_exercises without the search: item k takes the k-th
+    row, which is written unless it has the same values; the items left
+    over are inserted and the rows left over deleted. The order is kept,
+    in time linear in the list sizes.
+    """
+    taken = min(len(items), len(ids))
+    updates = [
+        {**items[k], "id": ids[k]} for k in range(taken) if wanted[k] != rows[k]
+    ]
+    return list(items[taken:]), updates, list(ids[taken:])
+
+
+# ---------------------------
+# Edits
+# ---------------------------
+def _missing_exercises(items, known):
+    """Errors (by item index) for exercise ids that do not exist."""
+    wanted = {item["exercise_id"] for item in items} - known
+    if not wanted:
+        return {}
+    found = set(db.session.scalars(select(Exercise.id).where(Exercise.id.in_(wanted))))
+    return {
+        index: {"exercise_id": ["Exercise not found."]}
+        for index, item in enumerate(items)
+        if item["exercise_id"] in wanted - found
+    }
+
+
+def edit_workout(workout_id, changes, items=None):
+    """
+    Set the workout columns in `changes` and, unless `items` is None,
+    make its join rows the list `items` (see diff_workout_exercises),
+    with only the statements needed: values already stored are not
+    written again. The rollups of the touched rows are refreshed.
+
+    Returns {"inserted": n, "updated": n, "deleted": n} for the join
+    rows, or None if there is no such workout. Raises ValidationError
+    for `items` referring to unknown exercises; nothing is written then.
+    """
+    current = db.session.execute(
+        select(workouts).where(workouts.c.id == workout_id)
+    ).one_or_none()
+    if current is None:
+        return None
+    changes = {
+        name: value for name, value in changes.items() if getattr(current, name) != value
+    }
+    date = changes.get("date", current.date)
+
+    existing = {}
+    if items is not None or "date" in changes:
+        existing = {
+            row.id: row._asdict()
+            for row in db.session.execute(
+                select(join_records.c.id, *(join_records.c[n] for n in JOIN_VALUE_COLUMNS))
+                .where(join_records.c.workout_id == workout_id)
+            )
+        }
+
+    inserts, updates, deletes = [], [], []
+    if items is not None:
+        inserts, updates, deletes = diff_workout_exercises(existing, items)
+        errors = _missing_exercises(
+            items, {row["exercise_id"] for row in existing.values()}
+        )
+        if errors:
+            raise ValidationError(errors)
+
+    if changes:
+        db.session.execute(
+            update(workouts).where(workouts.c.id == workout_id).values(changes)
+        )
+    if deletes:
+        db.session.execute(delete(join_records).where(join_records.c.id.in_(deletes)))
+    if updates:
+        db.session.execute(
+            update(join_records)
+            .where(join_records.c.id == bindparam("row_id"))
+            .values({name: bindparam(name) for name in JOIN_VALUE_COLUMNS}),
+            [
+                {"row_id": item["id"], **dict(zip(JOIN_VALUE_COLUMNS, _values(item)))}
+                for item in updates
+            ],
+        )
+    if inserts:
+        db.session.execute(
+            insert(join_records),
+            [
+                {"workout_id": workout_id, **dict(zip(JOIN_VALUE_COLUMNS, _values(item)))}
+                for item in inserts
+            ],
+        )
+
+    # Rollup keys the rows left (old date) and joined (new date); Core
+    # statements bypass the flush events that maintain them
+    if "date" in changes:
+        before = list(existing.values())
+        after = [existing[id] for id in existing if id not in deletes] + inserts + updates
+    else:
+        before = [existing[id] for id in deletes] + [existing[u["id"]] for u in updates]
+        after = inserts + updates
+    keys = {(current.date, row["exercise_id"]) for row in before}
+    keys |= {(date, row["exercise_id"]) for row in after}
+    if keys:
+        refresh(db.session.connection(), keys)
+
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
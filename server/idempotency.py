@@ -0,0 +1,179 @@
+# server/idempotency.py
+
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+import click
+from flask import current_app, jsonify, request
+from flask.cli import AppGroup
+from sqlalchemy import delete, select, update
+
+from .database import insert_on_conflict
+from .models import db, IdempotencyKey
+from .versions import _utcnow
+
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint():
+    """Hash of the method, path and body of the current request."""
+    digest = hashlib.sha256(f"{request.method} {request.full_path}\n".encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()[:32]
+
+
+# ---------------------------
+# Key lifecycle
+# ---------------------------
+def claim(key, fingerprint):
+    """
+    Record `key` as in progress in the current transaction, taking over
+    an expired entry; False if a live entry exists. The claim commits
+    with the writes of the request, so a retry either sees it or runs.
+
+    The claim expires after IDEMPOTENCY_CLAIM_LEASE seconds rather than
+    the full TTL: should the process die between that commit and
+    store(), the key can be retried (and the request runs again) once
+    the lease is over.
+    """
+    now = _utcnow()
+    values = {
+        "key": key,
+        "fingerprint": fingerprint,
+        "status_code": None,
+        "content_type": None,
+        "body": None,
+        "expires_at": now
+        + timedelta(seconds=current_app.config["IDEMPOTENCY_CLAIM_LEASE"]),
+    }
+    statement = insert_on_conflict(db.session.connection(), IdempotencyKey).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={name: statement.excluded[name] for name in values if name != "key"},
+        where=IdempotencyKey.expires_at <= now,
+    )
+    return db.session.execute(statement).rowcount == 1
+
+
+def store(key, response):
+    """Save `response` as the one to replay for `key`, for the full TTL."""
+    ttl = timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL"])
+    db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(
+            status_code=response.status_code,
+            content_type=response.content_type,
+            body=response.get_data(),
+            expires_at=_utcnow() + ttl,
+        )
+    )
+    db.session.commit()
+
+
+def release(key):
+    """Drop the claim on `key` (the request failed), so that a retry runs."""
+    db.session.rollback()
+    # Already gone unless the view committed before failing
+    db.session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+        )
+    )
+    db.session.commit()
+
+
+def replay(key, fingerprint):
+    """The response for a request whose `key` is already claimed."""
+    entry = db.session.execute(
+        select(
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.content_type,
+            IdempotencyKey.body,
+        ).where(IdempotencyKey.key == key)
+    ).one_or_none()
+    # End the transaction the failed claim opened
+    db.session.rollback()
+
+    if entry is not None and entry.fingerprint != fingerprint:
+        return (
+            jsonify({"message": f"{HEADER} was already used for a different request."}),
+            422,
+        )
+    if entry is None or entry.status_code is None:
+        return (
+            jsonify({"message": f"A request with this {HEADER} is in progress."}),
+            409,
+            {"Retry-After": "1"},
+        )
+
+    response = current_app.response_class(
+        entry.body, status=entry.status_code, content_type=entry.content_type
+    )
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(view):
+    """
+    Run `view` at most once per Idempotency-Key header: a request retried
+    with the same key gets the stored response back, without running the
+    view again (no validation, no writes). Only 2xx responses are stored;
+    after an error the key can be retried. Reusing a key for another
+    request is a 422, and a retry while the first request runs a 409.
+    Requests without the header are not affected.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not 1 <= len(key) <= MAX_KEY_LENGTH:
+            return (
+                jsonify({"message": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."}),
+                400,
+            )
+
+        fingerprint = request_fingerprint()
+        if not claim(key, fingerprint):
+            return replay(key, fingerprint)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            release(key)
+            raise
+        if 200 <= response.status_code < 300:
+            store(key, response)
+        else:
+            release(key)
+        return response
+
+    return wrapper
+
+
+# ---------------------------
+# Expiry
+# ---------------------------
+def purge_expired():
+    """Delete the expired keys; returns how many there were."""
+    deleted = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _utcnow())
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+idempotency_cli = AppGroup("idempotency", help="Maintain the idempotency key table.")
+
+
+@idempotency_cli.command("purge")
+def purge_command():
+    """Delete expired idempotency keys."""
+    click.echo(f"Deleted {purge_expired()} expired idempotency keys.")
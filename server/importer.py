@@ -0,0 +1,271 @@
+# server/importer.py
+
+import csv
+import json
+import time
+
+import click
+from flask.cli import with_appcontext
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+
+from .models import db, Exercise, Workout, WorkoutExercise
+from .rollups import refresh_for_workouts
+from .schemas import ExerciseSchema, WorkoutSchema, WorkoutExerciseSchema
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Rows are loaded as plain dicts and inserted with Core executemany
+exercise_loader = ExerciseSchema()
+workout_loader = WorkoutSchema()
+workout_exercise_loader = WorkoutExerciseSchema()
+
+
+class RowError(Exception):
+    """A single input row failed validation."""
+
+    def __init__(self, messages):
+        super().__init__(messages)
+        self.messages = messages
+
+
+# ---------------------------
+# Readers
+# ---------------------------
+def read_records(path, fmt=None):
+    """
+    Yield (line_number, record) pairs from a CSV or NDJSON file without
+    loading the whole file. The format is taken from the extension unless
+    given explicitly.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                # Empty CSV cells mean "not provided"
+                yield line_no, {k: (v if v != "" else None) for k, v in row.items()}
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as err:
+                    yield line_no, RowError({"_schema": [f"Invalid JSON: {err.msg}"]})
+
+
+# ---------------------------
+# Validation
+# ---------------------------
+def _validate(loader, raw):
+    """
+    Run the schema rules (which include the model @validates rules) on
+    `raw`, returning the cleaned column values.
+    """
+    if isinstance(raw, RowError):
+        raise raw
+    if not isinstance(raw, dict):
+        raise RowError({"_schema": ["Expected an object."]})
+    try:
+        return loader.load(raw)
+    except ValidationError as err:
+        raise RowError(err.messages) from err
+
+
+def _resolve_exercise(raw, exercise_ids):
+    """Replace an `exercise` name with its `exercise_id` using the name map."""
+    if not isinstance(raw, dict) or "exercise" not in raw:
+        return raw
+    raw = dict(raw)
+    name = raw.pop("exercise")
+    name = name.strip() if isinstance(name, str) else name
+    if name not in exercise_ids:
+        raise RowError({"exercise": [f"Unknown exercise: {name!r}."]})
+    raw["exercise_id"] = exercise_ids[name]
+    return raw
+
+
+class _ImportState:
+    """Lookups shared by every batch of one import run."""
+
+    def __init__(self):
+        # Name -> id map so rows can reference exercises by name without a
+        # query per row
+        self.exercise_ids = dict(
+            db.session.execute(select(Exercise.name, Exercise.id)).all()
+        )
+        self.known_ids = set(self.exercise_ids.values())
+
+    def add_exercises(self, names, ids):
+        self.exercise_ids.update(zip(names, ids))
+        self.known_ids.update(ids)
+
+    def check_exercise_id(self, row):
+        if row["exercise_id"] not in self.known_ids:
+            raise RowError({"exercise_id": ["Exercise not found."]})
+
+
+# ---------------------------
+# Per-kind row preparation
+# ---------------------------
+def _prepare_exercise(raw, state):
+    row = _validate(exercise_loader, raw)
+    if row["name"] in state.exercise_ids:
+        raise RowError({"name": ["Exercise with this name already exists."]})
+    # Reserve the name so later rows in the same batch are rejected too
+    state.exercise_ids[row["name"]] = None
+    return row, None
+
+
+def _prepare_workout(raw, state):
+    join_rows = []
+    if isinstance(raw, dict) and "exercises" in raw:
+        raw = dict(raw)
+        nested = raw.pop("exercises") or []
+        if not isinstance(nested, list):
+            raise RowError({"exercises": ["Expected a list."]})
+        for index, item in enumerate(nested):
+            try:
+                item = _resolve_exercise(item, state.exercise_ids)
+                if isinstance(item, dict):
+                    # Placeholder; the real id is assigned when the workout
+                    # is inserted
+                    item = {**item, "workout_id": 0}
+                join_row = _validate(workout_exercise_loader, item)
+                state.check_exercise_id(join_row)
+            except RowError as err:
+                raise RowError({"exercises": {index: err.messages}}) from err
+            del join_row["workout_id"]
+            join_rows.append(join_row)
+    return _validate(workout_loader, raw), join_rows
+
+
+def _prepare_workout_exercise(raw, state):
+    raw = _resolve_exercise(raw, state.exercise_ids)
+    row = _validate(workout_exercise_loader, raw)
+    state.check_exercise_id(row)
+    return row, None
+
+
+# ---------------------------
+# Batch writers
+# ---------------------------
+def _write_exercises(batch, state, on_error):
+    rows = [row for _, row, _ in batch]
+    new_ids = db.session.scalars(
+        insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True), rows
+    ).all()
+    db.session.commit()
+    state.add_exercises((row["name"] for row in rows), new_ids)
+    return len(rows)
+
+
+def _write_workouts(batch, state, on_error):
+    rows = [row for _, row, _ in batch]
+    new_ids = db.session.scalars(
+        insert(Workout).returning(Workout.id, sort_by_parameter_order=True), rows
+    ).all()
+    join_rows = [
+        {**join_row, "workout_id": workout_id}
+        for workout_id, (_, _, join_rows) in zip(new_ids, batch)
+        for join_row in join_rows
+    ]
+    if join_rows:
+        db.session.execute(insert(WorkoutExercise), join_rows)
+        refresh_for_workouts(db.session.connection(), new_ids)
+    db.session.commit()
+    return len(rows) + len(join_rows)
+
+
+def _write_workout_exercises(batch, state, on_error):
+    # Check the referenced workouts with one IN query per batch
+    wanted = {row["workout_id"] for _, row, _ in batch}
+    existing = set(db.session.scalars(select(Workout.id).where(Workout.id.in_(wanted))))
+
+    rows = []
+    for line_no, row, _ in batch:
+        if row["workout_id"] in existing:
+            rows.append(row)
+        else:
+            on_error(line_no, {"workout_id": ["Workout not found."]})
+    if rows:
+        db.session.execute(insert(WorkoutExercise), rows)
+        refresh_for_workouts(db.session.connection(), wanted & existing)
+        db.session.commit()
+    return len(rows)
+
+
+KINDS = {
+    "exercises": (_prepare_exercise, _write_exercises),
+    "workouts": (_prepare_workout, _write_workouts),
+    "workout_exercises": (_prepare_workout_exercise, _write_workout_exercises),
+}
+
+
+def import_records(kind, records, batch_size=DEFAULT_BATCH_SIZE, on_error=None):
+    """
+    Validate and insert `records` (an iterable of (line_number, record))
+    in batches of `batch_size`, committing once per batch.
+
+    Invalid rows are skipped and passed to on_error(line_number, messages).
+    Returns a dict with the number of rows inserted and skipped.
+    """
+    prepare, write = KINDS[kind]
+    state = _ImportState()
+    errors = []
+
+    def report(line_no, messages):
+        errors.append(line_no)
+        if on_error:
+            on_error(line_no, messages)
+
+    inserted = 0
+    batch = []
+    for line_no, raw in records:
+        try:
+            row, extra = prepare(raw, state)
+        except RowError as err:
+            report(line_no, err.messages)
+            continue
+        batch.append((line_no, row, extra))
+        if len(batch) >= batch_size:
+            inserted += write(batch, state, report)
+            batch = []
+    if batch:
+        inserted += write(batch, state, report)
+
+    return {"inserted": inserted, "skipped": len(errors)}
+
+
+@click.command("import")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "ndjson"]),
+    help="Input format (default: from the file extension).",
+)
+@click.option(
+    "--batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Rows inserted per transaction.",
+)
+@with_appcontext
+def import_command(kind, path, fmt, batch_size):
+    """Bulk-import exercises, workouts or workout_exercises from CSV/NDJSON."""
+
+    def report(line_no, messages):
+        click.echo(f"{path}:{line_no}: {json.dumps(messages)}", err=True)
+
+    started = time.perf_counter()
+    stats = import_records(kind, read_records(path, fmt), batch_size, report)
+    elapsed = time.perf_counter() - started
+
+    rate = stats["inserted"] / elapsed if elapsed else 0.0
+    click.echo(
+        f"Imported {stats['inserted']} rows into {kind} in {elapsed:.2f}s "
+        f"({rate:,.0f} rows/s); {stats['skipped']} rows skipped."
+    )
@@ -0,0 +1,275 @@
+# server/instrumentation.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .models import db
+
+
+# Upper bounds (seconds / count) of the histogram buckets
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ------------------------
+# Metric types
+# ------------------------
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    labels = _format_labels(key + (("le", bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics collected for one app; other modules may add their own."""
+
+    def __init__(self):
+        self.metrics = []
+        self.request_duration = self.add(
+            Histogram(
+                "http_request_duration_seconds",
+                "Time spent handling the request.",
+                DURATION_BUCKETS,
+            )
+        )
+        self.db_duration = self.add(
+            Histogram(
+                "db_request_duration_seconds",
+                "Total time spent executing SQL per request.",
+                DURATION_BUCKETS,
+            )
+        )
+        self.db_queries = self.add(
+            Histogram(
+                "db_queries_per_request",
+                "Number of SQL statements executed per request.",
+                QUERY_COUNT_BUCKETS,
+            )
+        )
+        self.db_routes = self.add(
+            Counter(
+                "db_routed_requests_total",
+                "Requests by the database engine (primary or replica) they used.",
+            )
+        )
+        self.db_slowest = self.add(
+            Histogram(
+                "db_slowest_query_seconds",
+                "Duration of the slowest SQL statement of each request.",
+                DURATION_BUCKETS,
+            )
+        )
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ------------------------
+# Per-request collection
+# ------------------------
+class RequestStats:
+    """SQL activity of a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement, elapsed):
+        self.query_count += 1
+        self.db_time += elapsed
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+
+def _current_stats():
+    if has_request_context():
+        return g.get("sql_stats")
+    return None
+
+
+# Kept on the execution context of each statement: a statement that fails
+# has no after_cursor_execute, and its start time goes away with it
+STARTED_ATTRIBUTE = "_sql_stats_started"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None and context is not None:
+        setattr(context, STARTED_ATTRIBUTE, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    started = getattr(context, STARTED_ATTRIBUTE, None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _start_request():
+    if current_app.config["SQL_INSTRUMENTATION"]:
+        g.sql_stats = RequestStats()
+    else:
+        # g outlives the request when an app context was already pushed
+        g.pop("sql_stats", None)
+
+
+def _server_timing(stats, route):
+    """Server-Timing header value; durations are in milliseconds."""
+    entries = [
+        f'db;dur={stats.db_time * 1000:.3f};desc="{stats.query_count} queries"',
+        f"app;dur={(time.perf_counter() - stats.started) * 1000:.3f}",
+    ]
+    if route:
+        entries.append(f'db-route;desc="{route}"')
+    if stats.slowest_statement:
+        statement = " ".join(stats.slowest_statement.split())[:100]
+        statement = statement.replace("\\", "").replace('"', "'")
+        entries.append(
+            f'db-slowest;dur={stats.slowest_time * 1000:.3f};desc="{statement}"'
+        )
+    return ", ".join(entries)
+
+
+def _finish_request(response):
+    stats = g.get("sql_stats")
+    if stats is None:
+        return response
+
+    # Set by server/routing.py: "primary" or the replica's bind key
+    route = g.get("db_route")
+    response.headers["Server-Timing"] = _server_timing(stats, route)
+
+    registry = current_app.extensions["metrics"]
+    endpoint = request.endpoint or "unmatched"
+    method = request.method
+
+    def record():
+        # Runs once the body has been sent, so streamed responses are
+        # measured in full
+        registry.request_duration.observe(
+            time.perf_counter() - stats.started, endpoint=endpoint, method=method
+        )
+        registry.db_duration.observe(stats.db_time, endpoint=endpoint, method=method)
+        registry.db_queries.observe(stats.query_count, endpoint=endpoint, method=method)
+        registry.db_slowest.observe(stats.slowest_time, endpoint=endpoint, method=method)
+        if route:
+            registry.db_routes.inc(endpoint=endpoint, method=method, target=route)
+
+    response.call_on_close(record)
+    return response
+
+
+def metrics():
+    """Aggregated per-endpoint metrics in Prometheus text format."""
+    config = current_app.config
+    if not (config["METRICS_ENDPOINT"] or config["SQL_INSTRUMENTATION"]):
+        return current_app.response_class(status=404)
+    return current_app.response_class(
+        current_app.extensions["metrics"].render(), mimetype=PROMETHEUS_MIMETYPE
+    )
+
+
+def init_instrumentation(app):
+    """
+    Install the request/SQL hooks and the /metrics route on `app`.
+
+    SQL collection is opt-in: nothing is measured unless
+    app.config["SQL_INSTRUMENTATION"] is true. /metrics returns 404 unless
+    that or app.config["METRICS_ENDPOINT"] is set; the latter serves the
+    metrics of other modules (such as the response cache) on their own.
+    """
+    app.config.setdefault("SQL_INSTRUMENTATION", False)
+    app.config.setdefault("METRICS_ENDPOINT", False)
+    app.extensions["metrics"] = MetricsRegistry()
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics)
@@ -0,0 +1,92 @@
+# server/jsonprovider.py
+
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+
+def _default(o):
+    # ISO 8601 dates, as orjson writes them (Flask's default is an HTTP date)
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's json-module provider, writing dates in ISO 8601."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """
+    JSON provider encoding with orjson: jsonify() responses are built as
+    bytes in one call, without the intermediate str.
+
+    The output is the stdlib's in compact form, except that non-ASCII
+    text is written as UTF-8 rather than \\u escapes and non-string keys
+    are sorted as strings. Calls with stdlib-specific arguments (indent,
+    separators, ...) and pretty-printed debug responses go through the
+    stdlib.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Optional dependency, see init_json
+        import orjson
+
+        self._orjson = orjson
+
+    def _options(self):
+        options = self._orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= self._orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(obj)
+        body = self._orjson.dumps(
+            obj,
+            default=self.default,
+            option=self._options() | self._orjson.OPT_APPEND_NEWLINE,
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {"orjson": OrjsonProvider, "stdlib": StdlibJSONProvider}
+
+
+def _orjson_available():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def init_json(app):
+    """
+    Set the JSON provider of `app` (jsonify, request.get_json, NDJSON
+    streams) from JSON_PROVIDER: "orjson", "stdlib", or "auto" (default)
+    for orjson when it is installed.
+    """
+    app.config.setdefault("JSON_PROVIDER", "auto")
+
+    name = app.config["JSON_PROVIDER"]
+    if name == "auto":
+        name = "orjson" if _orjson_available() else "stdlib"
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER: {name!r}")
+    app.json = JSON_PROVIDERS[name](app)
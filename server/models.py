@@ -4,7 +4,9 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import CheckConstraint, UniqueConstraint
 from sqlalchemy.orm import validates
 
-db = SQLAlchemy()
+from .routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class Exercise(db.Model):
@@ -32,19 +34,30 @@ class Exercise(db.Model):
     category = db.Column(db.String, nullable=False)
     equipment_needed = db.Column(db.Boolean, nullable=False)
 
+    __table_args__ = (
+        # Case-insensitive prefix search on the name (server/search.py);
+        # SQLite only, where LIKE 'abc%' can use a NOCASE index
+        db.Index("ix_exercises_name_nocase", name.collate("NOCASE")).ddl_if(
+            dialect="sqlite"
+        ),
+    )
+
     workout_exercises = db.relationship(
         "WorkoutExercise",
         back_populates="exercise",
         cascade="all, delete-orphan",
+        # Rows are removed by ON DELETE CASCADE, not loaded and deleted one by one
+        passive_deletes=True,
         overlaps="workouts,exercises",
     )
 
-    # many-to-many convenience relationship
+    # many-to-many convenience relationship (read-only: join rows are
+    # written through WorkoutExercise, and may repeat an exercise)
     workouts = db.relationship(
         "Workout",
         secondary="workout_exercises",
         back_populates="exercises",
-        overlaps="workout_exercises,exercise",
+        viewonly=True,
     )
 
 
@@ -70,20 +83,25 @@ class Workout(db.Model):
         "WorkoutExercise",
         back_populates="workout",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         overlaps="exercises,workouts",
+        # Insertion order, also used by server/serializers.py
+        order_by="WorkoutExercise.id",
     )
 
-    # many-to-many convenience relationship
+    # many-to-many convenience relationship (read-only, see Exercise.workouts)
     exercises = db.relationship(
         "Exercise",
         secondary="workout_exercises",
         back_populates="workouts",
-        overlaps="workout_exercises,exercise",
+        viewonly=True,
     )
 
-    # constraints
+    # constraints / indexes
     __table_args__ = (
         CheckConstraint("duration_minutes > 0", name="check_workout_duration_positive"),
+        # date-range filters and (date, id) keyset pagination
+        db.Index("ix_workouts_date_id", "date", "id"),
     )
 
 
@@ -111,8 +129,15 @@ class WorkoutExercise(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    workout_id = db.Column(db.Integer, db.ForeignKey("workouts.id"), nullable=False)
-    exercise_id = db.Column(db.Integer, db.ForeignKey("exercises.id"), nullable=False)
+    workout_id = db.Column(
+        db.Integer, db.ForeignKey("workouts.id", ondelete="CASCADE"), nullable=False
+    )
+    exercise_id = db.Column(
+        db.Integer,
+        db.ForeignKey("exercises.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     reps = db.Column(db.Integer)
     sets = db.Column(db.Integer)
@@ -126,8 +151,11 @@ class WorkoutExercise(db.Model):
         "Exercise", back_populates="workout_exercises", overlaps="workouts,exercises"
     )
 
-    # constraints
+    # constraints / indexes
     __table_args__ = (
+        # Relationship loads and deletes by workout; its leading column also
+        # serves lookups by workout_id alone
+        db.Index("ix_workout_exercises_workout_id_exercise_id", "workout_id", "exercise_id"),
         CheckConstraint("reps IS NULL OR reps >= 0", name="check_reps_non_negative"),
         CheckConstraint("sets IS NULL OR sets >= 0", name="check_sets_non_negative"),
         CheckConstraint(
@@ -135,3 +163,71 @@ class WorkoutExercise(db.Model):
             name="check_duration_non_negative",
         ),
     )
+
+
+# ---------------------------
+# Rollups (maintained by server/rollups.py)
+# ---------------------------
+class DailyRollup(db.Model):
+    """Training totals per (day, exercise), derived from workout_exercises."""
+
+    __tablename__ = "rollup_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    exercise_id = db.Column(
+        db.Integer, db.ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    entries = db.Column(db.Integer, nullable=False)
+    total_sets = db.Column(db.Integer, nullable=False)
+    total_reps = db.Column(db.Integer, nullable=False)
+    total_volume = db.Column(db.Integer, nullable=False)
+    total_duration_seconds = db.Column(db.Integer, nullable=False)
+
+
+class WeeklyRollup(db.Model):
+    """Training totals per (ISO week, exercise); week_start is the Monday."""
+
+    __tablename__ = "rollup_weekly"
+
+    week_start = db.Column(db.Date, primary_key=True)
+    exercise_id = db.Column(
+        db.Integer, db.ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    entries = db.Column(db.Integer, nullable=False)
+    total_sets = db.Column(db.Integer, nullable=False)
+    total_reps = db.Column(db.Integer, nullable=False)
+    total_volume = db.Column(db.Integer, nullable=False)
+    total_duration_seconds = db.Column(db.Integer, nullable=False)
+
+
+# ---------------------------
+# Change counters (maintained by server/versions.py)
+# ---------------------------
+class TableVersion(db.Model):
+    """Change counter of a table, bumped by the commit of every write to it."""
+
+    __tablename__ = "table_versions"
+
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+# ---------------------------
+# Idempotency keys (maintained by server/idempotency.py)
+# ---------------------------
+class IdempotencyKey(db.Model):
+    """Stored response of a write sent with an Idempotency-Key header."""
+
+    __tablename__ = "idempotency_keys"
+
+    key = db.Column(db.String, primary_key=True)
+    # Hash of the method, path and body the key was first used with
+    fingerprint = db.Column(db.String(32), nullable=False)
+    # NULL while the first request is still being handled
+    status_code = db.Column(db.Integer)
+    content_type = db.Column(db.String)
+    body = db.Column(db.LargeBinary)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
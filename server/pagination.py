@@ -0,0 +1,65 @@
+# server/pagination.py
+
+import base64
+import json
+from datetime import date
+
+from marshmallow import fields, ValidationError
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Ids in a cursor must fit a signed 64-bit column
+MAX_CURSOR_ID = 2**63
+
+
+def encode_cursor(workout_date, workout_id):
+    """
+    Encode the (date, id) keyset position of a workout as an opaque,
+    URL-safe token.
+    """
+    raw = json.dumps([workout_date.isoformat(), workout_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor() back into (date, id).
+    Raises ValueError if the token is malformed, including ids that are
+    not integers a database column can hold.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw_date, raw_id = json.loads(base64.urlsafe_b64decode(padded))
+        if type(raw_id) is not int or not 0 < raw_id < MAX_CURSOR_ID:
+            raise ValueError(f"Invalid cursor id: {raw_id!r}")
+        return date.fromisoformat(raw_date), raw_id
+    except (TypeError, ValueError, OverflowError, json.JSONDecodeError) as err:
+        raise ValueError("Invalid cursor.") from err
+
+
+class Cursor(fields.Field):
+    """Marshmallow field that deserializes a cursor token into (date, id)."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str):
+            raise ValidationError("Invalid cursor.")
+        try:
+            return decode_cursor(value)
+        except ValueError as err:
+            raise ValidationError(str(err)) from err
+
+
+def after_keyset(date_column, id_column, cursor):
+    """
+    Build the WHERE clause selecting rows strictly after `cursor` in
+    (date, id) order. Spelled out as OR/AND (rather than a row-value
+    comparison) so it can use an index on date on every backend.
+    """
+    cursor_date, cursor_id = cursor
+    return or_(
+        date_column > cursor_date,
+        and_(date_column == cursor_date, id_column > cursor_id),
+    )
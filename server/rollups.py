@@ -0,0 +1,310 @@
+# server/rollups.py
+
+from datetime import timedelta
+from itertools import chain
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, except_, func, insert, or_, select, tuple_
+from sqlalchemy.orm import attributes
+from sqlalchemy.sql import Select
+
+from .models import db, DailyRollup, Exercise, WeeklyRollup, Workout, WorkoutExercise
+from .stats import week_start
+
+
+# Max (date, exercise_id) pairs per statement, to stay well under the
+# bound-parameter limit of SQLite
+KEY_CHUNK_SIZE = 400
+
+# First key of the PostgreSQL advisory locks taken per exercise while its
+# rollup rows are recomputed (the second is the exercise id)
+ROLLUP_LOCK_CLASS = 7301
+
+TOTAL_COLUMNS = (
+    "entries",
+    "total_sets",
+    "total_reps",
+    "total_volume",
+    "total_duration_seconds",
+)
+
+
+def _raw_totals():
+    return (
+        func.count(WorkoutExercise.id),
+        func.coalesce(func.sum(WorkoutExercise.sets), 0),
+        func.coalesce(func.sum(WorkoutExercise.reps), 0),
+        func.coalesce(func.sum(WorkoutExercise.sets * WorkoutExercise.reps), 0),
+        func.coalesce(func.sum(WorkoutExercise.duration_seconds), 0),
+    )
+
+
+def _daily_from_raw():
+    """Daily rollup rows computed from workout_exercises."""
+    return (
+        select(Workout.date, WorkoutExercise.exercise_id, *_raw_totals())
+        .join_from(WorkoutExercise, Workout, WorkoutExercise.workout_id == Workout.id)
+        .group_by(Workout.date, WorkoutExercise.exercise_id)
+    )
+
+
+def _weekly_from_daily():
+    """Weekly rollup rows computed from rollup_daily."""
+    week = week_start(DailyRollup.day)
+    return select(
+        week,
+        DailyRollup.exercise_id,
+        *(func.sum(getattr(DailyRollup, name)) for name in TOTAL_COLUMNS),
+    ).group_by(week, DailyRollup.exercise_id)
+
+
+def _chunks(keys):
+    keys = sorted(keys)
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        yield keys[start : start + KEY_CHUNK_SIZE]
+
+
+def _monday(day):
+    return day - timedelta(days=day.weekday())
+
+
+# ---------------------------
+# Incremental maintenance
+# ---------------------------
+def affected_keys(connection, workout_ids=(), exercise_ids=()):
+    """
+    (date, exercise_id) rollup keys currently covered by the workout_exercises
+    rows of the given workouts and exercises. Either argument may also be
+    a SELECT of ids.
+    """
+    conditions = [
+        column.in_(ids if isinstance(ids, Select) else set(ids))
+        for column, ids in (
+            (WorkoutExercise.workout_id, workout_ids),
+            (WorkoutExercise.exercise_id, exercise_ids),
+        )
+        if isinstance(ids, Select) or ids
+    ]
+    if not conditions:
+        return set()
+    query = (
+        select(Workout.date, WorkoutExercise.exercise_id)
+        .distinct()
+        .join_from(WorkoutExercise, Workout, WorkoutExercise.workout_id == Workout.id)
+        .where(or_(*conditions))
+    )
+    return {tuple(row) for row in connection.execute(query)}
+
+
+def lock_exercises(connection, exercise_ids):
+    """
+    Serialize rollup refreshes per exercise until the transaction ends.
+
+    Rollups are shared by every workout, so two transactions can refresh
+    the same (date, exercise_id) at once: on PostgreSQL both would DELETE
+    and then INSERT it, the second failing on the primary key or writing
+    totals that miss the other's rows. Holding a transaction-level
+    advisory lock per exercise makes the second wait until the first
+    commits; its statements (READ COMMITTED) then see both sets of rows.
+    Locks are taken in id order so that refreshes cannot deadlock.
+    SQLite has a single writer already; nothing is done there.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for exercise_id in sorted(set(exercise_ids)):
+        connection.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK_CLASS, exercise_id)))
+
+
+def refresh(connection, keys):
+    """
+    Recompute the rollup rows for the given (date, exercise_id) keys from
+    the raw data, and the weekly rows that contain them. Keys with no
+    remaining data are removed.
+    """
+    columns = ["exercise_id", *TOTAL_COLUMNS]
+    lock_exercises(connection, (exercise_id for _, exercise_id in keys))
+
+    for chunk in _chunks(keys):
+        connection.execute(
+            delete(DailyRollup).where(
+                tuple_(DailyRollup.day, DailyRollup.exercise_id).in_(chunk)
+            )
+        )
+        connection.execute(
+            insert(DailyRollup).from_select(
+                ["day", *columns],
+                _daily_from_raw().where(
+                    tuple_(Workout.date, WorkoutExercise.exercise_id).in_(chunk)
+                ),
+            )
+        )
+
+    weeks = {(_monday(day), exercise_id) for day, exercise_id in keys}
+    for chunk in _chunks(weeks):
+        first = min(monday for monday, _ in chunk)
+        last = max(monday for monday, _ in chunk) + timedelta(days=6)
+        connection.execute(
+            delete(WeeklyRollup).where(
+                tuple_(WeeklyRollup.week_start, WeeklyRollup.exercise_id).in_(chunk)
+            )
+        )
+        connection.execute(
+            insert(WeeklyRollup).from_select(
+                ["week_start", *columns],
+                _weekly_from_daily()
+                .where(DailyRollup.day.between(first, last))
+                .having(
+                    tuple_(week_start(DailyRollup.day), DailyRollup.exercise_id).in_(
+                        chunk
+                    )
+                ),
+            )
+        )
+
+
+def refresh_for_workouts(connection, workout_ids):
+    """Bring the rollups up to date after rows were added to these workouts."""
+    refresh(connection, affected_keys(connection, workout_ids=workout_ids))
+
+
+def _committed(obj, key):
+    """Value of `key` as currently stored in the database."""
+    history = attributes.get_history(obj, key)
+    return (history.deleted or history.unchanged or [None])[0]
+
+
+def _before_flush(session, flush_context, instances):
+    """
+    Record which rollup keys the pending changes may affect, as seen
+    before the flush (rows about to be deleted or moved).
+    """
+    workout_ids, exercise_ids = set(), set()
+    # Join records whose workout_id is only final after the flush
+    join_records = [obj for obj in session.new if isinstance(obj, WorkoutExercise)]
+
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, WorkoutExercise):
+            if obj in session.deleted or session.is_modified(obj):
+                workout_ids.add(_committed(obj, "workout_id"))
+                join_records.append(obj)
+        elif isinstance(obj, Workout) and obj.id is not None:
+            if (
+                obj in session.deleted
+                or attributes.get_history(obj, "date").has_changes()
+                or attributes.get_history(obj, "workout_exercises").has_changes()
+            ):
+                workout_ids.add(obj.id)
+        elif isinstance(obj, Exercise) and obj in session.deleted:
+            exercise_ids.add(obj.id)
+
+    workout_ids.discard(None)
+    if not (workout_ids or exercise_ids or join_records):
+        return
+
+    keys = affected_keys(session.connection(), workout_ids, exercise_ids)
+    session.info["rollup_pending"] = (keys, workout_ids, join_records)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop("rollup_pending", None)
+    if pending is None:
+        return
+    keys, workout_ids, join_records = pending
+
+    workout_ids = workout_ids | {
+        obj.workout_id
+        for obj in join_records
+        if obj.workout_id is not None and obj not in session.deleted
+    }
+    connection = session.connection()
+    refresh(connection, keys | affected_keys(connection, workout_ids))
+
+
+def _clear_pending(session, previous_transaction=None):
+    session.info.pop("rollup_pending", None)
+
+
+def register_rollup_events():
+    """Keep the rollups in step with ORM flushes on db.session."""
+    for name, listener in (
+        ("before_flush", _before_flush),
+        ("after_flush", _after_flush),
+        ("after_rollback", _clear_pending),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+
+# ---------------------------
+# Rebuild / consistency check
+# ---------------------------
+def rebuild():
+    """Recompute every rollup row from the raw data."""
+    columns = ["exercise_id", *TOTAL_COLUMNS]
+    db.session.execute(delete(WeeklyRollup))
+    db.session.execute(delete(DailyRollup))
+    db.session.execute(insert(DailyRollup).from_select(["day", *columns], _daily_from_raw()))
+    db.session.execute(
+        insert(WeeklyRollup).from_select(["week_start", *columns], _weekly_from_daily())
+    )
+    db.session.commit()
+
+
+def check(sample_size=10):
+    """
+    Compare the rollup tables with totals computed from the raw data.
+    Returns {table: [mismatching rows]} for the tables that differ; a row
+    shows up if it is missing, extra or has different totals.
+    """
+    totals = [getattr(DailyRollup, name) for name in TOTAL_COLUMNS]
+    daily = select(DailyRollup.day, DailyRollup.exercise_id, *totals)
+
+    week = week_start(Workout.date)
+    raw_weekly = (
+        select(week, WorkoutExercise.exercise_id, *_raw_totals())
+        .join_from(WorkoutExercise, Workout, WorkoutExercise.workout_id == Workout.id)
+        .group_by(week, WorkoutExercise.exercise_id)
+    )
+    weekly = select(
+        WeeklyRollup.week_start,
+        WeeklyRollup.exercise_id,
+        *(getattr(WeeklyRollup, name) for name in TOTAL_COLUMNS),
+    )
+
+    problems = {}
+    for table, stored, expected in (
+        ("rollup_daily", daily, _daily_from_raw()),
+        ("rollup_weekly", weekly, raw_weekly),
+    ):
+        rows = []
+        for diff in (except_(stored, expected), except_(expected, stored)):
+            rows += db.session.execute(diff.limit(sample_size)).all()
+        if rows:
+            problems[table] = [tuple(row) for row in rows]
+    return problems
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the training rollup tables.")
+
+
+@rollups_cli.command("rebuild")
+def rebuild_command():
+    """Recompute all rollups from workout_exercises."""
+    rebuild()
+    click.echo(
+        f"Rebuilt {DailyRollup.query.count()} daily and "
+        f"{WeeklyRollup.query.count()} weekly rollup rows."
+    )
+
+
+@rollups_cli.command("check")
+def check_command():
+    """Verify the rollups against the raw data."""
+    problems = check()
+    if not problems:
+        click.echo("Rollups are consistent.")
+        return
+    for table, rows in problems.items():
+        click.echo(f"{table}: mismatching rows (sample): {rows}", err=True)
+    raise SystemExit(1)
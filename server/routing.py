@@ -0,0 +1,89 @@
+# server/routing.py
+
+import itertools
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+
+PRIMARY = "primary"
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+STICKY_COOKIE = "db_primary"
+
+
+def replica_bind_key(index):
+    return f"replica_{index}"
+
+
+class RoutingSession(Session):
+    """
+    db.session class that runs the queries of read-only requests on the
+    replica picked for the request (see route_request), and everything
+    else - writes, flushes, CLI commands - on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and has_request_context()
+            and g.get("db_route", PRIMARY) != PRIMARY
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            return self._db.engines[g.db_route]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+def route_request():
+    """
+    Pick the engine for this request: the next replica for read-only
+    requests, unless the client wrote recently (sticky cookie set by
+    _stick_to_primary); the primary otherwise.
+    """
+    replicas = current_app.extensions["db_replicas"]
+    if (
+        replicas
+        and request.method in READ_ONLY_METHODS
+        and STICKY_COOKIE not in request.cookies
+    ):
+        g.db_route = next(replicas)
+    else:
+        g.db_route = PRIMARY
+
+
+def _stick_to_primary(response):
+    """After a write, read from the primary for DATABASE_REPLICA_STICKY_SECONDS."""
+    seconds = current_app.config["DATABASE_REPLICA_STICKY_SECONDS"]
+    if (
+        current_app.extensions["db_replicas"]
+        and seconds
+        and request.method not in READ_ONLY_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(STICKY_COOKIE, "1", max_age=seconds, httponly=True)
+    return response
+
+
+def replica_urls(config):
+    """db.engines keys (replica_0, replica_1, ...) -> DATABASE_REPLICA_URLS."""
+    return {
+        replica_bind_key(index): url
+        for index, url in enumerate(config.get("DATABASE_REPLICA_URLS") or [])
+    }
+
+
+def init_routing(app):
+    """
+    Route each request of `app` with route_request(). The replica engines
+    themselves are created by init_database (see replica_urls).
+    """
+    app.config.setdefault("DATABASE_REPLICA_URLS", [])
+    app.config.setdefault("DATABASE_REPLICA_STICKY_SECONDS", 5)
+
+    keys = list(replica_urls(app.config))
+    # Round-robin over the replicas
+    app.extensions["db_replicas"] = itertools.cycle(keys) if keys else None
+
+    app.before_request(route_request)
+    app.after_request(_stick_to_primary)
@@ -2,7 +2,33 @@
 
 from marshmallow import Schema, fields, validate, validates_schema, ValidationError
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
-from .models import Exercise, Workout, WorkoutExercise, db
+from sqlalchemy.orm import selectinload
+from .models import Exercise, Workout, WorkoutExercise
+from .pagination import Cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+MAX_BULK_DELETE_IDS = 10000
+MAX_SYNC_EXERCISES = 10000
+MAX_WORKOUT_EXERCISES = 1000
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SEARCH_TYPES = ("exercises", "workouts")
+
+
+# Validation is split in two, and each request runs only one of them:
+# - these schemas check API input and load it as plain dicts, which the
+#   write routes insert with Core statements (no model instances, and no
+#   session lookups by id, which is dump-only);
+# - the model @validates hooks guard instances built in code (seed data,
+#   scripts, tests).
+# Both enforce the same rules.
+
+
+class Trimmed(fields.String):
+    """A string without surrounding whitespace, as the model validators store it."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        return super()._deserialize(value, attr, data, **kwargs).strip()
 
 
 # ---------------------------
@@ -12,12 +38,28 @@ class ExerciseSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Exercise
         include_fk = True
-        load_instance = True
-        sqla_session = db.session
+        dump_only = ("id",)
 
     # Extra schema-level validation
-    name = fields.String(required=True, validate=validate.Length(min=3))
-    category = fields.String(required=True)
+    name = Trimmed(required=True, validate=validate.Length(min=3))
+    category = Trimmed(required=True, validate=validate.Length(min=1))
+
+    @validates_schema(pass_many=True)
+    def validate_unique_names(self, data, many, **kwargs):
+        # Names of a list are upserted together, see server/catalog.py
+        if not many:
+            return
+        seen = set()
+        errors = {}
+        for index, item in enumerate(data):
+            if item["name"] in seen:
+                errors[index] = {"name": ["Duplicate name in the request."]}
+            seen.add(item["name"])
+        if errors:
+            raise ValidationError(errors)
+
+
+_exercise_list_schema = ExerciseSchema(many=True)
 
 
 # ---------------------------
@@ -27,22 +69,31 @@ class WorkoutExerciseSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = WorkoutExercise
         include_fk = True
-        load_instance = True
-        sqla_session = db.session
+        dump_only = ("id",)
 
-    reps = fields.Integer(allow_none=True)
-    sets = fields.Integer(allow_none=True)
-    duration_seconds = fields.Integer(allow_none=True)
+    # Mirror the model @validates rules so bad values are reported as
+    # validation errors even on paths that never build a model instance
+    reps = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    sets = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    duration_seconds = fields.Integer(allow_none=True, validate=validate.Range(min=1))
 
-    @validates_schema
-    def validate_at_least_one_field(self, data, **kwargs):
+    # Not skipped on field errors: marshmallow tracks those across a whole
+    # many=True batch, so skipping would hide this error for valid items.
+    # The raw input is checked so an out-of-range value is reported once,
+    # as a field error, rather than twice.
+    @validates_schema(pass_original=True, skip_on_field_errors=False)
+    def validate_at_least_one_field(self, data, original_data, **kwargs):
         """
         WorkoutExercise must have at least one of:
         - reps
         - sets
         - duration_seconds
         """
-        if not any([data.get("reps"), data.get("sets"), data.get("duration_seconds")]):
+        if not isinstance(original_data, dict):
+            return
+        if not any(
+            original_data.get(key) for key in ("reps", "sets", "duration_seconds")
+        ):
             raise ValidationError(
                 "WorkoutExercise requires reps, sets, or duration_seconds."
             )
@@ -55,13 +106,142 @@ class WorkoutSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Workout
         include_fk = True
-        load_instance = True
-        sqla_session = db.session
+        dump_only = ("id",)
 
     # Nested relationship (READ ONLY)
     workout_exercises = fields.List(
         fields.Nested(WorkoutExerciseSchema), dump_only=True
     )
-    exercises = fields.List(fields.Nested(ExerciseSchema), dump_only=True)
+    # Derived from workout_exercises instead of the `secondary` relationship,
+    # so eager-loading workout_exercises (see workout_load_options) is enough
+    # to dump a workout without further queries.
+    exercises = fields.Method("get_exercises", dump_only=True)
+
+    def get_exercises(self, workout):
+        unique = {}
+        for join_record in workout.workout_exercises:
+            unique.setdefault(join_record.exercise_id, join_record.exercise)
+        return _exercise_list_schema.dump(unique.values())
 
     duration_minutes = fields.Integer(required=True, validate=validate.Range(min=1))
+
+
+# Nested lists of WorkoutSchema (?expand=), and its column fields (?fields=)
+WORKOUT_EXPANSIONS = ("workout_exercises", "exercises")
+WORKOUT_FIELDS = tuple(
+    name for name in WorkoutSchema().dump_fields if name not in WORKOUT_EXPANSIONS
+)
+
+
+def workout_load_options():
+    """
+    Loader options that fetch everything WorkoutSchema dumps up front:
+    one SELECT ... IN for the join rows (with their exercises joined in),
+    however many workouts are being dumped.
+    """
+    return (
+        selectinload(Workout.workout_exercises).joinedload(WorkoutExercise.exercise),
+    )
+
+
+# ---------------------------
+# Query parameter schemas
+# ---------------------------
+class CommaSeparated(fields.Field):
+    """A comma-separated list (?name=a,b) as a tuple; empty if the value is empty."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str):
+            raise ValidationError("Not a valid string.")
+        return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class WorkoutFieldsSchema(Schema):
+    """
+    ?fields= (workout columns) and ?expand= (nested lists) of the workout
+    reads; see server.serializers.workout_dump for the defaults.
+    """
+
+    # An empty ?fields= would dump empty objects: name at least one
+    field_names = CommaSeparated(
+        data_key="fields",
+        validate=[validate.Length(min=1), validate.ContainsOnly(WORKOUT_FIELDS)],
+    )
+    expand = CommaSeparated(validate=validate.ContainsOnly(WORKOUT_EXPANSIONS))
+
+
+class DateRangeSchema(Schema):
+    """Optional inclusive date range (?date_from=&date_to=)."""
+
+    date_from = fields.Date()
+    date_to = fields.Date()
+
+    @validates_schema
+    def validate_date_range(self, data, **kwargs):
+        if (
+            "date_from" in data
+            and "date_to" in data
+            and data["date_from"] > data["date_to"]
+        ):
+            raise ValidationError("date_from must not be after date_to.")
+
+
+class StreamQuerySchema(Schema):
+    """?stream= of the list reads: NDJSON instead of a JSON list."""
+
+    stream = fields.Boolean()
+
+
+class WorkoutQuerySchema(DateRangeSchema, WorkoutFieldsSchema, StreamQuerySchema):
+    """Query string accepted by GET /workouts (pagination + filters)."""
+
+    limit = fields.Integer(
+        load_default=DEFAULT_PAGE_SIZE,
+        validate=validate.Range(min=1, max=MAX_PAGE_SIZE),
+    )
+    after = Cursor()
+    min_duration = fields.Integer(validate=validate.Range(min=1))
+    max_duration = fields.Integer(validate=validate.Range(min=1))
+
+    @validates_schema
+    def validate_duration_range(self, data, **kwargs):
+        if (
+            "min_duration" in data
+            and "max_duration" in data
+            and data["min_duration"] > data["max_duration"]
+        ):
+            raise ValidationError("min_duration must not exceed max_duration.")
+
+
+class SearchQuerySchema(Schema):
+    """Query string accepted by GET /search."""
+
+    q = fields.String(required=True, validate=validate.Length(min=1, max=200))
+    type = CommaSeparated(validate=validate.ContainsOnly(SEARCH_TYPES))
+    limit = fields.Integer(
+        load_default=DEFAULT_SEARCH_LIMIT,
+        validate=validate.Range(min=1, max=MAX_SEARCH_LIMIT),
+    )
+
+
+class TypeaheadQuerySchema(Schema):
+    """Query string accepted by GET /search/exercises."""
+
+    prefix = fields.String(required=True, validate=validate.Length(min=1, max=100))
+    limit = fields.Integer(
+        load_default=10, validate=validate.Range(min=1, max=MAX_SEARCH_LIMIT)
+    )
+
+
+class WorkoutBulkDeleteSchema(DateRangeSchema):
+    """Body of DELETE /workouts: ids and/or a date range (combined with AND)."""
+
+    ids = fields.List(
+        fields.Integer(), validate=validate.Length(min=1, max=MAX_BULK_DELETE_IDS)
+    )
+
+    @validates_schema
+    def validate_has_criteria(self, data, **kwargs):
+        # Never let an empty body delete every workout
+        if not data:
+            raise ValidationError("Provide ids and/or date_from/date_to.")
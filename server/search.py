@@ -0,0 +1,191 @@
+# server/search.py
+
+import re
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import column, event, func, or_, select, table, text
+
+from .models import db, Exercise, Workout
+from .schemas import SEARCH_TYPES
+from .serializers import dump_exercises, exercise_serializer, workout_dump
+
+
+# ---------------------------
+# Full-text index (SQLite FTS5)
+# ---------------------------
+# Indexed table -> (FTS5 table, indexed text columns). The FTS tables are
+# external-content: they store only the index, the text stays in the
+# indexed table and triggers keep the two in step. The migration
+# (b8e3d52f0a61) creates the same objects in existing databases.
+FTS_TABLES = {
+    Exercise.__tablename__: ("exercises_fts", ("name", "category")),
+    Workout.__tablename__: ("workouts_fts", ("notes",)),
+}
+
+
+def fts_ddl(source):
+    """CREATE statements of the FTS table of `source` and its sync triggers."""
+    fts, columns = FTS_TABLES[source]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{name}" for name in columns)
+    old = ", ".join(f"old.{name}" for name in columns)
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    )
+    return [
+        # prefix='2 3': short "ab*" prefixes are looked up, not scanned
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {source} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {source} "
+        f"BEGIN {delete_old} END",
+        # Only when indexed text changes, not on every duration edit
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} "
+        f"ON {source} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _create_fts(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        for statement in fts_ddl(target.name):
+            connection.exec_driver_sql(statement)
+
+
+def _drop_fts(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        # Dropping the table drops its triggers, not the FTS table
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLES[target.name][0]}")
+
+
+def register_search_events():
+    """Create (and drop) the FTS tables along with the tables they index."""
+    for source in FTS_TABLES:
+        target = db.metadata.tables[source]
+        for name, listener in (("after_create", _create_fts), ("before_drop", _drop_fts)):
+            if not event.contains(target, name, listener):
+                event.listen(target, name, listener)
+
+
+def rebuild():
+    """Reindex the FTS tables from the tables they index."""
+    for fts, _ in FTS_TABLES.values():
+        db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+# ---------------------------
+# Queries
+# ---------------------------
+_WORD = re.compile(r"\w+")
+
+
+def _is_sqlite():
+    return db.session.get_bind().dialect.name == "sqlite"
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for text typed by a user: all of its words,
+    the last one as a prefix (it may still be being typed). Quoting each
+    word keeps FTS5 operators and column filters in the text literal.
+    None if the text has no words.
+    """
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def _fts_ranked(model, columns, query, limit):
+    """SELECT of `columns` of the `model` rows matching `query`, best first."""
+    fts = table(FTS_TABLES[model.__tablename__][0], column("rowid"), column("rank"))
+    return (
+        select(*columns)
+        .join(fts, fts.c.rowid == model.id)
+        # The hidden column named after the table matches on all columns
+        .where(column(fts.name).match(match_expression(query)))
+        .order_by(fts.c.rank, model.id)
+        .limit(limit)
+    )
+
+
+def _contains_all(model, columns, text_columns, query, limit):
+    """Portable fallback: rows containing every word, in id order (no ranking)."""
+    conditions = [
+        or_(*(c.icontains(word, autoescape=True) for c in text_columns))
+        for word in _WORD.findall(query)
+    ]
+    return select(*columns).where(*conditions).order_by(model.id).limit(limit)
+
+
+def search(query, limit, types=SEARCH_TYPES):
+    """
+    {"exercises": [...], "workouts": [...]} matching `query`, at most
+    `limit` of each, best match first (FTS5 bm25 rank on SQLite). Only
+    the `types` asked for are searched; workouts come without their
+    nested lists.
+    """
+    results = {name: [] for name in types}
+    if match_expression(query) is None:
+        return results
+
+    dumper = workout_dump(expand=())
+    searches = {
+        "exercises": (Exercise, exercise_serializer.columns, dump_exercises),
+        "workouts": (Workout, dumper.columns, dumper.dump),
+    }
+    for name in types:
+        model, columns, dump = searches[name]
+        if _is_sqlite():
+            statement = _fts_ranked(model, columns, query, limit)
+        else:
+            text_columns = [model.__table__.c[c] for c in FTS_TABLES[model.__tablename__][1]]
+            statement = _contains_all(model, columns, text_columns, query, limit)
+        results[name] = dump(db.session.execute(statement).all())
+    return results
+
+
+def escape_like(text):
+    """`text` with the LIKE wildcards escaped by backslashes."""
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+def exercises_by_prefix(prefix, limit):
+    """
+    Exercises whose name starts with `prefix`, ignoring case, in name
+    order. On SQLite, LIKE is case-insensitive (for ASCII) and a
+    'prefix%' pattern is a range search of ix_exercises_name_nocase.
+    """
+    pattern = escape_like(prefix) + "%"
+    if _is_sqlite():
+        condition = Exercise.name.like(pattern, escape="\\")
+        order = Exercise.name.collate("NOCASE")
+    else:
+        condition = Exercise.name.ilike(pattern, escape="\\")
+        order = func.lower(Exercise.name)
+    statement = (
+        select(*exercise_serializer.columns)
+        .where(condition)
+        .order_by(order, Exercise.id)
+        .limit(limit)
+    )
+    return dump_exercises(db.session.execute(statement))
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+search_cli = AppGroup("search", help="Maintain the full-text search index.")
+
+
+@search_cli.command("rebuild")
+def rebuild_command():
+    """Reindex exercises and workouts (SQLite FTS5)."""
+    if not _is_sqlite():
+        raise click.ClickException("The search index is only kept on SQLite.")
+    rebuild()
+    click.echo("Rebuilt the search index.")
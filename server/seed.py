@@ -1,15 +1,20 @@
 # server/seed.py
 
 from datetime import date
+from flask import current_app, has_app_context
 from .app import app
-from .models import db, Exercise, Workout, WorkoutExercise
+from .models import db, DailyRollup, Exercise, WeeklyRollup, Workout, WorkoutExercise
+from .rollups import rebuild as rebuild_rollups
 
 
 def seed_data():
     print("Seeding database...")
 
-    with app.app_context():
-        # Clear tables in order (junction table first)
+    # Seed the app of the current context if there is one (e.g. tests)
+    with (current_app if has_app_context() else app).app_context():
+        # Clear tables in order (rollups and junction table first)
+        WeeklyRollup.query.delete()
+        DailyRollup.query.delete()
         WorkoutExercise.query.delete()
         Workout.query.delete()
         Exercise.query.delete()
@@ -56,6 +61,9 @@ def seed_data():
         db.session.add_all(join_records)
         db.session.commit()
 
+        # The bulk deletes above skip the incremental rollup updates
+        rebuild_rollups()
+
         print("Seed complete.")
 
 
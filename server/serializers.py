@@ -0,0 +1,225 @@
+# server/serializers.py
+
+from functools import lru_cache
+
+from marshmallow import fields
+from sqlalchemy import select
+
+from .models import Exercise, Workout, WorkoutExercise
+from .schemas import (
+    WORKOUT_EXPANSIONS,
+    WORKOUT_FIELDS,
+    ExerciseSchema,
+    WorkoutExerciseSchema,
+    WorkoutSchema,
+)
+
+
+# ---------------------------
+# Compiled row serializers
+# ---------------------------
+# Field type -> (python type the value may already have, expression that
+# converts the value {v} as the field's _serialize() would)
+_CONVERSIONS = {
+    fields.Integer: (int, "int({v})"),
+    fields.String: (str, "str({v})"),
+    fields.Boolean: (bool, "bool({v})"),
+    fields.Date: (None, "{v}.isoformat()"),
+    fields.DateTime: (None, "{v}.isoformat()"),
+}
+
+
+def _conversion(field, column):
+    """
+    Expression template converting a non-null value of `column` for
+    `field`, or None if the field has options that only its own
+    _serialize() handles.
+    """
+    if type(field) not in _CONVERSIONS:
+        return None
+    if isinstance(field, fields.Number) and field.as_string:
+        return None
+    if isinstance(field, fields.DateTime) and field.format not in (None, "iso", "iso8601"):
+        return None
+
+    python_type, expression = _CONVERSIONS[type(field)]
+    try:
+        already = column.type.python_type is python_type
+    except NotImplementedError:
+        already = False
+    return "{v}" if already else expression
+
+
+class RowSerializer:
+    """
+    Dumps Core rows as `schema` dumps model instances, for the schema's
+    column fields (nested and method fields are left to the caller), or
+    those of them named in `only`.
+
+    The conversion of each field is generated once, as the source of a
+    single function; `columns` are the table columns to select for it.
+    For the stock field types the generated code is what their
+    _serialize() does for database values, so the output is the same.
+    """
+
+    def __init__(self, schema, table, only=None):
+        self.fields = [
+            (name, field)
+            for name, field in schema.dump_fields.items()
+            if (field.attribute or name) in table.c and (only is None or name in only)
+        ]
+        self.columns = [table.c[field.attribute or name] for name, field in self.fields]
+        self._functions = {}
+
+    def function(self, start=0):
+        """
+        The compiled row -> dict function, reading the columns from
+        position `start` of the row onwards.
+        """
+        if start not in self._functions:
+            self._functions[start] = self._compile(start)
+        return self._functions[start]
+
+    def __call__(self, row):
+        return self.function()(row)
+
+    def _compile(self, start):
+        namespace = {}
+        lines = ["def dump(row):"]
+        items = []
+        for index, ((name, field), column) in enumerate(zip(self.fields, self.columns)):
+            value = f"v{index}"
+            lines.append(f"    {value} = row[{start + index}]")
+            template = _conversion(field, column)
+            if template is None:
+                namespace[f"field_{index}"] = field._serialize
+                expression = f"field_{index}({value}, {name!r}, None)"
+            else:
+                expression = template.format(v=value)
+                if column.nullable and expression != value:
+                    expression = f"None if {value} is None else {expression}"
+            items.append(f"{field.data_key or name!r}: {expression}")
+        lines.append("    return {" + ", ".join(items) + "}")
+
+        exec(compile("\n".join(lines), f"<{type(self).__name__}>", "exec"), namespace)
+        return namespace["dump"]
+
+
+exercise_serializer = RowSerializer(ExerciseSchema(), Exercise.__table__)
+workout_exercise_serializer = RowSerializer(
+    WorkoutExerciseSchema(), WorkoutExercise.__table__
+)
+workout_serializer = RowSerializer(WorkoutSchema(), Workout.__table__)
+
+
+# ---------------------------
+# Workouts
+# ---------------------------
+class WorkoutDump:
+    """
+    The queries and dump of workouts limited to the column `fields` and
+    the `expand`ed nested lists: only those columns are selected, and
+    the join rows (or their exercises) are not read unless asked for.
+    The output is that of WorkoutSchema(only=fields + expand).dump().
+    """
+
+    def __init__(self, fields=WORKOUT_FIELDS, expand=WORKOUT_EXPANSIONS):
+        self.expand = expand
+        self.serializer = RowSerializer(WorkoutSchema(), Workout.__table__, only=fields)
+        # Keyset pagination and the join rows need these, asked for or not
+        self.columns = self.serializer.columns + [
+            Workout.__table__.c[name] for name in ("id", "date") if name not in fields
+        ]
+
+        if "workout_exercises" in expand:
+            join_columns = workout_exercise_serializer.columns
+        else:
+            join_columns = [WorkoutExercise.workout_id, WorkoutExercise.exercise_id]
+        self.detail_columns = list(join_columns)
+        if "exercises" in expand:
+            self.detail_columns += exercise_serializer.columns
+        self._exercise_start = len(join_columns)
+
+    def select(self):
+        """SELECT of the workout columns; filter and order it as needed."""
+        return select(*self.columns)
+
+    def details_select(self, rows):
+        """
+        SELECT of what `expand` needs of the join rows of the workout
+        `rows`, in the order of Workout.workout_exercises; None if there
+        is nothing to read.
+        """
+        ids = [row.id for row in rows]
+        if not ids or not self.expand:
+            return None
+        statement = (
+            select(*self.detail_columns)
+            .where(WorkoutExercise.workout_id.in_(ids))
+            .order_by(WorkoutExercise.id)
+        )
+        if "exercises" in self.expand:
+            statement = statement.join(Exercise, Exercise.id == WorkoutExercise.exercise_id)
+        return statement
+
+    def dump(self, rows, detail_rows=()):
+        """Dump the workout `rows` with their `detail_rows` (see details_select)."""
+        dump_workout = self.serializer.function()
+        workouts = []
+        by_id = {}
+        for row in rows:
+            workout = dump_workout(row)
+            for name in self.expand:
+                workout[name] = []
+            workouts.append(workout)
+            by_id[row.id] = (workout, set())
+        if not self.expand:
+            return workouts
+
+        dump_join = None
+        if "workout_exercises" in self.expand:
+            dump_join = workout_exercise_serializer.function()
+        dump_exercise = None
+        if "exercises" in self.expand:
+            dump_exercise = exercise_serializer.function(self._exercise_start)
+
+        exercises = {}
+        for row in detail_rows:
+            workout, seen = by_id[row.workout_id]
+            if dump_join:
+                workout["workout_exercises"].append(dump_join(row))
+            # WorkoutSchema.get_exercises: each exercise once, in join row order
+            if dump_exercise and row.exercise_id not in seen:
+                seen.add(row.exercise_id)
+                if row.exercise_id not in exercises:
+                    exercises[row.exercise_id] = dump_exercise(row)
+                workout["exercises"].append(exercises[row.exercise_id])
+        return workouts
+
+
+@lru_cache(maxsize=None)
+def _workout_dump(fields, expand):
+    return WorkoutDump(fields, expand)
+
+
+def workout_dump(fields=None, expand=None):
+    """
+    The (shared) WorkoutDump for a request's ?fields= and ?expand=. By
+    default every field and nested list is included; once `fields` is
+    given, only the nested lists named in `expand` are.
+    """
+    if expand is None:
+        expand = WORKOUT_EXPANSIONS if fields is None else ()
+    if fields is None:
+        fields = WORKOUT_FIELDS
+    # Canonical order, so each combination is compiled once
+    return _workout_dump(
+        tuple(name for name in WORKOUT_FIELDS if name in fields),
+        tuple(name for name in WORKOUT_EXPANSIONS if name in expand),
+    )
+
+
+def dump_exercises(rows):
+    """ExerciseSchema(many=True).dump() of `rows` of exercise_serializer.columns."""
+    dump = exercise_serializer.function()
+    return [dump(row) for row in rows]
@@ -0,0 +1,159 @@
+# server/stats.py
+
+from sqlalchemy import Date, distinct, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from .models import db, DailyRollup, Exercise, WeeklyRollup, Workout, WorkoutExercise
+
+
+class week_start(FunctionElement):
+    """Monday of the ISO week containing a date column."""
+
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(week_start)
+def _week_start_default(element, compiler, **kw):
+    return "CAST(date_trunc('week', %s) AS DATE)" % compiler.process(
+        element.clauses, **kw
+    )
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    # Step back 6 days, then forward to the next Monday (or stay on it)
+    return "date(%s, '-6 days', 'weekday 1')" % compiler.process(element.clauses, **kw)
+
+
+def _totals():
+    """Aggregates over WorkoutExercise rows shared by every breakdown."""
+    return (
+        func.count(WorkoutExercise.id).label("entries"),
+        func.count(distinct(WorkoutExercise.workout_id)).label("workout_count"),
+        func.coalesce(func.sum(WorkoutExercise.sets), 0).label("total_sets"),
+        func.coalesce(func.sum(WorkoutExercise.reps), 0).label("total_reps"),
+        func.coalesce(func.sum(WorkoutExercise.sets * WorkoutExercise.reps), 0).label(
+            "total_volume"
+        ),
+        func.coalesce(func.sum(WorkoutExercise.duration_seconds), 0).label(
+            "total_duration_seconds"
+        ),
+    )
+
+
+def _in_range(query, params):
+    if "date_from" in params:
+        query = query.where(Workout.date >= params["date_from"])
+    if "date_to" in params:
+        query = query.where(Workout.date <= params["date_to"])
+    return query
+
+
+def exercise_totals(params):
+    """Totals per exercise for workouts in the date range."""
+    query = (
+        select(Exercise.id.label("exercise_id"), Exercise.name, Exercise.category, *_totals())
+        .join(WorkoutExercise, WorkoutExercise.exercise_id == Exercise.id)
+        .join(Workout, Workout.id == WorkoutExercise.workout_id)
+        .group_by(Exercise.id, Exercise.name, Exercise.category)
+        .order_by(Exercise.name)
+    )
+    return [dict(row._mapping) for row in db.session.execute(_in_range(query, params))]
+
+
+def category_totals(params):
+    """Totals per exercise category for workouts in the date range."""
+    query = (
+        select(Exercise.category, *_totals())
+        .join(WorkoutExercise, WorkoutExercise.exercise_id == Exercise.id)
+        .join(Workout, Workout.id == WorkoutExercise.workout_id)
+        .group_by(Exercise.category)
+        .order_by(Exercise.category)
+    )
+    return [dict(row._mapping) for row in db.session.execute(_in_range(query, params))]
+
+
+def weekly_totals(params):
+    """
+    Totals per ISO week. Workout-level figures (count, minutes) and
+    exercise-level figures are grouped in separate queries so joining
+    the exercise rows does not count a workout's minutes more than once.
+    """
+    week = week_start(Workout.date).label("week_start")
+
+    workouts = _in_range(
+        select(
+            week,
+            func.count(Workout.id).label("workout_count"),
+            func.sum(Workout.duration_minutes).label("total_duration_minutes"),
+        ).group_by(week),
+        params,
+    )
+    exercises = _in_range(
+        select(week, *_totals()[2:])
+        .join(WorkoutExercise, WorkoutExercise.workout_id == Workout.id)
+        .group_by(week),
+        params,
+    )
+
+    empty = {
+        "total_sets": 0,
+        "total_reps": 0,
+        "total_volume": 0,
+        "total_duration_seconds": 0,
+    }
+    weeks = {}
+    for row in db.session.execute(workouts):
+        iso_year, iso_week, _ = row.week_start.isocalendar()
+        weeks[row.week_start] = {
+            "week": f"{iso_year}-W{iso_week:02d}",
+            "week_start": row.week_start.isoformat(),
+            "workout_count": row.workout_count,
+            "total_duration_minutes": row.total_duration_minutes,
+            **empty,
+        }
+    for row in db.session.execute(exercises):
+        weeks[row.week_start].update(
+            {key: value for key, value in row._mapping.items() if key in empty}
+        )
+    return [weeks[key] for key in sorted(weeks)]
+
+
+def _rollup_rows(date_column, model, params):
+    query = (
+        select(
+            date_column,
+            model.exercise_id,
+            Exercise.name,
+            model.entries,
+            model.total_sets,
+            model.total_reps,
+            model.total_volume,
+            model.total_duration_seconds,
+        )
+        .join(Exercise, Exercise.id == model.exercise_id)
+        .order_by(date_column, Exercise.name)
+    )
+    if "date_from" in params:
+        query = query.where(date_column >= params["date_from"])
+    if "date_to" in params:
+        query = query.where(date_column <= params["date_to"])
+
+    rows = []
+    for row in db.session.execute(query):
+        row = dict(row._mapping)
+        row[date_column.key] = row[date_column.key].isoformat()
+        rows.append(row)
+    return rows
+
+
+def daily_exercise_totals(params):
+    """Per-day, per-exercise totals read from the rollup_daily table."""
+    return _rollup_rows(DailyRollup.day, DailyRollup, params)
+
+
+def weekly_exercise_totals(params):
+    """Per-week, per-exercise totals read from the rollup_weekly table."""
+    return _rollup_rows(WeeklyRollup.week_start, WeeklyRollup, params)
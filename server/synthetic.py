@@ -0,0 +1,132 @@
+# server/synthetic.py
+
+import random
+from datetime import date, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+
+from .models import db, Exercise, Workout, WorkoutExercise
+from .rollups import refresh_for_workouts
+
+
+CATEGORIES = ["Strength", "Cardio", "Mobility", "Plyometrics", "Core"]
+NOTES = [None, "Leg day", "Upper body", "Intervals", "Recovery", "Long run"]
+START_DATE = date(2015, 1, 1)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_dataset(
+    n_workouts, n_exercises, joins_per_workout, seed=0, batch_size=5000
+):
+    """
+    Insert a reproducible synthetic dataset: `n_exercises` exercises,
+    `n_workouts` workouts spread over the days since START_DATE and
+    `joins_per_workout` WorkoutExercise rows for each workout.
+
+    The same arguments and seed always produce the same rows. Returns a
+    dict with the number of rows written per table.
+    """
+    # Independent streams so the rows do not depend on batch_size, which
+    # changes how workout and join-row generation interleave
+    exercise_rng = random.Random(f"{seed}:exercises")
+    workout_rng = random.Random(f"{seed}:workouts")
+    join_rng = random.Random(f"{seed}:workout_exercises")
+
+    # Prefix with the seed so several datasets can coexist in one database
+    exercises = [
+        {
+            "name": f"Synthetic {seed}-{i:07d}",
+            "category": exercise_rng.choice(CATEGORIES),
+            "equipment_needed": exercise_rng.random() < 0.5,
+        }
+        for i in range(n_exercises)
+    ]
+    exercise_ids = []
+    for batch in _batches(exercises, batch_size):
+        exercise_ids += db.session.scalars(
+            insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True),
+            batch,
+        ).all()
+        db.session.commit()
+    cardio = {
+        exercise_id
+        for exercise_id, row in zip(exercise_ids, exercises)
+        if row["category"] == "Cardio"
+    }
+
+    def workouts():
+        span = max(n_workouts // 2, 1)
+        for _ in range(n_workouts):
+            yield {
+                "date": START_DATE + timedelta(days=workout_rng.randrange(span)),
+                "duration_minutes": workout_rng.randint(10, 120),
+                "notes": workout_rng.choice(NOTES),
+            }
+
+    def join_row(workout_id):
+        exercise_id = join_rng.choice(exercise_ids)
+        if exercise_id in cardio:
+            return {
+                "workout_id": workout_id,
+                "exercise_id": exercise_id,
+                "reps": None,
+                "sets": None,
+                "duration_seconds": join_rng.randint(60, 3600),
+            }
+        return {
+            "workout_id": workout_id,
+            "exercise_id": exercise_id,
+            "reps": join_rng.randint(1, 20),
+            "sets": join_rng.randint(1, 6),
+            "duration_seconds": None,
+        }
+
+    n_joins = 0
+    for batch in _batches(workouts(), batch_size):
+        workout_ids = db.session.scalars(
+            insert(Workout).returning(Workout.id, sort_by_parameter_order=True), batch
+        ).all()
+        if exercise_ids and joins_per_workout:
+            join_rows = [
+                join_row(workout_id)
+                for workout_id in workout_ids
+                for _ in range(joins_per_workout)
+            ]
+            db.session.execute(insert(WorkoutExercise), join_rows)
+            refresh_for_workouts(db.session.connection(), workout_ids)
+            n_joins += len(join_rows)
+        db.session.commit()
+
+    return {
+        "exercises": n_exercises,
+        "workouts": n_workouts,
+        "workout_exercises": n_joins,
+    }
+
+
+@click.command("generate")
+@click.option("--workouts", "n_workouts", default=10000, show_default=True)
+@click.option("--exercises", "n_exercises", default=200, show_default=True)
+@click.option("--per-workout", "joins_per_workout", default=5, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@with_appcontext
+def generate_command(n_workouts, n_exercises, joins_per_workout, seed):
+    """Fill the database with a reproducible synthetic dataset."""
+    counts = generate_dataset(n_workouts, n_exercises, joins_per_workout, seed)
+    click.echo(
+        "Generated "
+        + ", ".join(f"{count} {table}" for table, count in counts.items())
+        + "."
+    )
@@ -0,0 +1,234 @@
+# server/versions.py
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event, select
+
+from .database import insert_on_conflict
+from .models import db, Exercise, TableVersion, Workout, WorkoutExercise
+
+
+# Tables whose writes are counted, and the tables a delete from them also
+# changes through ON DELETE CASCADE
+TRACKED_TABLES = {
+    Exercise.__tablename__: (WorkoutExercise.__tablename__,),
+    Workout.__tablename__: (WorkoutExercise.__tablename__,),
+    WorkoutExercise.__tablename__: (),
+}
+
+
+def _utcnow():
+    # Stored naive, as SQLite has no time zones; always UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ---------------------------
+# Counting writes
+# ---------------------------
+def bump(connection, tables):
+    """
+    Increment the change counters of `tables` in the current transaction.
+
+    One INSERT ... ON CONFLICT DO UPDATE over the sorted tables: the first
+    write to a table creates its counter even when another transaction
+    does the same, and concurrent commits lock the counters in one order.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    now = _utcnow()
+    statement = insert_on_conflict(connection, TableVersion).values(
+        [{"table_name": name, "version": 1, "updated_at": now} for name in tables]
+    )
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TableVersion.table_name],
+            set_={
+                "version": TableVersion.version + 1,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    )
+
+
+def _record(session, tables):
+    if not tables:
+        return
+    # Bumped once at commit (see _before_commit), and read by the
+    # after_commit listeners (see server/cache.py)
+    session.info.setdefault("changed_tables", set()).update(tables)
+
+
+def _written_tables(table_name, deleted):
+    if table_name not in TRACKED_TABLES:
+        return set()
+    return {table_name, *(TRACKED_TABLES[table_name] if deleted else ())}
+
+
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in session.new:
+        tables |= _written_tables(obj.__tablename__, deleted=False)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            tables |= _written_tables(obj.__tablename__, deleted=False)
+    for obj in session.deleted:
+        tables |= _written_tables(obj.__tablename__, deleted=True)
+    _record(session, tables)
+
+
+def _do_orm_execute(orm_execute_state):
+    """Count INSERT/UPDATE/DELETE statements run through the session."""
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    tables = _written_tables(
+        orm_execute_state.statement.table.name, deleted=orm_execute_state.is_delete
+    )
+    _record(orm_execute_state.session, tables)
+
+
+def _before_commit(session):
+    """
+    Bump the counters of the tables written in the transaction, last:
+    the row locks on them are held only for the commit itself.
+    """
+    if session.in_nested_transaction():
+        return
+    # Flush now, as commit() only flushes after before_commit
+    session.flush()
+    tables = session.info.get("changed_tables")
+    if tables:
+        bump(session.connection(), tables)
+
+
+def _discard_changes(session, previous_transaction=None):
+    session.info.pop("changed_tables", None)
+
+
+def register_version_events():
+    """Keep the change counters in step with writes made through db.session."""
+    for name, listener in (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("before_commit", _before_commit),
+        ("after_rollback", _discard_changes),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+
+# ---------------------------
+# Conditional GETs
+# ---------------------------
+# Where current_versions() keeps the counters read for the current request
+VERSIONS_ENVIRON_KEY = "workouts.table_versions"
+
+
+def versions_query(tables):
+    """SELECT of the change counters of `tables`, see current_versions()."""
+    return select(
+        TableVersion.table_name, TableVersion.version, TableVersion.updated_at
+    ).where(TableVersion.table_name.in_(tables))
+
+
+def current_versions(tables):
+    """
+    {table: (version, updated_at)} for the tables written at least once.
+
+    Read once per request, so that the ETag and the response cache key
+    (see server/cache.py) use the same counters. Kept in the WSGI environ
+    rather than on flask.g, which outlives the request when an app
+    context was already pushed (as in the tests).
+    """
+    known = request.environ.setdefault(VERSIONS_ENVIRON_KEY, {})
+    missing = [name for name in tables if name not in known]
+    if missing:
+        rows = db.session.execute(versions_query(missing))
+        found = {row.table_name: (row.version, row.updated_at) for row in rows}
+        known.update((name, found.get(name)) for name in missing)
+    return {name: known[name] for name in tables if known[name] is not None}
+
+
+def validators(tables, versions, accept):
+    """
+    (etag, last_modified) of a response built from `tables` at `versions`
+    (see current_versions) for the given Accept header.
+    """
+    # The Accept header picks the representation (JSON list or NDJSON)
+    key = ";".join(
+        [f"{name}={versions.get(name, (0,))[0]}" for name in tables] + [accept]
+    )
+    etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+    last_modified = max(
+        (updated_at for _, updated_at in versions.values()), default=None
+    )
+    if last_modified is not None:
+        # HTTP dates have whole-second precision
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return etag, last_modified
+
+
+def not_modified(req, etag, last_modified):
+    """True if the conditional headers of `req` match the validators."""
+    # If-Modified-Since is only consulted without If-None-Match (RFC 9110)
+    if req.if_none_match:
+        return req.if_none_match.contains_weak(etag)
+    since = req.if_modified_since
+    return bool(since and last_modified and last_modified <= since)
+
+
+def set_validators(response, etag, last_modified, max_age=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.vary.add("Accept")
+    if max_age is not None:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+
+
+def conditional(*tables, max_age_config=None):
+    """
+    Make a GET view cacheable by clients: its 200 responses get a strong
+    ETag derived from the change counters of `tables` (everything the
+    view reads) and a Last-Modified header, and a matching If-None-Match
+    or If-Modified-Since is answered with 304 before the view runs.
+
+    If `max_age_config` names a config key, its value is sent as
+    `Cache-Control: public, max-age=...`.
+    """
+    tables = sorted(tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = validators(
+                tables, current_versions(tables), request.headers.get("Accept", "")
+            )
+
+            if not_modified(request, etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            set_validators(
+                response,
+                etag,
+                last_modified,
+                current_app.config[max_age_config] if max_age_config else None,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -3,13 +3,14 @@
 import os
 import sys
 import pytest
+from sqlalchemy import event
 
 # Ensure project root is on sys.path so "import server" works
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
-from server.app import app as flask_app
+from server.app import create_app
 from server.models import db
 from server.seed import seed_data
 
@@ -20,9 +21,13 @@ def app():
     Creates a Flask application configured for testing, with an in-memory DB.
     Runs seed_data() once at the beginning of the test session.
     """
-    flask_app.config["TESTING"] = True
-    flask_app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
-    flask_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    flask_app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        }
+    )
 
     with flask_app.app_context():
         db.drop_all()
@@ -49,3 +54,21 @@ def db_session(app):
     with app.app_context():
         yield db.session
         db.session.rollback()
+
+
+@pytest.fixture
+def query_counter(app):
+    """
+    Records every SQL statement sent to the engine while the fixture is
+    active. Use len(query_counter) to get the number of queries issued.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
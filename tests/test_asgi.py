@@ -0,0 +1,157 @@
+# tests/test_asgi.py
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from server.asgi import async_database_url, create_asgi_app
+from server.models import db
+from server.seed import seed_data
+
+
+async def call(app, method, path, headers=(), body=b""):
+    """Drive one request through an ASGI app; returns (status, headers, body)."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = sent[0]
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], response_headers, b"".join(m["body"] for m in sent[1:])
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    asgi_app = create_asgi_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'asgi.db'}",
+        }
+    )
+    with asgi_app.flask_app.app_context():
+        db.create_all()
+        seed_data()
+    return asgi_app
+
+
+def run(asgi_app, scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await asgi_app.engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_async_database_url():
+    config = {"SQLALCHEMY_DATABASE_URI": "sqlite:////data/app.db"}
+    assert str(async_database_url(config)) == "sqlite+aiosqlite:////data/app.db"
+
+    config["SQLALCHEMY_DATABASE_URI"] = "postgresql://db.example/workouts"
+    assert str(async_database_url(config)) == "postgresql+asyncpg://db.example/workouts"
+
+    config["ASYNC_DATABASE_URL"] = "postgresql+psycopg://db.example/workouts"
+    assert async_database_url(config).drivername == "postgresql+psycopg"
+
+
+@pytest.mark.parametrize(
+    "path, headers",
+    [
+        ("/", ()),
+        ("/workouts", ()),
+        ("/workouts?limit=1", ()),
+        ("/workouts?limit=0", ()),
+        ("/workouts/1", ()),
+        ("/workouts/9999", ()),
+        ("/workouts?stream=1", ()),
+        ("/exercises", ()),
+        ("/exercises", (("Accept", "application/x-ndjson"),)),
+        ("/exercises/2", ()),
+        ("/exercises/9999", ()),
+        ("/nowhere", ()),
+    ],
+)
+def test_responses_match_wsgi(asgi_app, path, headers):
+    wsgi = asgi_app.flask_app.test_client().get(path, headers=list(headers))
+
+    status, asgi_headers, body = run(
+        asgi_app, lambda: call(asgi_app, "GET", path, headers)
+    )
+
+    assert status == wsgi.status_code
+    assert body == wsgi.get_data()
+    for name in ("Content-Type", "ETag", "X-Next-Cursor", "Cache-Control"):
+        assert asgi_headers.get(name.lower()) == wsgi.headers.get(name)
+
+
+def test_conditional_get_and_writes_through_flask(asgi_app):
+    async def scenario():
+        status, headers, _ = await call(asgi_app, "GET", "/exercises")
+        etag = headers["etag"]
+
+        status, _, body = await call(
+            asgi_app, "GET", "/exercises", (("If-None-Match", etag),)
+        )
+        assert (status, body) == (304, b"")
+
+        # POST is not an async route: it is served by the Flask app
+        status, _, body = await call(
+            asgi_app,
+            "POST",
+            "/exercises",
+            (("Content-Type", "application/json"),),
+            json.dumps(
+                {"name": "Async Row", "category": "Cardio", "equipment_needed": True}
+            ).encode(),
+        )
+        assert status == 201
+        created = json.loads(body)
+
+        status, headers, body = await call(
+            asgi_app, "GET", "/exercises", (("If-None-Match", etag),)
+        )
+        assert status == 200
+        assert headers["etag"] != etag
+        assert created in json.loads(body)
+
+        status, headers, body = await call(asgi_app, "HEAD", "/exercises")
+        assert (status, body) == (200, b"")
+
+    run(asgi_app, scenario)
+
+
+def test_lifespan_disposes_engine(asgi_app):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
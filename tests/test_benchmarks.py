@@ -0,0 +1,32 @@
+# tests/test_benchmarks.py
+
+import json
+
+import pytest
+
+from benchmarks import encoding, routes
+
+
+# Smoke runs on tiny datasets, so that the benchmarks keep working as the
+# routes and serializers change; the numbers themselves are not checked.
+@pytest.mark.parametrize(
+    "module, argv, columns",
+    [
+        (
+            encoding,
+            ["--workouts", "40", "--exercises", "10", "--page-sizes", "5", "20"],
+            encoding.COLUMNS,
+        ),
+        (
+            routes,
+            ["--workouts", "60", "--exercises", "20", "--memory-samples", "1"],
+            routes.COLUMNS,
+        ),
+    ],
+)
+def test_benchmark_runs(module, argv, columns, tmp_path, capsys):
+    path = tmp_path / "results.json"
+    module.main([*argv, "--iterations", "2", "--json", str(path)])
+    results = json.loads(path.read_text())["results"]
+    assert results
+    assert all(sorted(result) == sorted(columns) for result in results)
@@ -0,0 +1,261 @@
+# tests/test_cache.py
+
+import json
+from datetime import date
+
+from server.app import create_app
+from server.cache import InvalidationBus, MemoryBackend, RedisBackend, ResponseCache
+from server.models import Workout, db
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _key(key):
+    return key.decode() if isinstance(key, bytes) else key
+
+
+class FakeRedis:
+    """The subset of the redis-py client used by server/cache.py."""
+
+    def __init__(self, clock=None):
+        self.clock = clock or FakeClock()
+        self.data = {}
+        self.expires = {}
+        self.subscribers = {}
+
+    def _live(self, key):
+        key = _key(key)
+        if key in self.expires and self.expires[key] <= self.clock():
+            self.data.pop(key, None)
+            del self.expires[key]
+        return key
+
+    def get(self, key):
+        return self.data.get(self._live(key))
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, px=None):
+        key = _key(key)
+        self.data[key] = value
+        if px is not None:
+            self.expires[key] = self.clock() + px / 1000
+
+    def incr(self, key):
+        key = self._live(key)
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def delete(self, *keys):
+        keys = [self._live(key) for key in keys]
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        self.expires[_key(key)] = self.clock() + seconds
+
+    def sadd(self, key, *members):
+        self.data.setdefault(self._live(key), set()).update(_key(m) for m in members)
+
+    def srem(self, key, *members):
+        self.data.get(self._live(key), set()).difference_update(_key(m) for m in members)
+
+    def smembers(self, key):
+        return {member.encode() for member in self.data.get(self._live(key), set())}
+
+    def publish(self, channel, message):
+        for handler in self.subscribers.get(channel, []):
+            handler({"type": "message", "channel": channel, "data": message.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+
+    def subscribe(self, **handlers):
+        for channel, handler in handlers.items():
+            self.server.subscribers.setdefault(channel, []).append(handler)
+
+    def run_in_thread(self, sleep_time=0, daemon=False):
+        # Messages are delivered synchronously by FakeRedis.publish
+        return None
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(MemoryBackend(max_entries=2, clock=clock), ttl=10)
+    for key in ("a", "b"):
+        cache.set(key, key.upper(), ["exercises"], cache.token(["exercises"]))
+    assert cache.get("a") == "A"  # "b" is now least recently used
+
+    cache.set("c", "C", ["exercises"], cache.token(["exercises"]))
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.backend.evictions.value() == 1
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache.backend) == 1
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResponseCache(MemoryBackend())
+    cache.set("catalog", b"[]", ["exercises"], cache.token(["exercises"]))
+    cache.set("workout", b"{}", ["workouts"], cache.token(["workouts"]))
+
+    cache.invalidate({"workouts", "workout_exercises"})
+    assert cache.get("catalog") == b"[]"
+    assert cache.get("workout") is None
+    assert cache.invalidations.value() == 1
+
+
+def test_set_ignores_values_computed_across_an_invalidation():
+    cache = ResponseCache(MemoryBackend())
+    token = cache.token(["exercises"])
+    cache.invalidate(["exercises"])
+    assert not cache.set("catalog", b"stale", ["exercises"], token)
+    assert cache.get("catalog") is None
+
+
+def test_redis_backend_is_shared_and_invalidated_by_tag():
+    server = FakeRedis()
+    node_a = ResponseCache(RedisBackend(server), ttl=10)
+    node_b = ResponseCache(RedisBackend(server), ttl=10)
+
+    assert node_a.set("catalog", b"[1]", ["exercises"], node_a.token(["exercises"]))
+    assert node_a.set("workout", b"{}", ["workouts"], node_a.token(["workouts"]))
+    assert node_b.get("catalog") == b"[1]"
+
+    node_b.invalidate(["exercises"])
+    assert node_a.get("catalog") is None
+    assert node_a.get("workout") == b"{}"
+    assert node_b.invalidations.value() == 1
+
+    server.clock.now = 10
+    assert node_a.get("workout") is None
+
+
+def test_redis_backend_drops_values_computed_across_an_invalidation():
+    server = FakeRedis()
+    cache = ResponseCache(RedisBackend(server))
+    token = cache.token(["exercises"])
+    cache.invalidate(["exercises"])
+    assert not cache.set("catalog", b"stale", ["exercises"], token)
+    assert cache.get("catalog") is None
+
+
+def test_invalidation_messages_reach_other_workers():
+    server = FakeRedis()
+    workers = [
+        ResponseCache(MemoryBackend(), bus=InvalidationBus(server)) for _ in range(2)
+    ]
+    for cache in workers:
+        cache.listen()
+        cache.set("catalog", b"[]", ["exercises"], cache.token(["exercises"]))
+        cache.set("workout", b"{}", ["workouts"], cache.token(["workouts"]))
+
+    workers[0].invalidate(["exercises"])
+    assert [cache.get("catalog") for cache in workers] == [None, None]
+    assert [cache.get("workout") for cache in workers] == [b"{}", b"{}"]
+    # The sender handled its own message locally only once
+    assert [cache.invalidations.value() for cache in workers] == [1, 1]
+
+
+def test_exercise_catalog_is_served_from_cache(client, app, query_counter):
+    cache = app.extensions["response_cache"]
+    client.get("/exercises")
+    hits = cache.hits.value(endpoint="api.get_exercises")
+
+    query_counter.clear()
+    resp = client.get("/exercises")
+    assert resp.status_code == 200
+    assert cache.hits.value(endpoint="api.get_exercises") == hits + 1
+    # Only the change counters (for the ETag) were read
+    assert len(query_counter) == 1
+
+    # Writes to other tables leave the catalog cached
+    with app.app_context():
+        db.session.add(Workout(date=date(2035, 1, 1), duration_minutes=10))
+        db.session.commit()
+    client.get("/exercises")
+    assert cache.hits.value(endpoint="api.get_exercises") == hits + 2
+
+    resp = client.post(
+        "/exercises",
+        data=json.dumps(
+            {"name": "Cached Burpee", "category": "Plyometrics", "equipment_needed": False}
+        ),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    resp = client.get("/exercises")
+    assert cache.hits.value(endpoint="api.get_exercises") == hits + 2
+    assert "Cached Burpee" in [e["name"] for e in resp.get_json()]
+
+    resp = client.get(f"/exercises/{resp.get_json()[-1]['id']}")
+    assert resp.status_code == 200
+    resp = client.delete(f"/exercises/{resp.get_json()['id']}")
+    assert resp.status_code == 204
+    assert "Cached Burpee" not in [e["name"] for e in client.get("/exercises").get_json()]
+
+
+def test_streamed_catalog_is_not_cached(client, app):
+    cache = app.extensions["response_cache"]
+    size = len(cache.backend)
+    resp = client.get("/exercises?stream=1")
+    assert resp.mimetype == "application/x-ndjson"
+    assert len(cache.backend) == size
+
+
+def test_cache_counters_on_metrics(client, app):
+    # Served without the SQL instrumentation
+    app.config["METRICS_ENDPOINT"] = True
+    try:
+        client.get("/exercises")
+        client.get("/exercises")
+        resp = client.get("/metrics")
+        assert "Server-Timing" not in resp.headers
+        body = resp.get_data(as_text=True)
+    finally:
+        app.config["METRICS_ENDPOINT"] = False
+    assert "# TYPE response_cache_hits_total counter" in body
+    assert 'response_cache_hits_total{endpoint="api.get_exercises"}' in body
+
+
+def test_cache_follows_writes_of_another_process(tmp_path):
+    # Two apps on one database: two workers, each with its own memory cache
+    # and no invalidation messages between them
+    uri = f"sqlite:///{tmp_path / 'shared.db'}"
+    workers = [
+        create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": uri}) for _ in range(2)
+    ]
+    with workers[0].app_context():
+        db.create_all()
+    reader, writer = (worker.test_client() for worker in workers)
+    cache = workers[0].extensions["response_cache"]
+
+    first = reader.get("/exercises")
+    assert reader.get("/exercises").get_json() == first.get_json() == []
+    assert cache.hits.value(endpoint="api.get_exercises") == 1
+
+    exercise = {"name": "Shared Squat", "category": "Strength", "equipment_needed": True}
+    assert writer.post("/exercises", json=exercise).status_code == 201
+
+    resp = reader.get("/exercises", headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != first.headers["ETag"]
+    assert [e["name"] for e in resp.get_json()] == ["Shared Squat"]
+    assert cache.hits.value(endpoint="api.get_exercises") == 1
+
+    # Cached again, under the new counters
+    assert reader.get("/exercises").get_json() == resp.get_json()
+    assert cache.hits.value(endpoint="api.get_exercises") == 2
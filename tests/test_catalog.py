@@ -0,0 +1,118 @@
+# tests/test_catalog.py
+
+import math
+
+import pytest
+from sqlalchemy import select
+
+from server.catalog import SYNC_BATCH_SIZE
+from server.models import db, Exercise, TableVersion
+
+
+def catalog(prefix, n, category="Strength"):
+    return [
+        {"name": f"{prefix} {i}", "category": category, "equipment_needed": i % 2 == 0}
+        for i in range(n)
+    ]
+
+
+def stored(app, name):
+    with app.app_context():
+        return db.session.execute(
+            select(Exercise.category, Exercise.equipment_needed).where(Exercise.name == name)
+        ).one_or_none()
+
+
+def exercises_version(app):
+    with app.app_context():
+        return db.session.scalar(
+            select(TableVersion.version).where(TableVersion.table_name == "exercises")
+        )
+
+
+def test_sync_counts_and_batches(client, app, query_counter):
+    items = catalog("Sync", SYNC_BATCH_SIZE + 10)
+    resp = client.post("/exercises/sync", json=items)
+    assert resp.status_code == 200
+    assert resp.get_json() == {"created": len(items), "updated": 0, "unchanged": 0}
+    inserts = [q for q in query_counter if q.startswith("INSERT INTO exercises")]
+    assert len(inserts) == math.ceil(len(items) / SYNC_BATCH_SIZE)
+    assert all("ON CONFLICT (name) DO NOTHING" in q for q in inserts)
+    assert not [q for q in query_counter if q.startswith("UPDATE exercises")]
+
+    # One UPDATE per batch for the rows already there
+    items[0]["category"] = "Cardio"
+    items[1]["equipment_needed"] = not items[1]["equipment_needed"]
+    items[-1]["category"] = "Cardio"
+    items.append({"name": "Sync new", "category": "Core", "equipment_needed": False})
+    query_counter.clear()
+    resp = client.post("/exercises/sync", json=items)
+    assert resp.get_json() == {"created": 1, "updated": 3, "unchanged": len(items) - 4}
+    updates = [q for q in query_counter if q.startswith("UPDATE exercises")]
+    assert len(updates) == math.ceil(len(items) / SYNC_BATCH_SIZE)
+    assert stored(app, "Sync 0") == ("Cardio", True)
+    assert stored(app, "Sync 1") == ("Strength", True)
+    assert stored(app, f"Sync {SYNC_BATCH_SIZE + 9}") == ("Cardio", False)
+    assert stored(app, "Sync new") == ("Core", False)
+
+
+def test_sync_without_changes_keeps_the_version(client, app):
+    items = catalog("Steady", 3)
+    client.post("/exercises/sync", json=items)
+    version = exercises_version(app)
+
+    resp = client.post("/exercises/sync", json=items)
+    assert resp.get_json() == {"created": 0, "updated": 0, "unchanged": 3}
+    assert exercises_version(app) == version
+
+
+@pytest.mark.parametrize(
+    "body, errors",
+    [
+        ([{"name": "ab", "category": "Core", "equipment_needed": True}], {"0": ["name"]}),
+        (
+            [
+                {"name": "Twice", "category": "Core", "equipment_needed": True},
+                {"name": " Twice ", "category": "Core", "equipment_needed": True},
+            ],
+            {"1": ["name"]},
+        ),
+        (
+            [{"name": "Blank category", "category": "  ", "equipment_needed": True}],
+            {"0": ["category"]},
+        ),
+    ],
+)
+def test_sync_validation(client, app, body, errors):
+    resp = client.post("/exercises/sync", json=body)
+    assert resp.status_code == 400
+    assert {k: sorted(v) for k, v in resp.get_json()["errors"].items()} == errors
+    assert stored(app, body[0]["name"].strip()) is None
+
+
+def test_sync_rejects_non_lists(client):
+    assert client.post("/exercises/sync", json={"name": "x"}).status_code == 400
+    assert client.post("/exercises/sync", json=[]).status_code == 400
+
+
+def test_put_creates_then_updates(client, app):
+    payload = {"name": "  Put Row  ", "category": "Core", "equipment_needed": False}
+    created = client.put("/exercises", json=payload)
+    assert created.status_code == 201
+    assert created.get_json()["name"] == "Put Row"
+
+    updated = client.put("/exercises", json={**payload, "category": "Cardio"})
+    assert updated.status_code == 200
+    assert updated.get_json() == {**created.get_json(), "category": "Cardio"}
+    assert stored(app, "Put Row") == ("Cardio", False)
+
+
+def test_create_duplicate_does_not_fail_the_transaction(client, query_counter):
+    payload = {"name": "Only Once", "category": "Core", "equipment_needed": False}
+    assert client.post("/exercises", json=payload).status_code == 201
+    query_counter.clear()
+
+    resp = client.post("/exercises", json={**payload, "name": " Only Once"})
+    assert resp.status_code == 400
+    assert resp.get_json()["message"] == "Exercise with this name already exists."
+    assert any("ON CONFLICT (name) DO NOTHING" in q for q in query_counter)
@@ -0,0 +1,70 @@
+# tests/test_database.py
+
+from sqlalchemy import insert, select, text
+
+from server.app import create_app
+from server.database import engine_options
+from server.models import Exercise, db
+
+
+def test_engine_options_from_pool_settings():
+    config = {
+        "SQLALCHEMY_DATABASE_URI": "postgresql://db.example/workouts",
+        "DB_POOL_SIZE": 10,
+        "DB_MAX_OVERFLOW": 5,
+        "DB_POOL_TIMEOUT": None,
+        "DB_POOL_RECYCLE": 1800,
+        "DB_POOL_PRE_PING": True,
+    }
+    assert engine_options(config) == {
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
+    config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    assert engine_options(config) == {"pool_pre_ping": True}
+
+
+def test_sqlite_pragmas_and_concurrent_reader(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'wal.db'}",
+            "SQLITE_BUSY_TIMEOUT_MS": 100,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+
+    with engine.connect() as conn:
+
+        def pragma(name):
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 100
+        assert pragma("foreign_keys") == 1
+        assert pragma("mmap_size") == 256 * 1024 * 1024
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Exercise),
+            [
+                {"name": f"WAL {i}", "category": "Core", "equipment_needed": False}
+                for i in range(10)
+            ],
+        )
+
+    # A half-read result keeps a read lock open; with WAL the writer still
+    # commits instead of failing with "database is locked"
+    with engine.connect() as reader, engine.connect() as writer:
+        rows = reader.execute(select(Exercise.name))
+        rows.fetchone()
+        writer.execute(
+            insert(Exercise).values(name="WAL writer", category="Core", equipment_needed=False)
+        )
+        writer.commit()
+        assert len(rows.fetchall()) >= 9
@@ -0,0 +1,291 @@
+# tests/test_edits.py
+
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+
+from server import edits
+from server.edits import JOIN_VALUE_COLUMNS, diff_workout_exercises
+from server.models import db, Exercise, Workout, WorkoutExercise
+from server.rollups import check
+from server.schemas import MAX_WORKOUT_EXERCISES
+
+
+EXISTING = {
+    1: {"id": 1, "exercise_id": 10, "reps": 5, "sets": 3, "duration_seconds": None},
+    2: {"id": 2, "exercise_id": 10, "reps": 8, "sets": 3, "duration_seconds": None},
+    3: {"id": 3, "exercise_id": 20, "reps": None, "sets": None, "duration_seconds": 60},
+}
+
+
+def item(exercise_id, reps=None, sets=None, duration_seconds=None, **extra):
+    return {
+        "exercise_id": exercise_id,
+        "reps": reps,
+        "sets": sets,
+        "duration_seconds": duration_seconds,
+        **extra,
+    }
+
+
+# ---------------------------
+# Diff
+# ---------------------------
+def test_diff_of_the_same_list_writes_nothing():
+    items = [item(10, 5, 3), item(10, 8, 3), item(20, duration_seconds=60)]
+    assert diff_workout_exercises(EXISTING, items) == ([], [], [])
+
+
+def test_diff_updates_in_place_and_appends():
+    items = [item(10, 5, 3), item(10, 6, 3), item(20, duration_seconds=60), item(30, 1)]
+    inserts, updates, deletes = diff_workout_exercises(EXISTING, items)
+    assert inserts == [item(30, 1)]
+    assert updates == [item(10, 6, 3, id=2)]
+    assert deletes == []
+
+
+def test_diff_deletes_the_rows_left_out():
+    items = [item(10, 5, 3), item(20, duration_seconds=60)]
+    assert diff_workout_exercises(EXISTING, items) == ([], [], [2])
+    assert diff_workout_exercises(EXISTING, []) == ([], [], [1, 2, 3])
+
+
+def test_diff_keeps_the_list_order():
+    # Rows are listed by id: reordering rewrites the rows that moved
+    items = [item(20, duration_seconds=60), item(10, 5, 3), item(10, 8, 3)]
+    inserts, updates, deletes = diff_workout_exercises(EXISTING, items)
+    assert (inserts, deletes) == ([], [])
+    assert updates == [
+        item(20, duration_seconds=60, id=1),
+        item(10, 5, 3, id=2),
+        item(10, 8, 3, id=3),
+    ]
+
+    # New rows get higher ids, so an item put first cannot be inserted
+    items = [item(30, 1), item(10, 5, 3), item(10, 8, 3)]
+    inserts, updates, deletes = diff_workout_exercises(EXISTING, items)
+    assert inserts == []
+    assert updates == [item(30, 1, id=1), item(10, 5, 3, id=2), item(10, 8, 3, id=3)]
+    assert deletes == []
+
+
+@pytest.mark.parametrize("max_cells", [edits.MAX_DIFF_CELLS, 0])
+def test_diff_result_lists_the_items_in_order(monkeypatch, max_cells):
+    # With no cells allowed, every diff rewrites the rows in place
+    monkeypatch.setattr(edits, "MAX_DIFF_CELLS", max_cells)
+    rng = random.Random(0)
+    for _ in range(300):
+        pool = [item(rng.randint(1, 3), rng.randint(1, 2)) for _ in range(4)]
+        ids = rng.sample(range(1, 20), rng.randint(0, 6))
+        existing = {id: {"id": id, **rng.choice(pool)} for id in ids}
+        items = [rng.choice(pool) for _ in range(rng.randint(0, 6))]
+        inserts, updates, deletes = diff_workout_exercises(existing, items)
+
+        rows = {id: dict(row) for id, row in existing.items() if id not in deletes}
+        for update in updates:
+            rows[update["id"]].update(update)
+        next_id = max(existing, default=0) + 1
+        for offset, insert_item in enumerate(inserts):
+            rows[next_id + offset] = insert_item
+        result = [tuple(rows[id].get(n) for n in JOIN_VALUE_COLUMNS) for id in sorted(rows)]
+        assert result == [tuple(i[n] for n in JOIN_VALUE_COLUMNS) for i in items]
+        assert len(updates) + len(inserts) <= len(items)
+
+
+# ---------------------------
+# Routes
+# ---------------------------
+@pytest.fixture
+def workout(app):
+    """A workout with 30 join rows over 3 exercises; its id and items."""
+    with app.app_context():
+        exercise_ids = db.session.scalars(select(Exercise.id).limit(3)).all()
+        workout_id = db.session.scalar(
+            insert(Workout)
+            .values(date=date(2032, 1, 10), duration_minutes=60)
+            .returning(Workout.id)
+        )
+        db.session.commit()
+
+    items = [
+        {"exercise_id": exercise_ids[i % 3], "reps": i + 1, "sets": 3} for i in range(30)
+    ]
+    return workout_id, items
+
+
+def writes(statements, table):
+    """The kinds of the statements writing to `table` (not the rollups)."""
+    targets = {("INSERT", "INTO", table), ("UPDATE", table), ("DELETE", "FROM", table)}
+    return [
+        s.split()[0]
+        for s in statements
+        if tuple(s.split()[:3]) in targets or tuple(s.split()[:2]) in targets
+    ]
+
+
+def values(item):
+    return tuple(item.get(name) for name in ("exercise_id", "reps", "sets", "duration_seconds"))
+
+
+def listed(resp):
+    """The join rows of a workout response, as value tuples in their order."""
+    return [values(row) for row in resp.get_json()["workout_exercises"]]
+
+
+def join_rows(app, workout_id):
+    with app.app_context():
+        rows = db.session.execute(
+            select(
+                WorkoutExercise.exercise_id,
+                WorkoutExercise.reps,
+                WorkoutExercise.sets,
+                WorkoutExercise.duration_seconds,
+            )
+            .where(WorkoutExercise.workout_id == workout_id)
+            .order_by(WorkoutExercise.id)
+        ).all()
+        return [tuple(row) for row in rows]
+
+
+def test_replace_writes_only_the_changed_rows(client, app, workout, query_counter):
+    workout_id, items = workout
+    url = f"/workouts/{workout_id}/workout_exercises"
+    resp = client.put(url, json=items)
+    assert resp.status_code == 200
+    assert len(resp.get_json()["workout_exercises"]) == 30
+    assert writes(query_counter, "workout_exercises") == ["INSERT"]
+
+    # Same list again: nothing is written
+    query_counter.clear()
+    assert client.put(url, json=items).status_code == 200
+    assert writes(query_counter, "workout_exercises") == []
+
+    # Two edits and the last row replaced: a single (executemany) UPDATE
+    edited = [dict(i) for i in items[:-1]]
+    edited[0]["reps"] = 100
+    edited[5]["sets"] = None
+    edited.append({"exercise_id": items[0]["exercise_id"], "duration_seconds": 30})
+    query_counter.clear()
+    resp = client.put(url, json=edited)
+    assert resp.status_code == 200
+    assert writes(query_counter, "workout_exercises") == ["UPDATE"]
+    assert listed(resp) == join_rows(app, workout_id) == [values(i) for i in edited]
+
+    # A row taken out of the middle: the others are kept as they are
+    del edited[12]
+    query_counter.clear()
+    resp = client.put(url, json=edited)
+    assert writes(query_counter, "workout_exercises") == ["DELETE"]
+    assert listed(resp) == [values(i) for i in edited]
+
+    query_counter.clear()
+    assert client.put(url, json=edited[:10]).status_code == 200
+    assert writes(query_counter, "workout_exercises") == ["DELETE"]
+    assert len(join_rows(app, workout_id)) == 10
+
+    with app.app_context():
+        assert check() == {}
+
+
+def test_replace_keeps_the_requested_order(client, app, workout, query_counter):
+    workout_id, items = workout
+    url = f"/workouts/{workout_id}/workout_exercises"
+    first, second = items[0], items[1]
+    assert listed(client.put(url, json=[first, second])) == [values(first), values(second)]
+
+    query_counter.clear()
+    resp = client.put(url, json=[second, first])
+    assert resp.status_code == 200
+    assert listed(resp) == [values(second), values(first)]
+    assert writes(query_counter, "workout_exercises") == ["UPDATE"]
+
+    # An item put first: the rows after it are rewritten, one is added
+    third = items[2]
+    resp = client.put(url, json=[third, second, first])
+    assert listed(resp) == join_rows(app, workout_id)
+    assert listed(resp) == [values(third), values(second), values(first)]
+    with app.app_context():
+        assert check() == {}
+
+
+def test_patch_sets_only_the_given_fields(client, app, workout, query_counter):
+    workout_id, _ = workout
+    url = f"/workouts/{workout_id}"
+    resp = client.patch(url, json={"notes": "patched"})
+    assert resp.status_code == 200
+    assert resp.get_json()["notes"] == "patched"
+    assert resp.get_json()["duration_minutes"] == 60
+    assert writes(query_counter, "workouts") == ["UPDATE"]
+
+    # Unchanged values are not written
+    query_counter.clear()
+    assert client.patch(url, json={"notes": "patched"}).status_code == 200
+    assert writes(query_counter, "workouts") == []
+
+    # PUT needs every required field, and clears the optional ones left out
+    assert client.put(url, json={"notes": "x"}).status_code == 400
+    resp = client.put(url, json={"date": "2032-01-10", "duration_minutes": 45})
+    assert resp.status_code == 200
+    assert resp.get_json()["notes"] is None
+    assert resp.get_json()["duration_minutes"] == 45
+
+
+def test_date_change_moves_the_rollups(client, app, workout):
+    workout_id, items = workout
+    payload = {"date": "2032-01-10", "duration_minutes": 60, "workout_exercises": items}
+    assert client.put(f"/workouts/{workout_id}", json=payload).status_code == 200
+
+    payload = {"date": "2032-02-20", "workout_exercises": items[:5]}
+    resp = client.patch(f"/workouts/{workout_id}", json=payload)
+    assert resp.status_code == 200
+    assert resp.get_json()["date"] == "2032-02-20"
+    with app.app_context():
+        assert check() == {}
+
+
+def test_large_diffs_rewrite_the_rows_in_place(monkeypatch):
+    items = [item(10, 8, 3), item(20, duration_seconds=60)]
+    assert diff_workout_exercises(EXISTING, items) == ([], [], [1])
+
+    # 2 items x 3 rows: over the limit, item k takes row k
+    monkeypatch.setattr(edits, "MAX_DIFF_CELLS", 5)
+    inserts, updates, deletes = diff_workout_exercises(EXISTING, items)
+    assert inserts == []
+    assert updates == [item(10, 8, 3, id=1), item(20, duration_seconds=60, id=2)]
+    assert deletes == [3]
+
+    # The common prefix does not count: 1 item x 2 rows
+    items = [item(10, 5, 3), item(20, duration_seconds=60)]
+    assert diff_workout_exercises(EXISTING, items) == ([], [], [2])
+
+
+def test_edit_errors(client, app, workout):
+    workout_id, items = workout
+    assert client.patch("/workouts/999999", json={"notes": "x"}).status_code == 404
+    assert client.put("/workouts/999999/workout_exercises", json=items).status_code == 404
+    assert client.patch(f"/workouts/{workout_id}", json=[]).status_code == 400
+
+    resp = client.patch(
+        f"/workouts/{workout_id}",
+        json={"duration_minutes": 0, "workout_exercises": [{"exercise_id": 999999}]},
+    )
+    assert resp.status_code == 400
+    assert set(resp.get_json()["errors"]) == {"duration_minutes", "workout_exercises"}
+
+    url = f"/workouts/{workout_id}/workout_exercises"
+    resp = client.put(url, json=[{"exercise_id": 999999, "reps": 1}, {"id": 0, **items[0]}])
+    assert resp.status_code == 400
+    assert set(resp.get_json()["errors"]["workout_exercises"]) == {"1"}
+    resp = client.put(url, json=[{"exercise_id": 999999, "reps": 1}])
+    assert resp.get_json()["errors"]["workout_exercises"] == {
+        "0": {"exercise_id": ["Exercise not found."]}
+    }
+    assert join_rows(app, workout_id) == []
+
+    resp = client.put(url, json=[items[0]] * (MAX_WORKOUT_EXERCISES + 1))
+    assert resp.status_code == 400
+    assert resp.get_json()["errors"]["workout_exercises"] == [
+        f"At most {MAX_WORKOUT_EXERCISES} records per request."
+    ]
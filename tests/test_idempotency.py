@@ -0,0 +1,159 @@
+# tests/test_idempotency.py
+
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from server.idempotency import claim, purge_expired, request_fingerprint
+from server.models import db, Exercise, IdempotencyKey, Workout, WorkoutExercise
+
+_keys = count()
+
+
+@pytest.fixture
+def key():
+    return f"test-key-{next(_keys)}"
+
+
+def post(client, url, json, key):
+    return client.post(url, json=json, headers={"Idempotency-Key": key})
+
+
+def count_rows(app, model, *criteria):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+def test_retry_replays_the_stored_response(client, app, key, query_counter):
+    payload = {"date": "2031-02-03", "duration_minutes": 41, "notes": "retried"}
+
+    first = post(client, "/workouts", payload, key)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    query_counter.clear()
+    retry = post(client, "/workouts", payload, key)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.content_type == first.content_type
+    assert retry.get_data() == first.get_data()
+    # Only the key is claimed and read: no validation queries, no INSERT
+    assert not [s for s in query_counter if "idempotency_keys" not in s]
+    assert count_rows(app, Workout, Workout.notes == "retried") == 1
+
+    # Without the header, requests are not deduplicated
+    assert client.post("/workouts", json=payload).status_code == 201
+    assert count_rows(app, Workout, Workout.notes == "retried") == 2
+
+
+def test_join_routes_are_idempotent(client, app, key):
+    with app.app_context():
+        workout_id = db.session.scalar(select(Workout.id).limit(1))
+        exercise_id = db.session.scalar(select(Exercise.id).limit(1))
+    before = count_rows(app, WorkoutExercise, WorkoutExercise.workout_id == workout_id)
+
+    items = [{"exercise_id": exercise_id, "reps": 3, "sets": 3}] * 2
+    url = f"/workouts/{workout_id}/workout_exercises"
+    assert post(client, url, items, key).status_code == 201
+    assert post(client, url, items, key).status_code == 201
+
+    url = f"/workouts/{workout_id}/exercises/{exercise_id}/workout_exercises"
+    assert post(client, url, {"reps": 4}, key + "-single").status_code == 201
+    assert post(client, url, {"reps": 4}, key + "-single").status_code == 201
+
+    after = count_rows(app, WorkoutExercise, WorkoutExercise.workout_id == workout_id)
+    assert after == before + 3
+
+
+def test_key_reused_for_another_request(client, key):
+    workout = {"date": "2031-02-04", "duration_minutes": 5}
+    assert post(client, "/workouts", workout, key).status_code == 201
+    resp = post(client, "/workouts", {**workout, "duration_minutes": 6}, key)
+    assert resp.status_code == 422
+    exercise = {"name": "Idempotent Plank", "category": "Core", "equipment_needed": False}
+    assert post(client, "/exercises", exercise, key).status_code == 422
+
+
+def test_errors_are_not_stored(client, app, key):
+    invalid = {"name": "", "category": "Core", "equipment_needed": False}
+    assert post(client, "/exercises", invalid, key).status_code == 400
+    assert count_rows(app, IdempotencyKey, IdempotencyKey.key == key) == 0
+
+    # Duplicate name: the view rolls back, the key is released with it
+    exercise = {"name": "Push-Up", "category": "Strength", "equipment_needed": False}
+    assert post(client, "/exercises", exercise, key).status_code == 400
+    assert count_rows(app, IdempotencyKey, IdempotencyKey.key == key) == 0
+
+    exercise["name"] = "Idempotent Push-Up"
+    assert post(client, "/exercises", exercise, key).status_code == 201
+    assert count_rows(app, IdempotencyKey, IdempotencyKey.key == key) == 1
+
+
+def test_in_progress_and_expired_keys(client, app, key):
+    payload = {"date": "2031-02-05", "duration_minutes": 7}
+    with app.test_request_context("/workouts", method="POST", json=payload):
+        fingerprint = request_fingerprint()
+
+    later = datetime.utcnow() + timedelta(hours=1)
+    earlier = later - timedelta(hours=2)
+    with app.app_context():
+        db.session.execute(
+            insert(IdempotencyKey),
+            [
+                {"key": key, "fingerprint": fingerprint, "expires_at": later},
+                {"key": key + "-old", "fingerprint": "x", "expires_at": earlier},
+                {"key": key + "-gone", "fingerprint": "x", "expires_at": earlier},
+            ],
+        )
+        db.session.commit()
+
+    busy = client.post("/workouts", json=payload, headers={"Idempotency-Key": key})
+    assert busy.status_code == 409
+    assert busy.headers["Retry-After"] == "1"
+
+    # An expired key is free again, whatever it was used for
+    assert post(client, "/workouts", payload, key + "-old").status_code == 201
+    retry = post(client, "/workouts", payload, key + "-old")
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    with app.app_context():
+        assert purge_expired() >= 1
+    assert count_rows(app, IdempotencyKey, IdempotencyKey.key == key + "-gone") == 0
+    assert count_rows(app, IdempotencyKey, IdempotencyKey.key == key + "-old") == 1
+
+
+def test_claim_without_response_is_leased(client, app, key):
+    payload = {"date": "2031-02-07", "duration_minutes": 7}
+    # The view committed, then the process died before store()
+    with app.test_request_context("/workouts", method="POST", json=payload):
+        assert claim(key, request_fingerprint())
+        db.session.commit()
+        lease_end = db.session.scalar(
+            select(IdempotencyKey.expires_at).where(IdempotencyKey.key == key)
+        )
+    assert lease_end < datetime.utcnow() + timedelta(seconds=61)
+    assert post(client, "/workouts", payload, key).status_code == 409
+
+    with app.app_context():
+        db.session.execute(
+            db.update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.session.commit()
+    assert post(client, "/workouts", payload, key).status_code == 201
+
+    # The stored response is kept for the full TTL
+    with app.app_context():
+        expires_at = db.session.scalar(
+            select(IdempotencyKey.expires_at).where(IdempotencyKey.key == key)
+        )
+    assert expires_at > datetime.utcnow() + timedelta(hours=23)
+    assert post(client, "/workouts", payload, key).headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_length_is_checked(client):
+    resp = post(client, "/workouts", {"date": "2031-02-06", "duration_minutes": 7}, "k" * 256)
+    assert resp.status_code == 400
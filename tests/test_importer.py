@@ -0,0 +1,85 @@
+# tests/test_importer.py
+
+import json
+
+from server.models import Exercise, Workout, WorkoutExercise
+
+
+def run_import(app, *args):
+    return app.test_cli_runner().invoke(args=["import", *args])
+
+
+def test_import_exercises_csv(app, tmp_path):
+    path = tmp_path / "exercises.csv"
+    path.write_text(
+        "name,category,equipment_needed\n"
+        "Import Row,Strength,false\n"
+        "  Import Deadlift ,Strength,true\n"
+        "Im,Strength,false\n"
+        "Import Row,Cardio,false\n"
+    )
+
+    result = run_import(app, "exercises", str(path), "--batch-size", "2")
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 rows" in result.output
+    assert "2 rows skipped" in result.output
+
+    with app.app_context():
+        # whitespace is stripped, as the model @validates rules do
+        assert Exercise.query.filter_by(name="Import Deadlift").one().equipment_needed
+
+
+def test_import_workouts_ndjson_with_exercise_names(app, tmp_path):
+    with app.app_context():
+        squat_id = Exercise.query.filter_by(name="Squat").one().id
+
+    path = tmp_path / "workouts.ndjson"
+    lines = [
+        {
+            "date": "2034-01-01",
+            "duration_minutes": 40,
+            "notes": "Imported",
+            "exercises": [{"exercise": "Squat", "reps": 5, "sets": 5}],
+        },
+        {"date": "2034-01-02", "duration_minutes": 0},
+        {
+            "date": "2034-01-03",
+            "duration_minutes": 30,
+            "exercises": [{"exercise": "No Such Exercise", "reps": 1}],
+        },
+    ]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n{not json\n")
+
+    result = run_import(app, "workouts", str(path))
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 rows" in result.output
+    assert "3 rows skipped" in result.output
+
+    with app.app_context():
+        workout = Workout.query.filter_by(notes="Imported").one()
+        assert [we.exercise_id for we in workout.workout_exercises] == [squat_id]
+
+
+def test_import_workout_exercises_csv_checks_references(app, tmp_path):
+    with app.app_context():
+        workout_id = Workout.query.first().id
+
+    path = tmp_path / "join.csv"
+    path.write_text(
+        "workout_id,exercise,reps,sets,duration_seconds\n"
+        f"{workout_id},Running,,,900\n"
+        "999999,Running,,,900\n"
+        f"{workout_id},Running,,,\n"
+    )
+
+    with app.app_context():
+        before = WorkoutExercise.query.filter_by(workout_id=workout_id).count()
+
+    result = run_import(app, "workout_exercises", str(path))
+    assert result.exit_code == 0, result.output
+    assert "Imported 1 rows" in result.output
+    assert "2 rows skipped" in result.output
+
+    with app.app_context():
+        after = WorkoutExercise.query.filter_by(workout_id=workout_id).count()
+    assert after == before + 1
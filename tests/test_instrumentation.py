@@ -0,0 +1,69 @@
+# tests/test_instrumentation.py
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def instrumented(app):
+    app.config["SQL_INSTRUMENTATION"] = True
+    yield app
+    app.config["SQL_INSTRUMENTATION"] = False
+
+
+def test_instrumentation_is_opt_in(client):
+    resp = client.get("/exercises")
+    assert "Server-Timing" not in resp.headers
+    assert client.get("/metrics").status_code == 404
+
+
+def test_server_timing_header_reports_queries(client, instrumented):
+    resp = client.get("/workouts")
+    timing = resp.headers["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    # Change counters, workouts, join rows
+    assert 'desc="3 queries"' in timing
+    assert "db-slowest;dur=" in timing
+
+    resp = client.get("/")
+    assert 'desc="0 queries"' in resp.headers["Server-Timing"]
+
+
+def test_metrics_endpoint_renders_prometheus_histograms(client, instrumented):
+    client.get("/exercises").close()
+    client.get("/exercises").close()
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    body = resp.get_data(as_text=True)
+    assert "# TYPE db_queries_per_request histogram" in body
+    assert 'db_queries_per_request_bucket{endpoint="api.get_exercises",method="GET",le="1"}' in body
+    count_line = next(
+        line
+        for line in body.splitlines()
+        if line.startswith('db_queries_per_request_count{endpoint="api.get_exercises"')
+    )
+    assert int(count_line.split()[-1]) >= 2
+    assert 'http_request_duration_seconds_bucket{endpoint="api.get_exercises",method="GET",le="+Inf"}' in body
+
+
+def test_failed_statement_does_not_skew_the_next_one(app, instrumented):
+    from flask import g
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from server.instrumentation import RequestStats
+    from server.models import db
+
+    with app.test_request_context("/"):
+        g.sql_stats = RequestStats()
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        db.session.rollback()
+        started = time.perf_counter()
+        db.session.execute(text("SELECT 1"))
+        elapsed = time.perf_counter() - started
+        assert g.sql_stats.query_count == 1
+        assert g.sql_stats.db_time <= elapsed
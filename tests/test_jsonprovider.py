@@ -0,0 +1,44 @@
+# tests/test_jsonprovider.py
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from server.app import create_app, workouts_schema
+from server.jsonprovider import OrjsonProvider, StdlibJSONProvider
+from server.models import Workout
+
+
+def test_stdlib_provider_writes_iso_dates(app):
+    provider = StdlibJSONProvider(app)
+    assert provider.dumps({"day": date(2024, 1, 2)}) == '{"day": "2024-01-02"}'
+    assert provider.dumps(datetime(2024, 1, 2, 3, 4, 5)) == '"2024-01-02T03:04:05"'
+
+
+def test_orjson_matches_stdlib_responses(app):
+    pytest.importorskip("orjson")
+    orjson_provider, stdlib_provider = OrjsonProvider(app), StdlibJSONProvider(app)
+
+    payload = workouts_schema.dump(Workout.query.all())
+    assert payload
+    assert (
+        orjson_provider.response(payload).get_data()
+        == stdlib_provider.response(payload).get_data()
+    )
+
+    odd = {"b": [date(2024, 1, 2), Decimal("1.5")], "a": {2: None}}
+    assert orjson_provider.dumps(odd) == '{"a":{"2":null},"b":["2024-01-02","1.5"]}'
+    assert orjson_provider.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_provider_selection():
+    pytest.importorskip("orjson")
+    config = {"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}
+    assert isinstance(create_app(config).json, OrjsonProvider)
+
+    app = create_app({**config, "JSON_PROVIDER": "stdlib"})
+    assert type(app.json) is StdlibJSONProvider
+
+    with pytest.raises(ValueError):
+        create_app({**config, "JSON_PROVIDER": "ujson"})
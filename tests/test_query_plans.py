@@ -0,0 +1,130 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression tests: run the hot routes, capture the SQL they
+send and check with EXPLAIN QUERY PLAN (SQLite) that no statement falls
+back to a full scan of workouts or workout_exercises.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from server.models import db, Workout
+from server.pagination import encode_cursor
+
+
+@pytest.fixture
+def captured(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def plans(app, statements):
+    """(statement, plan details) for every captured SELECT/DELETE/UPDATE."""
+    with app.app_context():
+        connection = db.session.connection()
+        for statement, parameters in statements:
+            if statement.split(None, 1)[0] not in ("SELECT", "DELETE", "UPDATE"):
+                continue
+            rows = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            ).all()
+            yield statement, [row[-1] for row in rows]
+
+
+def assert_no_full_scans(app, statements, tables=("workouts", "workout_exercises")):
+    for statement, details in plans(app, statements):
+        for detail in details:
+            for table in tables:
+                # "SCAN t USING INDEX ..." walks an index in order; a bare
+                # "SCAN t" reads the whole table
+                assert detail != f"SCAN {table}", (statement, details)
+
+
+def test_workout_list_plans(client, app, captured):
+    with app.app_context():
+        last = Workout.query.order_by(Workout.date, Workout.id).first()
+        cursor = encode_cursor(last.date, last.id)
+    captured.clear()
+
+    client.get("/workouts?limit=5")
+    client.get(f"/workouts?limit=5&after={cursor}")
+    client.get("/workouts?date_from=2025-01-01&date_to=2025-01-31")
+    assert captured
+    assert_no_full_scans(app, captured)
+
+    # The keyset page query seeks into the (date, id) index
+    page_plans = [
+        details
+        for statement, details in plans(app, captured)
+        if "FROM workouts" in statement and "LIMIT" in statement
+    ]
+    assert page_plans
+    for details in page_plans:
+        assert any("ix_workouts_date_id" in d for d in details), details
+        assert not any("TEMP B-TREE" in d for d in details), details
+
+
+def test_workout_detail_and_delete_plans(client, app, captured):
+    with app.app_context():
+        workout_id = Workout.query.first().id
+    captured.clear()
+
+    client.get(f"/workouts/{workout_id}")
+    client.delete(f"/workouts/{workout_id}")
+    assert_no_full_scans(app, captured)
+
+    join_lookups = [
+        details
+        for statement, details in plans(app, captured)
+        if "FROM workout_exercises" in statement
+        and "workout_exercises.workout_id IN" in statement
+    ]
+    assert join_lookups
+    for details in join_lookups:
+        assert any("ix_workout_exercises_workout_id_exercise_id" in d for d in details)
+
+
+def test_exercise_delete_plans(client, app, captured):
+    resp = client.post(
+        "/exercises",
+        json={"name": "Plan Exercise", "category": "Strength", "equipment_needed": False},
+    )
+    exercise_id = resp.get_json()["id"]
+    captured.clear()
+
+    client.delete(f"/exercises/{exercise_id}")
+    assert_no_full_scans(app, captured)
+
+    by_exercise = [
+        details
+        for statement, details in plans(app, captured)
+        if "workout_exercises.exercise_id" in statement
+    ]
+    assert by_exercise
+    for details in by_exercise:
+        assert any("ix_workout_exercises_exercise_id" in d for d in details), details
+
+
+def test_search_plans(client, app, captured):
+    client.get("/search/exercises?prefix=Be")
+    client.get("/search?q=leg")
+    assert_no_full_scans(app, captured, tables=("exercises", "workouts"))
+
+    typeahead = [
+        details
+        for statement, details in plans(app, captured)
+        if "LIKE" in statement
+    ]
+    assert typeahead
+    for details in typeahead:
+        assert any("ix_exercises_name_nocase" in d for d in details), details
+        assert not any("TEMP B-TREE" in d for d in details), details
@@ -0,0 +1,141 @@
+# tests/test_rollups.py
+
+import json
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from server.models import db, DailyRollup, Exercise, WeeklyRollup, Workout, WorkoutExercise
+from server.rollups import ROLLUP_LOCK_CLASS, check, refresh
+
+
+def daily(exercise_id):
+    return {
+        row.day: (row.entries, row.total_volume, row.total_duration_seconds)
+        for row in DailyRollup.query.filter_by(exercise_id=exercise_id)
+    }
+
+
+def weekly(exercise_id):
+    return {
+        row.week_start: (row.entries, row.total_volume)
+        for row in WeeklyRollup.query.filter_by(exercise_id=exercise_id)
+    }
+
+
+def test_rollups_follow_orm_changes(app):
+    with app.app_context():
+        e = Exercise(name="Rollup Lunge", category="Strength", equipment_needed=False)
+        w1 = Workout(date=date(2041, 3, 4), duration_minutes=30)  # Monday
+        w2 = Workout(date=date(2041, 3, 6), duration_minutes=30)
+        db.session.add_all([e, w1, w2])
+        db.session.commit()
+
+        we1 = WorkoutExercise(workout_id=w1.id, exercise_id=e.id, reps=10, sets=2)
+        we2 = WorkoutExercise(workout_id=w2.id, exercise_id=e.id, reps=5, sets=5)
+        db.session.add_all([we1, we2])
+        db.session.commit()
+        assert daily(e.id) == {date(2041, 3, 4): (1, 20, 0), date(2041, 3, 6): (1, 25, 0)}
+        assert weekly(e.id) == {date(2041, 3, 4): (2, 45)}
+
+        we1.reps = 12
+        db.session.commit()
+        assert daily(e.id)[date(2041, 3, 4)] == (1, 24, 0)
+
+        # Moving a workout moves its totals to another day and week
+        w2.date = date(2041, 3, 11)
+        db.session.commit()
+        assert daily(e.id) == {date(2041, 3, 4): (1, 24, 0), date(2041, 3, 11): (1, 25, 0)}
+        assert weekly(e.id) == {date(2041, 3, 4): (1, 24), date(2041, 3, 11): (1, 25)}
+
+        # Removing a join record through the collection (delete-orphan)
+        w1.workout_exercises.remove(we1)
+        db.session.commit()
+        assert date(2041, 3, 4) not in daily(e.id)
+
+        db.session.delete(w2)
+        db.session.commit()
+        assert daily(e.id) == {} and weekly(e.id) == {}
+        assert check() == {}
+
+
+def test_rollups_follow_bulk_route_and_deletes(client, app):
+    with app.app_context():
+        e = Exercise(name="Rollup Row", category="Cardio", equipment_needed=True)
+        w = Workout(date=date(2041, 4, 1), duration_minutes=20)
+        db.session.add_all([e, w])
+        db.session.commit()
+        wid, eid = w.id, e.id
+
+    resp = client.post(
+        f"/workouts/{wid}/workout_exercises",
+        data=json.dumps([{"exercise_id": eid, "duration_seconds": 300}] * 3),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+
+    with app.app_context():
+        assert daily(eid) == {date(2041, 4, 1): (3, 0, 900)}
+
+    resp = client.get("/stats/daily/exercises?date_from=2041-04-01&date_to=2041-04-01")
+    assert resp.get_json() == [
+        {
+            "day": "2041-04-01",
+            "exercise_id": eid,
+            "name": "Rollup Row",
+            "entries": 3,
+            "total_sets": 0,
+            "total_reps": 0,
+            "total_volume": 0,
+            "total_duration_seconds": 900,
+        }
+    ]
+    resp = client.get("/stats/weekly/exercises?date_from=2041-04-01&date_to=2041-04-01")
+    assert [row["total_duration_seconds"] for row in resp.get_json()] == [900]
+
+    assert client.delete(f"/exercises/{eid}").status_code == 204
+    with app.app_context():
+        assert daily(eid) == {}
+        assert check() == {}
+
+
+def test_rollup_commands_detect_and_repair_drift(app):
+    runner = app.test_cli_runner()
+    with app.app_context():
+        row = DailyRollup.query.first()
+        row.total_reps += 1
+        db.session.commit()
+
+    result = runner.invoke(args=["rollups", "check"])
+    assert result.exit_code == 1
+    assert "rollup_daily" in result.output
+
+    result = runner.invoke(args=["rollups", "rebuild"])
+    assert result.exit_code == 0
+    result = runner.invoke(args=["rollups", "check"])
+    assert result.exit_code == 0
+    assert "consistent" in result.output
+
+
+def test_refresh_locks_exercises_on_postgresql(app):
+    class Recorder:
+        dialect = postgresql.dialect()
+
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement):
+            self.statements.append(statement)
+
+    connection = Recorder()
+    keys = {(date(2041, 5, 1), 9), (date(2041, 5, 2), 3), (date(2041, 5, 3), 9)}
+    refresh(connection, keys)
+
+    # One lock per exercise, in id order, before any rollup is written
+    locks = connection.statements[:2]
+    assert all("pg_advisory_xact_lock" in str(s) for s in locks)
+    assert [list(s.compile().params.values()) for s in locks] == [
+        [ROLLUP_LOCK_CLASS, 3],
+        [ROLLUP_LOCK_CLASS, 9],
+    ]
+    assert not any("pg_advisory" in str(s) for s in connection.statements[2:])
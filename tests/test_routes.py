@@ -1,9 +1,11 @@
 # tests/test_routes.py
 
+import base64
 import json
 from datetime import date
 
 from server.models import Workout, Exercise, WorkoutExercise, db
+from server.schemas import MAX_WORKOUT_EXERCISES
 
 
 def test_get_workouts(client, app):
@@ -121,3 +123,397 @@ def test_join_route_adds_workout_exercise(client, app):
     data = resp.get_json()
     assert data["workout_id"] == wid
     assert data["exercise_id"] == eid
+
+
+def test_create_routes_insert_without_prior_queries(client, app, query_counter):
+    def statements_before_insert(url, payload):
+        query_counter.clear()
+        resp = client.post(url, json=payload)
+        assert resp.status_code == 201, resp.get_json()
+        first_insert = next(
+            i for i, q in enumerate(query_counter) if q.startswith("INSERT INTO")
+        )
+        return resp.get_json(), query_counter[:first_insert]
+
+    # Validation is done by the schema alone and no instance is looked up;
+    # the change counters are only bumped at commit
+    workout, before = statements_before_insert(
+        "/workouts", {"date": "2025-02-02", "duration_minutes": 25}
+    )
+    assert workout["workout_exercises"] == []
+    assert before == []
+
+    exercise, before = statements_before_insert(
+        "/exercises",
+        {"name": "  No Lookup Row ", "category": "Core", "equipment_needed": False},
+    )
+    assert exercise["name"] == "No Lookup Row"
+    assert before == []
+
+    join, before = statements_before_insert(
+        f"/workouts/{workout['id']}/exercises/{exercise['id']}/workout_exercises",
+        {"reps": 2},
+    )
+    assert (join["workout_id"], join["reps"]) == (workout["id"], 2)
+    assert before == []
+
+    # The join row's Core insert still brings the rollups up to date
+    resp = client.get("/stats/daily/exercises?date_from=2025-02-02&date_to=2025-02-02")
+    assert any(row["exercise_id"] == exercise["id"] for row in resp.get_json())
+
+
+def test_create_routes_reject_ids_and_missing_parents(client, app):
+    resp = client.post(
+        "/workouts", json={"id": 1, "date": "2025-02-03", "duration_minutes": 5}
+    )
+    assert resp.status_code == 400
+    assert "id" in resp.get_json()["errors"]
+
+    with app.app_context():
+        wid = db.session.scalar(db.select(Workout.id).limit(1))
+        eid = db.session.scalar(db.select(Exercise.id).limit(1))
+    url = "/workouts/{}/exercises/{}/workout_exercises"
+    resp = client.post(url.format(999999, eid), json={"reps": 1})
+    assert (resp.status_code, resp.get_json()["message"]) == (404, "Workout not found")
+    resp = client.post(url.format(wid, 999999), json={"reps": 1})
+    assert (resp.status_code, resp.get_json()["message"]) == (404, "Exercise not found")
+
+    for body in ([{"reps": 1}], "reps", 1):
+        resp = client.post(url.format(wid, eid), json=body)
+        assert (resp.status_code, resp.get_json()["message"]) == (400, "Expected a JSON object.")
+
+
+def test_get_workouts_paginates_with_cursor(client, app):
+    with app.app_context():
+        workouts = [
+            Workout(date=date(2030, 3, day), duration_minutes=10 * day, notes="Page")
+            for day in (1, 1, 2, 3, 4)
+        ]
+        db.session.add_all(workouts)
+        db.session.commit()
+        expected_ids = [w.id for w in sorted(workouts, key=lambda w: (w.date, w.id))]
+
+    seen = []
+    url = "/workouts?limit=2&date_from=2030-03-01&date_to=2030-03-31"
+    resp = client.get(url)
+    while True:
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page) <= 2
+        seen.extend(w["id"] for w in page)
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        resp = client.get(f"{url}&after={cursor}")
+
+    assert seen == expected_ids
+
+
+def test_get_workouts_filters_duration(client, app):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Workout(date=date(2031, 5, 1), duration_minutes=minutes)
+                for minutes in (10, 20, 30, 40)
+            ]
+        )
+        db.session.commit()
+
+    resp = client.get(
+        "/workouts?date_from=2031-05-01&date_to=2031-05-01&min_duration=20"
+        "&max_duration=30"
+    )
+    assert resp.status_code == 200
+    durations = sorted(w["duration_minutes"] for w in resp.get_json())
+    assert durations == [20, 30]
+
+
+def test_get_workouts_rejects_bad_query(client):
+    assert client.get("/workouts?after=not-a-cursor").status_code == 400
+    assert client.get("/workouts?limit=0").status_code == 400
+    resp = client.get("/workouts?date_from=2025-02-01&date_to=2025-01-01")
+    assert resp.status_code == 400
+    assert "errors" in resp.get_json()
+
+
+def test_get_workouts_rejects_cursor_ids_out_of_range(client):
+    for raw_id in ("1e999", str(2**70), "1.9", "true", "0", '"7"'):
+        raw = f'["2020-01-01", {raw_id}]'.encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        assert client.get(f"/workouts?after={token}").status_code == 400, raw_id
+
+
+def test_workout_reads_use_bounded_query_count(client, app, query_counter):
+    with app.app_context():
+        exercises = [
+            Exercise(name=f"Bounded {i}", category="Strength", equipment_needed=False)
+            for i in range(3)
+        ]
+        workouts = [
+            Workout(date=date(2032, 1, 1), duration_minutes=30) for _ in range(12)
+        ]
+        db.session.add_all(exercises + workouts)
+        db.session.flush()
+        db.session.add_all(
+            WorkoutExercise(workout_id=w.id, exercise_id=e.id, reps=5, sets=3)
+            for w in workouts
+            for e in exercises
+        )
+        db.session.commit()
+        wid = workouts[0].id
+
+    counts = []
+    for limit in (1, 4, 12):
+        query_counter.clear()
+        resp = client.get(f"/workouts?date_from=2032-01-01&limit={limit}")
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page) == limit
+        assert all(len(w["exercises"]) == 3 for w in page)
+        assert all(len(w["workout_exercises"]) == 3 for w in page)
+        counts.append(len(query_counter))
+
+    # Change counters (for the ETag), workouts, join rows + exercises
+    assert counts[0] == counts[-1] <= 3
+
+    query_counter.clear()
+    resp = client.get(f"/workouts/{wid}")
+    assert resp.status_code == 200
+    assert len(resp.get_json()["exercises"]) == 3
+    assert len(query_counter) <= 3
+
+
+def test_get_workouts_streams_ndjson(client, app):
+    with app.app_context():
+        workouts = [
+            Workout(date=date(2033, 6, day), duration_minutes=15) for day in (1, 2, 3)
+        ]
+        exercise = Exercise(name="Stream Row", category="Core", equipment_needed=False)
+        db.session.add_all([*workouts, exercise])
+        db.session.flush()
+        db.session.add(
+            WorkoutExercise(workout_id=workouts[0].id, exercise_id=exercise.id, reps=5)
+        )
+        db.session.commit()
+
+    resp = client.get("/workouts?stream=1&date_from=2033-06-01&date_to=2033-06-30")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["date"] for r in rows] == ["2033-06-01", "2033-06-02", "2033-06-03"]
+    assert [e["name"] for e in rows[0]["exercises"]] == ["Stream Row"]
+
+
+def test_stream_parameter_takes_any_boolean(client):
+    ndjson = {"Accept": "application/x-ndjson"}
+    for url in ("/workouts", "/exercises"):
+        assert client.get(f"{url}?stream=yes").mimetype == "application/x-ndjson"
+        assert client.get(f"{url}?stream=on").mimetype == "application/x-ndjson"
+        # An explicit value wins over the Accept header
+        assert client.get(f"{url}?stream=no", headers=ndjson).mimetype == "application/json"
+        assert client.get(f"{url}?stream=maybe").status_code == 400
+
+
+def test_sparse_fieldsets_narrow_the_sql(client, app, query_counter):
+    with app.app_context():
+        workout = Workout(date=date(2034, 2, 1), duration_minutes=20, notes="Sparse")
+        exercise = Exercise(name="Sparse Row", category="Core", equipment_needed=False)
+        db.session.add_all([workout, exercise])
+        db.session.flush()
+        db.session.add(WorkoutExercise(workout_id=workout.id, exercise_id=exercise.id, reps=5))
+        db.session.commit()
+        wid = workout.id
+
+    window = "date_from=2034-02-01&date_to=2034-02-01"
+    query_counter.clear()
+    resp = client.get(f"/workouts?{window}&fields=date,duration_minutes")
+    assert resp.get_json() == [{"date": "2034-02-01", "duration_minutes": 20}]
+    # Change counters and workouts only; notes are not selected
+    assert len(query_counter) == 2
+    assert "notes" not in query_counter[-1]
+
+    resp = client.get(f"/workouts?{window}&fields=id&expand=exercises")
+    [row] = resp.get_json()
+    assert set(row) == {"id", "exercises"}
+    assert [e["name"] for e in row["exercises"]] == ["Sparse Row"]
+
+    resp = client.get(f"/workouts?{window}&expand=")
+    assert "workout_exercises" not in resp.get_json()[0]
+    assert resp.get_json()[0]["notes"] == "Sparse"
+
+    resp = client.get(f"/workouts/{wid}?fields=notes&expand=workout_exercises")
+    body = resp.get_json()
+    assert set(body) == {"notes", "workout_exercises"}
+    assert [(j["workout_id"], j["reps"]) for j in body["workout_exercises"]] == [(wid, 5)]
+
+    resp = client.get("/workouts?fields=date,weight")
+    assert resp.status_code == 400
+    assert "fields" in resp.get_json()["errors"]
+    for empty in ("", ",", " "):
+        resp = client.get(f"/workouts/{wid}?fields={empty}")
+        assert resp.status_code == 400
+        assert "fields" in resp.get_json()["errors"]
+    assert client.get(f"/workouts/{wid}?expand=workout").status_code == 400
+
+
+def test_get_exercises_streams_with_accept_header(client):
+    resp = client.get("/exercises", headers={"Accept": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert rows == client.get("/exercises").get_json()
+
+
+def test_bulk_add_workout_exercises(client, app, query_counter):
+    with app.app_context():
+        w = Workout(date=date(2025, 3, 1), duration_minutes=50, notes="Bulk test")
+        exercises = [
+            Exercise(name=f"Bulk Exercise {i}", category="Strength", equipment_needed=False)
+            for i in range(20)
+        ]
+        db.session.add_all([w, *exercises])
+        db.session.commit()
+        wid, eids = w.id, [e.id for e in exercises]
+
+    payload = [{"exercise_id": eid, "reps": 10, "sets": 3} for eid in eids]
+    query_counter.clear()
+    resp = client.post(
+        f"/workouts/{wid}/workout_exercises",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    data = resp.get_json()
+    assert [r["exercise_id"] for r in data] == eids
+    assert all(r["workout_id"] == wid and r["id"] for r in data)
+    # One insert for all items; the remaining statements (workout lookup,
+    # exercise IN check, change counter, rollup refresh) do not depend on
+    # the item count
+    inserts = [q for q in query_counter if q.startswith("INSERT INTO workout_exercises")]
+    assert len(inserts) == 1
+    assert len(query_counter) <= 9
+
+    with app.app_context():
+        assert WorkoutExercise.query.filter_by(workout_id=wid).count() == 20
+
+
+def test_bulk_add_workout_exercises_reports_item_errors(client, app):
+    with app.app_context():
+        w = Workout(date=date(2025, 3, 2), duration_minutes=50)
+        e = Exercise(name="Bulk Error Exercise", category="Cardio", equipment_needed=False)
+        db.session.add_all([w, e])
+        db.session.commit()
+        wid, eid = w.id, e.id
+
+    payload = [
+        {"exercise_id": eid, "duration_seconds": 600},
+        {"exercise_id": eid},
+        {"exercise_id": 999999, "reps": 5},
+        {"exercise_id": eid, "sets": -1},
+    ]
+    resp = client.post(
+        f"/workouts/{wid}/workout_exercises",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    assert resp.status_code == 400
+    errors = resp.get_json()["errors"]
+    assert set(errors) == {"1", "2", "3"}
+    assert "exercise_id" in errors["2"]
+
+    with app.app_context():
+        assert WorkoutExercise.query.filter_by(workout_id=wid).count() == 0
+
+
+def test_bulk_add_workout_exercises_requires_array(client, app):
+    resp = client.post(
+        "/workouts/1/workout_exercises",
+        data=json.dumps({"exercise_id": 1, "reps": 1}),
+        content_type="application/json",
+    )
+    assert resp.status_code in (400, 404)
+    assert client.post(
+        "/workouts/999999/workout_exercises",
+        data=json.dumps([]),
+        content_type="application/json",
+    ).status_code == 404
+
+
+def test_bulk_add_workout_exercises_is_capped(client, app):
+    with app.app_context():
+        workout_id = db.session.scalar(db.select(Workout.id).limit(1))
+        exercise_id = db.session.scalar(db.select(Exercise.id).limit(1))
+        before = WorkoutExercise.query.filter_by(workout_id=workout_id).count()
+
+    items = [{"exercise_id": exercise_id, "reps": 1}] * (MAX_WORKOUT_EXERCISES + 1)
+    resp = client.post(f"/workouts/{workout_id}/workout_exercises", json=items)
+    assert resp.status_code == 400
+    with app.app_context():
+        assert WorkoutExercise.query.filter_by(workout_id=workout_id).count() == before
+
+
+def test_delete_workout_cascades_without_loading_children(client, app, query_counter):
+    with app.app_context():
+        w = Workout(date=date(2035, 1, 1), duration_minutes=30)
+        e = Exercise(name="Cascade Exercise", category="Strength", equipment_needed=False)
+        db.session.add_all([w, e])
+        db.session.flush()
+        db.session.add_all(
+            WorkoutExercise(workout_id=w.id, exercise_id=e.id, reps=1) for _ in range(50)
+        )
+        db.session.commit()
+        wid, eid = w.id, e.id
+
+    query_counter.clear()
+    assert client.delete(f"/workouts/{wid}").status_code == 204
+    deletes = [q for q in query_counter if q.startswith("DELETE")]
+    # One statement for the workout (plus the rollup refresh); the 50 join
+    # rows go with ON DELETE CASCADE
+    assert not [q for q in deletes if q.startswith("DELETE FROM workout_exercises")]
+    assert len(query_counter) < 10
+
+    with app.app_context():
+        assert WorkoutExercise.query.filter_by(exercise_id=eid).count() == 0
+
+    assert client.delete(f"/workouts/{wid}").status_code == 404
+
+
+def test_delete_exercise_cascades_to_join_rows(client, app):
+    with app.app_context():
+        w = Workout(date=date(2035, 1, 2), duration_minutes=30)
+        e = Exercise(name="Cascade Exercise 2", category="Strength", equipment_needed=False)
+        db.session.add_all([w, e])
+        db.session.flush()
+        db.session.add(WorkoutExercise(workout_id=w.id, exercise_id=e.id, reps=1))
+        db.session.commit()
+        wid, eid = w.id, e.id
+
+    assert client.delete(f"/exercises/{eid}").status_code == 204
+    with app.app_context():
+        assert WorkoutExercise.query.filter_by(workout_id=wid).count() == 0
+        assert db.session.get(Workout, wid) is not None
+
+
+def test_bulk_delete_workouts(client, app):
+    with app.app_context():
+        workouts = [Workout(date=date(2036, 2, day), duration_minutes=10) for day in range(1, 7)]
+        db.session.add_all(workouts)
+        db.session.commit()
+        ids = [w.id for w in workouts]
+
+    resp = client.delete("/workouts", json={"ids": ids[:2]})
+    assert resp.status_code == 200
+    assert resp.get_json() == {"deleted": 2}
+
+    resp = client.delete("/workouts", json={"date_from": "2036-02-03", "date_to": "2036-02-04"})
+    assert resp.get_json() == {"deleted": 2}
+
+    with app.app_context():
+        remaining = Workout.query.filter(Workout.id.in_(ids)).all()
+        assert sorted(w.id for w in remaining) == ids[4:]
+
+
+def test_bulk_delete_workouts_requires_criteria(client):
+    assert client.delete("/workouts", json={}).status_code == 400
+    assert client.delete("/workouts").status_code == 400
+    assert client.delete("/workouts", json={"ids": []}).status_code == 400
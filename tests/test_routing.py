@@ -0,0 +1,94 @@
+# tests/test_routing.py
+
+import json
+
+import pytest
+from sqlalchemy import insert
+
+from server.app import create_app
+from server.models import Exercise, db
+from server.routing import STICKY_COOKIE
+
+
+def _names(resp):
+    # Closing the response records its metrics
+    resp.close()
+    return {exercise["name"] for exercise in resp.get_json()}
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """An app with a primary and one replica, each its own SQLite file."""
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "DATABASE_REPLICA_URLS": [f"sqlite:///{tmp_path / 'replica.db'}"],
+            "SQL_INSTRUMENTATION": True,
+            "RESPONSE_CACHE_MAX_ENTRIES": 0,
+        }
+    )
+    with app.app_context():
+        # Different rows on each side show which one served a read
+        for key, name in ((None, "Primary Row"), ("replica_0", "Replica Row")):
+            engine = db.engines[key]
+            db.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(Exercise).values(
+                        name=name, category="Strength", equipment_needed=False
+                    )
+                )
+    return app
+
+
+def test_reads_go_to_replica_and_writes_to_primary(replicated):
+    client = replicated.test_client()
+
+    resp = client.get("/exercises")
+    assert _names(resp) == {"Replica Row"}
+    assert 'db-route;desc="replica_0"' in resp.headers["Server-Timing"]
+
+    resp = client.post(
+        "/exercises",
+        data=json.dumps(
+            {"name": "Written Row", "category": "Cardio", "equipment_needed": True}
+        ),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    assert 'db-route;desc="primary"' in resp.headers["Server-Timing"]
+    assert STICKY_COOKIE in resp.headers["Set-Cookie"]
+    resp.close()
+
+    # Read-your-writes: the sticky cookie sends this client to the primary
+    resp = client.get("/exercises")
+    assert _names(resp) == {"Primary Row", "Written Row"}
+
+    client.delete_cookie("localhost", STICKY_COOKIE)
+    assert _names(client.get("/exercises")) == {"Replica Row"}
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert (
+        'db_routed_requests_total{endpoint="api.get_exercises",method="GET",'
+        'target="replica_0"} 2'
+    ) in body
+    assert (
+        'db_routed_requests_total{endpoint="api.get_exercises",method="GET",'
+        'target="primary"} 1'
+    ) in body
+
+
+def test_stickiness_can_be_disabled(replicated):
+    replicated.config["DATABASE_REPLICA_STICKY_SECONDS"] = 0
+    client = replicated.test_client()
+
+    resp = client.post(
+        "/exercises",
+        data=json.dumps(
+            {"name": "Unsticky Row", "category": "Cardio", "equipment_needed": True}
+        ),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    assert "Set-Cookie" not in resp.headers
+    assert _names(client.get("/exercises")) == {"Replica Row"}
@@ -37,3 +37,24 @@ def test_workout_exercise_schema_requires_one_field():
     }
     with pytest.raises(ValidationError):
         workout_exercise_schema.load(data)
+
+
+def test_exercise_schema_applies_the_model_rules():
+    data = exercise_schema.load(
+        {"name": "  Push-Up ", "category": " Strength ", "equipment_needed": False}
+    )
+    assert data == {"name": "Push-Up", "category": "Strength", "equipment_needed": False}
+
+    # Too short once stripped, as Exercise.validate_name sees it
+    with pytest.raises(ValidationError):
+        exercise_schema.load(
+            {"name": "  Pu  ", "category": "Strength", "equipment_needed": False}
+        )
+    with pytest.raises(ValidationError):
+        exercise_schema.load({"name": "Push-Up", "category": "  ", "equipment_needed": False})
+
+
+def test_schemas_do_not_load_ids():
+    with pytest.raises(ValidationError) as err:
+        workout_schema.load({"id": 1, "date": "2025-01-01", "duration_minutes": 5})
+    assert "id" in err.value.messages
@@ -0,0 +1,119 @@
+# tests/test_search.py
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select, text
+
+from server.app import create_app
+from server.models import db, Exercise, Workout
+from server.search import escape_like, match_expression, rebuild
+from server.seed import seed_data
+
+
+@pytest.fixture
+def search_app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def add_exercises(*names, category="Strength"):
+    db.session.add_all(
+        Exercise(name=name, category=category, equipment_needed=False) for name in names
+    )
+    db.session.commit()
+
+
+def exercise_names(client, url):
+    resp = client.get(url)
+    assert resp.status_code == 200, resp.get_json()
+    body = resp.get_json()
+    return [e["name"] for e in (body["exercises"] if isinstance(body, dict) else body)]
+
+
+def test_match_expression_quotes_words():
+    assert match_expression("bench pr") == '"bench" "pr"*'
+    # Operators and column filters are searched for, not interpreted
+    assert match_expression('name:squat OR "x') == '"name" "squat" "OR" "x"*'
+    assert match_expression(" -- ") is None
+    assert escape_like(r"50%_a\b") == r"50\%\_a\\b"
+
+
+def test_search_ranks_and_filters(search_app):
+    seed_data()
+    client = search_app.test_client()
+    resp = client.get("/search?q=leg")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert set(body) == {"exercises", "workouts"}
+    assert body["workouts"] and all("leg" in w["notes"].lower() for w in body["workouts"])
+    assert "workout_exercises" not in body["workouts"][0]
+
+    # Words match in any indexed column, the last one as a prefix
+    assert "Bench Press" in exercise_names(client, "/search?q=strength%20ben&type=exercises")
+    assert client.get("/search?q=cardio&type=workouts").get_json().keys() == {"workouts"}
+    assert client.get("/search?q=zzzz").get_json() == {"exercises": [], "workouts": []}
+
+
+def test_search_ranking(search_app):
+    add_exercises("Row", "Row row row your boat", "Upright row", "Squat")
+    client = search_app.test_client()
+    # bm25: the more often (and the shorter) the better
+    names = exercise_names(client, "/search?q=row&type=exercises")
+    assert names[0] == "Row row row your boat"
+    assert set(names) == {"Row", "Row row row your boat", "Upright row"}
+    assert len(exercise_names(client, "/search?q=row&type=exercises&limit=1")) == 1
+
+
+def test_search_validation(client):
+    for query in ("", "?q=", "?q=a&limit=0", "?q=a&type=users"):
+        resp = client.get("/search" + query)
+        assert resp.status_code == 400
+        assert resp.get_json()["message"] == "Invalid query parameters"
+    assert client.get("/search/exercises").status_code == 400
+
+
+def test_triggers_keep_the_index_in_step(search_app):
+    client = search_app.test_client()
+    add_exercises("Goblet Squat")
+    db.session.add(Workout(date=date(2025, 3, 1), duration_minutes=20, notes="Hill sprints"))
+    db.session.commit()
+    assert exercise_names(client, "/search?q=goblet") == ["Goblet Squat"]
+    assert len(client.get("/search?q=hill").get_json()["workouts"]) == 1
+
+    exercise = db.session.scalar(select(Exercise).where(Exercise.name == "Goblet Squat"))
+    exercise.name = "Zercher Squat"
+    db.session.commit()
+    assert exercise_names(client, "/search?q=goblet") == []
+    assert exercise_names(client, "/search?q=zerch") == ["Zercher Squat"]
+
+    db.session.delete(exercise)
+    db.session.execute(text("DELETE FROM workouts"))
+    db.session.commit()
+    assert client.get("/search?q=zercher%20hill").get_json() == {
+        "exercises": [],
+        "workouts": [],
+    }
+
+    # The external-content index agrees with the table after the writes
+    db.session.execute(
+        text("INSERT INTO exercises_fts(exercises_fts, rank) VALUES ('integrity-check', 1)")
+    )
+    rebuild()
+
+
+def test_typeahead_is_case_insensitive_prefix(search_app):
+    add_exercises("Bench Press", "bench dip", "Back Squat", "100% effort", "100 ups")
+    client = search_app.test_client()
+    assert exercise_names(client, "/search/exercises?prefix=BEN") == ["bench dip", "Bench Press"]
+    assert exercise_names(client, "/search/exercises?prefix=b&limit=2") == [
+        "Back Squat",
+        "bench dip",
+    ]
+    # LIKE wildcards in the prefix are literal
+    assert exercise_names(client, "/search/exercises?prefix=100%25") == ["100% effort"]
+    assert exercise_names(client, "/search/exercises?prefix=_") == []
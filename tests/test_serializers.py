@@ -0,0 +1,109 @@
+# tests/test_serializers.py
+
+from datetime import date
+
+from marshmallow import Schema, fields
+from sqlalchemy import insert, select
+
+import pytest
+
+from server.app import create_app, exercises_schema, workouts_schema
+from server.models import db, Exercise, Workout, WorkoutExercise
+from server.schemas import WorkoutSchema, workout_load_options
+from server.serializers import (
+    RowSerializer,
+    dump_exercises,
+    exercise_serializer,
+    workout_dump,
+)
+from server.synthetic import generate_dataset
+
+
+def test_row_dumps_are_byte_identical_to_marshmallow():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        db.create_all()
+        generate_dataset(60, 12, 4, seed=3)
+        # A workout without join rows, and one repeating an exercise
+        db.session.execute(
+            insert(Workout), [{"date": date(2020, 5, 17), "duration_minutes": 5}]
+        )
+        db.session.execute(
+            insert(WorkoutExercise),
+            [
+                {"workout_id": 1, "exercise_id": 2, "reps": 1},
+                {"workout_id": 1, "exercise_id": 2, "duration_seconds": 30},
+            ],
+        )
+        db.session.commit()
+
+        workouts = db.session.scalars(
+            select(Workout).options(*workout_load_options()).order_by(Workout.id)
+        ).all()
+        dumper = workout_dump()
+        rows = db.session.execute(dumper.select().order_by(Workout.id)).all()
+        fast = dumper.dump(rows, db.session.execute(dumper.details_select(rows)))
+        assert fast == workouts_schema.dump(workouts)
+        assert app.json.dumps(fast) == app.json.dumps(workouts_schema.dump(workouts))
+        assert any(w["notes"] is None for w in fast)
+        assert any(not w["workout_exercises"] for w in fast)
+
+        exercises = db.session.scalars(select(Exercise).order_by(Exercise.id)).all()
+        rows = db.session.execute(
+            select(*exercise_serializer.columns).order_by(Exercise.id)
+        ).all()
+        assert app.json.dumps(dump_exercises(rows)) == app.json.dumps(
+            exercises_schema.dump(exercises)
+        )
+
+        assert dumper.dump([], ()) == []
+        assert dumper.details_select([]) is None
+
+
+@pytest.mark.parametrize(
+    "fields, expand",
+    [
+        (("date", "duration_minutes"), ()),
+        (("id", "notes"), ("exercises",)),
+        (("date",), ("workout_exercises",)),
+        (None, ("workout_exercises", "exercises")),
+    ],
+)
+def test_sparse_dumps_match_schema_only(app, fields, expand):
+    dumper = workout_dump(fields, expand)
+    rows = db.session.execute(dumper.select().order_by(Workout.id)).all()
+    details = dumper.details_select(rows)
+    fast = dumper.dump(rows, db.session.execute(details) if details is not None else ())
+
+    only = (fields or WorkoutSchema().dump_fields.keys() - {"workout_exercises", "exercises"})
+    schema = WorkoutSchema(many=True, only=tuple(only) + expand)
+    workouts = db.session.scalars(
+        select(Workout).options(*workout_load_options()).order_by(Workout.id)
+    ).all()
+    assert app.json.dumps(fast) == app.json.dumps(schema.dump(workouts))
+
+    # Only what is dumped is read
+    assert (details is None) == (not expand)
+    if details is not None and "exercises" not in expand:
+        assert "JOIN" not in str(details.compile())
+
+
+def test_workout_dump_defaults_and_sharing():
+    assert workout_dump().expand == ("workout_exercises", "exercises")
+    assert workout_dump(fields=("date",)).expand == ()
+    assert workout_dump(("duration_minutes", "date"), ()) is workout_dump(
+        ("date", "duration_minutes"), ()
+    )
+
+
+def test_fields_with_options_use_their_own_serialization(app):
+    class FormattedSchema(Schema):
+        date = fields.Date(format="%d/%m/%Y")
+        duration_minutes = fields.Integer(as_string=True)
+        notes = fields.String(data_key="comment")
+
+    schema = FormattedSchema()
+    serializer = RowSerializer(schema, Workout.__table__)
+    rows = db.session.execute(select(*serializer.columns)).all()
+    assert rows
+    assert [serializer(row) for row in rows] == schema.dump(rows, many=True)
@@ -0,0 +1,69 @@
+# tests/test_stats.py
+
+from datetime import date
+
+import pytest
+
+from server.models import db, Exercise, Workout, WorkoutExercise
+
+
+@pytest.fixture(scope="module")
+def stats_data(app):
+    """Two weeks of workouts in 2040, isolated from other tests by date."""
+    with app.app_context():
+        press = Exercise(name="Stats Press", category="StatsStrength", equipment_needed=True)
+        row = Exercise(name="Stats Row", category="StatsCardio", equipment_needed=True)
+        # 2040-01-01 is a Sunday (ISO week 2039-W52); 2040-01-02 a Monday
+        w1 = Workout(date=date(2040, 1, 1), duration_minutes=30)
+        w2 = Workout(date=date(2040, 1, 2), duration_minutes=45)
+        w3 = Workout(date=date(2040, 1, 4), duration_minutes=20)
+        db.session.add_all([press, row, w1, w2, w3])
+        db.session.flush()
+        db.session.add_all(
+            [
+                WorkoutExercise(workout_id=w1.id, exercise_id=press.id, reps=10, sets=3),
+                WorkoutExercise(workout_id=w2.id, exercise_id=press.id, reps=5, sets=5),
+                WorkoutExercise(workout_id=w2.id, exercise_id=row.id, duration_seconds=600),
+                WorkoutExercise(workout_id=w3.id, exercise_id=row.id, duration_seconds=300),
+            ]
+        )
+        db.session.commit()
+
+
+RANGE = "date_from=2040-01-01&date_to=2040-01-31"
+
+
+def test_exercise_stats(client, stats_data):
+    resp = client.get(f"/stats/exercises?{RANGE}")
+    assert resp.status_code == 200
+    by_name = {row["name"]: row for row in resp.get_json()}
+    assert by_name["Stats Press"]["total_volume"] == 10 * 3 + 5 * 5
+    assert by_name["Stats Press"]["total_sets"] == 8
+    assert by_name["Stats Press"]["workout_count"] == 2
+    assert by_name["Stats Row"]["total_duration_seconds"] == 900
+    assert by_name["Stats Row"]["total_volume"] == 0
+
+
+def test_category_stats_respect_date_range(client, stats_data):
+    resp = client.get("/stats/categories?date_from=2040-01-02&date_to=2040-01-02")
+    by_category = {row["category"]: row for row in resp.get_json()}
+    assert by_category["StatsStrength"]["entries"] == 1
+    assert by_category["StatsCardio"]["total_duration_seconds"] == 600
+
+
+def test_weekly_stats_group_by_iso_week(client, stats_data):
+    resp = client.get(f"/stats/weekly?{RANGE}")
+    assert resp.status_code == 200
+    weeks = resp.get_json()
+    assert [w["week"] for w in weeks] == ["2039-W52", "2040-W01"]
+    assert [w["week_start"] for w in weeks] == ["2039-12-26", "2040-01-02"]
+    assert weeks[1]["workout_count"] == 2
+    # Minutes are counted once per workout, not once per exercise row
+    assert weeks[1]["total_duration_minutes"] == 65
+    assert weeks[1]["total_volume"] == 25
+    assert weeks[1]["total_duration_seconds"] == 900
+
+
+def test_stats_reject_bad_range(client):
+    resp = client.get("/stats/weekly?date_from=2040-02-01&date_to=2040-01-01")
+    assert resp.status_code == 400
@@ -0,0 +1,51 @@
+# tests/test_synthetic.py
+
+from sqlalchemy import delete, func, select
+
+from server.models import db, Exercise, Workout, WorkoutExercise
+from server.rollups import rebuild
+from server.synthetic import generate_dataset
+
+
+def snapshot(seed):
+    """Join rows produced for `seed`, without the database-assigned ids."""
+    return db.session.execute(
+        select(
+            Exercise.name,
+            Exercise.category,
+            Workout.date,
+            Workout.duration_minutes,
+            WorkoutExercise.reps,
+            WorkoutExercise.sets,
+            WorkoutExercise.duration_seconds,
+        )
+        .join(WorkoutExercise.exercise)
+        .join(WorkoutExercise.workout)
+        .where(Exercise.name.like(f"Synthetic {seed}-%"))
+        .order_by(WorkoutExercise.id)
+    ).all()
+
+
+def remove_since(workout_id, exercise_id):
+    db.session.execute(delete(WorkoutExercise).where(WorkoutExercise.workout_id > workout_id))
+    db.session.execute(delete(Workout).where(Workout.id > workout_id))
+    db.session.execute(delete(Exercise).where(Exercise.id > exercise_id))
+    db.session.commit()
+    rebuild()
+
+
+def test_generate_dataset_is_reproducible(app):
+    with app.app_context():
+        last_workout = db.session.scalar(select(func.max(Workout.id)))
+        last_exercise = db.session.scalar(select(func.max(Exercise.id)))
+
+        counts = generate_dataset(30, 8, 3, seed=101, batch_size=7)
+        assert counts == {"exercises": 8, "workouts": 30, "workout_exercises": 90}
+        first = snapshot(101)
+        assert len(first) == 90
+
+        # Batch size does not change the generated rows
+        remove_since(last_workout, last_exercise)
+        generate_dataset(30, 8, 3, seed=101, batch_size=1000)
+        assert snapshot(101) == first
+        remove_since(last_workout, last_exercise)
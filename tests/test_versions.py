@@ -0,0 +1,138 @@
+# tests/test_versions.py
+
+import json
+from datetime import date
+
+from server.models import Exercise, TableVersion, Workout, db
+
+
+def test_exercise_catalog_conditional_get(client, query_counter):
+    resp = client.get("/exercises")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    assert resp.headers["Last-Modified"]
+    assert resp.cache_control.public
+    assert resp.cache_control.max_age == 60
+
+    query_counter.clear()
+    resp = client.get("/exercises", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.get_data() == b""
+    assert resp.headers["ETag"] == etag
+    # Only the change counters were read
+    assert len(query_counter) == 1
+    assert "table_versions" in query_counter[0]
+
+    resp = client.post(
+        "/exercises",
+        data=json.dumps(
+            {"name": "Conditional Lunge", "category": "Strength", "equipment_needed": False}
+        ),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+
+    resp = client.get("/exercises", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert "Conditional Lunge" in [e["name"] for e in resp.get_json()]
+
+
+def test_if_modified_since(client):
+    resp = client.get("/exercises")
+    last_modified = resp.headers["Last-Modified"]
+
+    resp = client.get("/exercises", headers={"If-Modified-Since": last_modified})
+    assert resp.status_code == 304
+
+    resp = client.get(
+        "/exercises", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+    )
+    assert resp.status_code == 200
+
+
+def test_workout_etag_follows_bulk_writes_and_cascades(client, app):
+    with app.app_context():
+        workout = Workout(date=date(2034, 2, 1), duration_minutes=20)
+        exercise = Exercise(name="Conditional Row", category="Cardio", equipment_needed=True)
+        db.session.add_all([workout, exercise])
+        db.session.commit()
+        wid, eid = workout.id, exercise.id
+
+    etag = client.get(f"/workouts/{wid}").headers["ETag"]
+    assert client.get(f"/workouts/{wid}", headers={"If-None-Match": etag}).status_code == 304
+
+    # Core INSERT ... RETURNING through the bulk route
+    resp = client.post(
+        f"/workouts/{wid}/workout_exercises",
+        data=json.dumps([{"exercise_id": eid, "duration_seconds": 600}]),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    resp = client.get(f"/workouts/{wid}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.get_json()["workout_exercises"]) == 1
+    etag = resp.headers["ETag"]
+
+    # Set-based delete whose join rows go with ON DELETE CASCADE
+    assert client.delete(f"/exercises/{eid}").status_code == 204
+    resp = client.get(f"/workouts/{wid}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json()["workout_exercises"] == []
+
+    with app.app_context():
+        tables = set(db.session.scalars(db.select(TableVersion.table_name)))
+    assert tables == {"exercises", "workouts", "workout_exercises"}
+
+
+def test_etag_differs_per_representation(client):
+    json_etag = client.get("/exercises").headers["ETag"]
+    resp = client.get("/exercises", headers={"Accept": "application/x-ndjson"})
+    assert resp.mimetype == "application/x-ndjson"
+    assert resp.headers["ETag"] != json_etag
+    assert "Accept" in resp.headers["Vary"]
+
+
+def test_not_found_has_no_etag(client):
+    resp = client.get("/workouts/99999")
+    assert resp.status_code == 404
+    assert "ETag" not in resp.headers
+
+
+def test_deletes_matching_nothing_keep_the_versions(client, app):
+    def versions():
+        with app.app_context():
+            rows = db.session.execute(
+                db.select(TableVersion.table_name, TableVersion.version)
+            )
+            return dict(rows.all())
+
+    client.get("/exercises")
+    before = versions()
+    assert client.delete("/exercises/999999").status_code == 404
+    assert client.delete("/workouts/999999").status_code == 404
+    resp = client.delete("/workouts", json={"ids": [999998, 999999]})
+    assert resp.get_json() == {"deleted": 0}
+    assert versions() == before
+
+
+def test_counters_are_bumped_once_at_commit(client, app, query_counter):
+    with app.app_context():
+        db.session.execute(db.delete(TableVersion))
+        db.session.commit()
+        exercise = Exercise(name="Versioned Plank", category="Core", equipment_needed=False)
+        db.session.add(exercise)
+        db.session.commit()
+        eid = exercise.id
+
+    # Exercise row and its cascaded join rows: the first write creates
+    # the counters, in a single statement after the DELETE
+    query_counter.clear()
+    assert client.delete(f"/exercises/{eid}").status_code == 204
+    bumps = [i for i, q in enumerate(query_counter) if "table_versions" in q]
+    assert len(bumps) == 1
+    assert bumps[0] > next(i for i, q in enumerate(query_counter) if q.startswith("DELETE"))
+
+    with app.app_context():
+        rows = db.session.execute(db.select(TableVersion.table_name, TableVersion.version))
+        assert dict(rows.all()) == {"exercises": 2, "workout_exercises": 1}